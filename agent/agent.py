@@ -3,10 +3,18 @@ Full Agent class connecting planner, memory, executor
 """
 
 from agent.core import AgentCore
+from agent.llm_cache import ResponseCache
+from agent.providers import LLMProvider
 from agent.planner import Planner
-from agent.executor import Executor
+from agent.executor import Executor, LLM_BATCH_PARALLEL
 from agent.tools import ToolRegistry
-from agent.memory.module import MemoryModule # ✅ MEMORY
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, Optional
+from agent.memory.router import MemoryRouter, DEFAULT_TENANT # ✅ MEMORY
 
 from tools import ml_tools
 from tools.feature_tools import (
@@ -18,13 +26,59 @@ from tools.project_tools import generate_scaffold
 from tools.eda_tools import load_csv, preview_data, describe_data, column_info
 
 
+# Plan refinement policies (see Agent.run)
+REFINE_OFF = "off"                  # never ask the LLM to rewrite the plan
+REFINE_LLM_STEPS = "llm_steps"      # only when the plan has llm fallback steps
+REFINE_SPECULATIVE = "speculative"  # like llm_steps, but concurrently with the tool steps
+REFINE_POLICIES = (REFINE_OFF, REFINE_LLM_STEPS, REFINE_SPECULATIVE)
+
+_router: Optional[MemoryRouter] = None
+_router_lock = threading.Lock()
+
+
+def default_router() -> MemoryRouter:
+    """Process-wide shard router (memory/<tenant>.db), shared by every Agent."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            # write-behind: steps don't wait on SQLite commits. Consolidation
+            # stays opt-in (MemoryRouter(..., consolidate=True)): a merged row
+            # keeps only the first copy's text
+            _router = MemoryRouter("memory", write_behind=True)
+        return _router
+
+
+@dataclass
+class RunResult:
+    output: object
+    refine_policy: str
+    refined: bool = False         # a refinement call was made
+    refinement_used: bool = False # its text reached an llm step
+    refine_ms: Optional[float] = None  # measured; None if not made or unfinished
+    # vs. the old blocking refine-then-execute; None when a skipped
+    # refinement has no measured round trip to credit yet
+    latency_saved_ms: Optional[float] = None
+
+    def refinement(self) -> dict:
+        return {
+            "policy": self.refine_policy,
+            "used": self.refinement_used,
+            "refine_ms": self.refine_ms,
+            "latency_saved_ms": self.latency_saved_ms,
+        }
+
+
 class Agent:
-    def __init__(self, model: str = None):
-        # ✅ Memory Module
-        self.memory = MemoryModule("agent_memory.db")
+    def __init__(self, model: str = None, *, tenant: str = DEFAULT_TENANT,
+                 session: Optional[str] = None, router: Optional[MemoryRouter] = None,
+                 refine: str = REFINE_SPECULATIVE, llm_cache: Optional[ResponseCache] = None,
+                 llm_batch: str = LLM_BATCH_PARALLEL, provider: Optional[LLMProvider] = None):
+        # ✅ Memory Module: this tenant's (or session's) shard
+        self.tenant, self.session = tenant, session
+        self.memory = (router or default_router()).get(tenant, session)
 
-        # Core LLM
-        self.core = AgentCore(model=model)
+        # Core LLM (provider: e.g. providers.FakeProvider to run offline)
+        self.core = AgentCore(model=model, provider=provider, cache=llm_cache)
 
         # ✅ Pass memory into Planner
         self.planner = Planner(memory=self.memory)
@@ -48,17 +102,219 @@ class Agent:
         self.tools.register("save_model", ml_tools.save_model)
 
         # ✅ Pass memory into Executor
-        self.executor = Executor(self.core, self.tools, memory=self.memory)
+        self.executor = Executor(self.core, self.tools, memory=self.memory, llm_batch=llm_batch)
+
+        # Plan refinement: policy, speculative worker and latency accounting
+        if refine not in REFINE_POLICIES:
+            raise ValueError(f"Unknown refine policy '{refine}' (expected one of {REFINE_POLICIES})")
+        self.refine = refine
+        self._refine_pool: Optional[ThreadPoolExecutor] = None
+        self._refine_lock = threading.Lock()
+        self._refine_ewma_ms: Optional[float] = None  # typical refinement round trip
+        self.runs = 0
+        self.refinements = 0
+        self.latency_saved_ms = 0.0
 
     def run(self, user_input: str) -> str:
+        return self.run_detailed(user_input).output
+
+    def run_detailed(self, user_input: str) -> RunResult:
+        """
+        Plan, optionally refine, execute. The regex plan is what runs; an
+        LLM rewrite of it is only passed to llm steps as extra context, so
+        refinement is skipped when there are none (refine="llm_steps") or
+        overlapped with the tool steps and used only if it is ready when
+        an llm step starts (refine="speculative"; skipped when no tool step
+        comes before the first llm step). latency_saved_ms is the
+        refinement round trip the caller no longer waits for: a skipped
+        refinement (any policy) is credited its typical duration, None
+        until one has been measured.
+        """
         # ✅ Step 1: Planner returns both plan + memory context
+        plan, report, llm_context, finish = self._prepare(user_input)
+
+        # ✅ Step 3: Execute the steps
+        report.output = self.executor.execute_steps(plan, llm_context=llm_context)
+        finish()
+        return report
+
+    async def arun(self, user_input: str) -> str:
+        return (await self.arun_detailed(user_input)).output
+
+    async def arun_detailed(self, user_input: str) -> RunResult:
+        """
+        run_detailed() without a thread per request: LLM calls go through
+        AgentCore.agenerate() (shared async client, concurrency cap,
+        retries, deadline); planning and tool steps run in worker threads.
+        """
+        plan, report, llm_context, finish = await self._aprepare(user_input)
+        report.output = await self.executor.aexecute_steps(plan, llm_context=llm_context)
+        finish()
+        return report
+
+    def stream(self, user_input: str) -> Iterator[dict]:
+        """
+        Same as run_detailed(), as events: {"event": "plan", "plan": [...]},
+        then Executor.stream_steps() events; the final "done" event also
+        carries the refinement report.
+        """
+        plan, report, llm_context, finish = self._prepare(user_input)
+        finished = False
+        events = self.executor.stream_steps(plan, llm_context=llm_context)
+        try:
+            yield {"event": "plan", "plan": plan}
+            for event in events:
+                if event["event"] == "done":
+                    report.output = event["output"]
+                    finished = True
+                    finish()
+                    event = {**event, "refinement": report.refinement()}
+                yield event
+        finally:
+            # a client that went away: run no further steps; either way (or
+            # after an "error" event) still settle the run
+            events.close()
+            if not finished:
+                finish()
+
+    def _plan(self, user_input: str):
         plan_bundle = self.planner.create_plan(user_input)
+        if isinstance(plan_bundle, list):  # empty input: bare llm fallback
+            plan_bundle = {"plan": plan_bundle, "memory_context": ""}
         plan = plan_bundle["plan"]
-        mem_ctx = plan_bundle["memory_context"]
+        has_llm = any(step.get("type") == "llm" for step in plan)
+        return plan, plan_bundle["memory_context"], RunResult(output=None, refine_policy=self.refine), has_llm
+
+    @staticmethod
+    def _can_speculate(plan) -> bool:
+        # a speculative refinement only helps if tool steps run before the
+        # first llm step; otherwise that step starts before it can be ready
+        for step in plan:
+            if step.get("type") == "llm":
+                return False
+            if step.get("type") == "tool":
+                return True
+        return False
+
+    def _skips_refinement(self, plan, has_llm: bool) -> bool:
+        if self.refine == REFINE_OFF or not has_llm:
+            return True
+        # speculation with nothing to overlap it with: skip it
+        return self.refine == REFINE_SPECULATIVE and not self._can_speculate(plan)
+
+    def _skip_refinement(self, plan, report: RunResult):
+        # every skipped refinement is credited the same way: the round trip
+        # a blocking refine-then-execute would have cost
+        report.latency_saved_ms = self._refine_estimate_ms()
+        return plan, report, None, lambda: self._account(report)
+
+    def _prepare(self, user_input: str):
+        """Plan + refinement policy: (plan, report, llm_context, finish)."""
+        plan, mem_ctx, report, has_llm = self._plan(user_input)
 
         # ✅ Step 2: Give the LLM a chance to refine the plan using memory context
-        # (This step is optional, but gives MUCH better multi-step clarity)
-        planner_prompt = f"""
+        if self._skips_refinement(plan, has_llm):
+            return self._skip_refinement(plan, report)
+
+        if self.refine == REFINE_LLM_STEPS:
+            start = time.perf_counter()
+            refined_plan_text = self.core.generate(self._refine_prompt(user_input, mem_ctx, plan))
+            report.refined, report.refinement_used = True, True
+            report.refine_ms = self._record_refine(start)
+            report.latency_saved_ms = 0.0  # waited for it
+            return plan, report, lambda: refined_plan_text, lambda: self._account(report)
+
+        # REFINE_SPECULATIVE
+        prompt = self._refine_prompt(user_input, mem_ctx, plan)
+        timing = {}
+
+        def refine():
+            start = time.perf_counter()
+            text = self.core.generate(prompt)
+            timing["ms"] = self._record_refine(start)
+            return text
+
+        start = time.perf_counter()
+        future = self._refiner().submit(refine)
+        report.refined = True
+
+        def ready_refinement():
+            # never wait: a refinement still in flight is simply not used
+            if future.done() and future.exception() is None:
+                report.refinement_used = True
+                return future.result()
+            return None
+
+        def finish():
+            future.cancel()  # still queued behind other requests: drop it
+            self._settle_speculation(report, timing.get("ms"), start)
+
+        return plan, report, ready_refinement, finish
+
+    async def _aprepare(self, user_input: str):
+        """_prepare() for the event loop; a speculative refinement is a task."""
+        # planning reads memory (SQLite): keep it off the loop
+        plan, mem_ctx, report, has_llm = await asyncio.to_thread(self._plan, user_input)
+
+        if self._skips_refinement(plan, has_llm):
+            return self._skip_refinement(plan, report)
+
+        prompt = self._refine_prompt(user_input, mem_ctx, plan)
+        if self.refine == REFINE_LLM_STEPS:
+            start = time.perf_counter()
+            refined_plan_text = await self.core.agenerate(prompt)
+            report.refined, report.refinement_used = True, True
+            report.refine_ms = self._record_refine(start)
+            report.latency_saved_ms = 0.0  # waited for it
+            return plan, report, lambda: refined_plan_text, lambda: self._account(report)
+
+        timing = {}
+
+        async def refine():
+            start = time.perf_counter()
+            text = await self.core.agenerate(prompt)
+            timing["ms"] = self._record_refine(start)
+            return text
+
+        start = time.perf_counter()
+        task = asyncio.ensure_future(refine())
+        report.refined = True
+
+        def ready_refinement():
+            if task.done() and not task.cancelled() and task.exception() is None:
+                report.refinement_used = True
+                return task.result()
+            return None
+
+        def finish():
+            if task.done():
+                task.cancelled() or task.exception()  # mark a failure as seen
+            else:
+                task.cancel()  # unlike a thread, an in-flight call can be dropped
+            self._settle_speculation(report, timing.get("ms"), start)
+
+        return plan, report, ready_refinement, finish
+
+    def _settle_speculation(self, report: RunResult, refine_ms: Optional[float], start: float) -> None:
+        # nothing waited on it; if unfinished it takes at least as long as
+        # it has been running, or its typical duration
+        report.refine_ms = refine_ms
+        if refine_ms is not None:
+            report.latency_saved_ms = refine_ms
+        else:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            report.latency_saved_ms = round(max(elapsed_ms, self._refine_estimate_ms() or 0.0), 3)
+        self._account(report)
+
+    def _account(self, report: RunResult) -> None:
+        with self._refine_lock:
+            self.runs += 1
+            self.refinements += report.refined
+            if report.latency_saved_ms is not None:
+                self.latency_saved_ms += report.latency_saved_ms
+
+    def _refine_prompt(self, user_input: str, mem_ctx: str, plan) -> str:
+        return f"""
 You are the Planner.
 User goal: {user_input}
 
@@ -71,10 +327,41 @@ Initial interpreted plan:
 Rewriete this into a clean, sequential, executable list of steps.
 Keep steps simple and tool-focused.
 """
-        refined_plan_text = self.core.generate(planner_prompt)
 
-        # ✅ Optional: if your plan is already bucketed correctly, keep original tool steps.
-        # For now, we keep your regex-based plan.
+    def _refiner(self) -> ThreadPoolExecutor:
+        with self._refine_lock:
+            if self._refine_pool is None:
+                self._refine_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="refine")
+            return self._refine_pool
 
-        # ✅ Step 3: Execute the steps
-        return self.executor.execute_steps(plan)
\ No newline at end of file
+    def _record_refine(self, start: float) -> float:
+        ms = (time.perf_counter() - start) * 1000
+        with self._refine_lock:
+            prev = self._refine_ewma_ms
+            self._refine_ewma_ms = ms if prev is None else 0.8 * prev + 0.2 * ms
+        return round(ms, 3)
+
+    def _refine_estimate_ms(self) -> Optional[float]:
+        # typical refinement round trip; None until one has been measured
+        # (refine="off" never measures one)
+        with self._refine_lock:
+            ewma = self._refine_ewma_ms
+        return None if ewma is None else round(ewma, 3)
+
+    def close(self) -> None:
+        """Stop this agent's worker threads. Its memory shard belongs to the router."""
+        self.executor.close()
+        with self._refine_lock:
+            pool, self._refine_pool = self._refine_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def refinement_stats(self) -> dict:
+        with self._refine_lock:
+            return {
+                "policy": self.refine,
+                "runs": self.runs,
+                "refinements": self.refinements,
+                "typical_refine_ms": None if self._refine_ewma_ms is None else round(self._refine_ewma_ms, 3),
+                "latency_saved_ms": round(self.latency_saved_ms, 3),
+            }
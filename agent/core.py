@@ -2,31 +2,352 @@
 core.py — Core LLM interface and agent logic (first implementation).
 """
 
+import asyncio
 import os
-from typing import Optional
-from openai import OpenAI
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+import openai
+from openai import AsyncOpenAI, OpenAI
+from agent import metrics
+from agent.debug import log
+from agent.llm_cache import ResponseCache, cache_key
+from agent.providers import FakeProvider, LLMProvider, ProviderUnavailable
 
+_DEFAULT_MAX_CONCURRENCY = 16
+
+# transient failures worth another attempt
+_RETRYABLE = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError,
+              ProviderUnavailable)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    retries: int = 3          # attempts after the first
+    base_delay: float = 0.5   # seconds; doubles per attempt
+    max_delay: float = 8.0
+    deadline: float = 60.0    # seconds for the whole call, retries included
+
+    def delay(self, attempt: int) -> float:
+        # full jitter: uniform in [0, min(max_delay, base * 2^attempt)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class AsyncLLMPool:
+    """
+    One AsyncOpenAI client (one pooled HTTP connection pool) plus a
+    semaphore capping in-flight calls. Both are created on first use (the
+    client only if an OpenAI call needs it) and belong to the event loop
+    that made them; a pool used from a new loop starts over. Client
+    retries are off: AgentCore.agenerate() retries.
+    """
+
+    def __init__(self, max_concurrency: int = _DEFAULT_MAX_CONCURRENCY, **client_kwargs):
+        self.max_concurrency = max_concurrency
+        self.client_kwargs = client_kwargs
+        self._loop = None
+        self._client: Optional[AsyncOpenAI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.retries = 0
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._client = None
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        self._bind()
+        if self._client is None:
+            self._client = AsyncOpenAI(max_retries=0, **self.client_kwargs)
+        return self._client
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        self._bind()
+        return self._semaphore
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client, self._loop = None, None
+
+
+def _cancelling() -> bool:
+    """Has cancel() been requested for the current task (3.11+; else assume not)?"""
+    task = asyncio.current_task()
+    return bool(task is not None and getattr(task, "cancelling", lambda: 0)())
+
+
+_shared_client: Optional[OpenAI] = None
+_shared_pool: Optional[AsyncLLMPool] = None
+_env_provider: Optional[LLMProvider] = None
+_shared_lock = threading.Lock()
+
+
+def shared_client() -> OpenAI:
+    """Process-wide synchronous client (its HTTP connections are reused across agents)."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            # reads OPENAI_API_KEY from environment; AgentCore retries
+            _shared_client = OpenAI(max_retries=0)
+        return _shared_client
+
+
+def shared_async_pool() -> AsyncLLMPool:
+    """Process-wide AsyncLLMPool used by every AgentCore that isn't given one."""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = AsyncLLMPool()
+        return _shared_pool
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    The OpenAI Responses API. `client` is anything with
+    responses.create() (tests pass a stub); by default the shared client,
+    created on the first call, so building an AgentCore needs no API key.
+    """
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = shared_client()
+        return self._client
+
+    def complete(self, model: str, prompt: str, **params) -> str:
+        resp = self.client.responses.create(
+            model=model,
+            input=prompt,
+            **params
+        )
+
+        # NOTE: v2 -> message is an object, not a dict
+
+        return resp.output_text
+
+    def stream(self, model: str, prompt: str, **params) -> Iterator[str]:
+        events = self.client.responses.create(
+            model=model,
+            input=prompt,
+            stream=True,
+            **params
+        )
+        for event in events:
+            if getattr(event, "type", None) == "response.output_text.delta":
+                yield event.delta
+
+    async def acomplete(self, model: str, prompt: str, *, pool=None, timeout=None, **params) -> str:
+        pool = pool or shared_async_pool()
+        resp = await pool.client.responses.create(model=model, input=prompt, timeout=timeout, **params)
+        return resp.output_text
+
+
+def default_provider() -> LLMProvider:
+    """
+    Backend named by MLE_AGENT_LLM_PROVIDER: unset or "openai" is the
+    OpenAI API; "fake" or "fake:<spec>" (see FakeProvider.from_spec) is
+    one process-wide FakeProvider, for running offline.
+    """
+    global _env_provider
+    name, _, spec = os.environ.get("MLE_AGENT_LLM_PROVIDER", "openai").partition(":")
+    if name == "openai":
+        return OpenAIProvider()
+    if name != "fake":
+        raise ValueError(f"Unknown MLE_AGENT_LLM_PROVIDER '{name}' (expected 'openai' or 'fake')")
+    with _shared_lock:
+        if _env_provider is None:
+            _env_provider = FakeProvider.from_spec(spec)
+        return _env_provider
 
 
 class AgentCore:
-    def __init__(self, model: Optional[str] = None):
+    def __init__(self, model: Optional[str] = None, *, provider: Optional[LLMProvider] = None,
+                 cache: Optional[ResponseCache] = None, client=None,
+                 async_pool: Optional[AsyncLLMPool] = None, retry: RetryPolicy = RetryPolicy()):
         """
         Use env var OPEN_API_KEY. Do not pass api_key inline.
+        provider: the LLM backend (agent.providers); default_provider()
+        when not given, or OpenAI through `client` if that is.
+        cache: optional on-disk response cache; identical model + prompt +
+        params are answered from it instead of a new API call.
+        client: anything with responses.create() (tests pass a stub).
+        async_pool / retry: agenerate()'s shared client + concurrency cap,
+        and the backoff and deadline of every call.
         """
-        self.client = OpenAI()  # reads OPENAI_API_KEY from environment
+        if provider is None:
+            provider = OpenAIProvider(client) if client is not None else default_provider()
+        self.provider = provider
 
         self.model = model or "gpt-4o-mini"
-        
+        self.cache = cache
+        self.async_pool = async_pool
+        self.retry = retry
+        self.retries = 0  # sync calls; async ones count on their pool
+
+    @property
+    def client(self):
+        """The OpenAI client behind the provider (None for other backends)."""
+        return getattr(self.provider, "client", None)
+
+    @client.setter
+    def client(self, client) -> None:
+        self.provider = OpenAIProvider(client)
 
-    def generate(self, message: str) -> str:
+    def generate(self, message: str, **params) -> str:
         """
         Send a prompt to the LLM and return the response text (OpenAI v2 style)
+        Extra params (temperature, ...) go to responses.create and into the cache key.
         """
-        resp = self.client.responses.create(
-            model=self.model,
-            input=message
-        )
+        with metrics.stage(metrics.LLM):
+            if self.cache is None:
+                return self._create(message, params)
+            key = cache_key(self.model, message, params)
+            return self.cache.get_or_call(key, self.model, lambda: self._create(message, params))
 
-        # NOTE: v2 -> message is an object, not a dict
+    def _create(self, message: str, params: dict) -> str:
+        # same backoff as agenerate(); the deadline bounds the retries only
+        give_up = time.monotonic() + self.retry.deadline
+        attempt = 0
+        while True:
+            try:
+                return self.provider.complete(self.model, message, **params)
+            except _RETRYABLE as e:
+                delay = self.retry.delay(attempt)
+                if attempt >= self.retry.retries or time.monotonic() + delay >= give_up:
+                    raise
+                attempt += 1
+                self.retries += 1
+                log(f"[AgentCore] {type(e).__name__}, retry {attempt} in {delay:.2f}s")
+                time.sleep(delay)
 
-        return resp.output_text
+    def stream(self, message: str, **params) -> Iterator[str]:
+        """
+        Yield the response text as it is generated (output_text deltas).
+        A cached response comes back as one chunk; a streamed one is
+        cached once it has completed.
+        """
+        with metrics.stage(metrics.LLM):
+            key = cache_key(self.model, message, params) if self.cache is not None else None
+            if key is not None:
+                cached = self.cache.lookup(key)
+                if cached is not None:
+                    yield cached
+                    return
+
+            start = time.perf_counter()
+            chunks = []
+            for delta in self.provider.stream(self.model, message, **params):
+                chunks.append(delta)
+                yield delta
+
+            if key is not None:
+                self.cache.put(key, self.model, "".join(chunks), (time.perf_counter() - start) * 1000)
+
+    # ---------- async ----------
+    async def agenerate(self, message: str, *, deadline: Optional[float] = None, **params) -> str:
+        """
+        generate() on the event loop: at most pool.max_concurrency calls in
+        flight per process, transient errors retried with jittered
+        exponential backoff, TimeoutError once `deadline` seconds (default
+        retry.deadline) have passed. Identical concurrent prompts share
+        one call when a cache is configured.
+        """
+        with metrics.stage(metrics.LLM):
+            return await self._agenerate(message, deadline, params)
+
+    async def _agenerate(self, message: str, deadline: Optional[float], params: dict) -> str:
+        pool = self.async_pool or shared_async_pool()
+        deadline = self.retry.deadline if deadline is None else deadline
+        if self.cache is None:
+            return await self._acreate(pool, message, params, deadline)
+
+        key = cache_key(self.model, message, params)
+        cached = await asyncio.to_thread(self.cache.lookup, key)
+        if cached is not None:
+            return cached
+        pool._bind()
+        while True:
+            inflight = pool._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled() or _cancelling():
+                    raise  # this caller was cancelled
+                # the leader was cancelled, not us: lead the call or follow a new leader
+
+        fut = pool._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            start = time.perf_counter()
+            text = await self._acreate(pool, message, params, deadline)
+            fut.set_result(text)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # retrieved: no "never retrieved" warning without waiters
+            raise
+        finally:
+            pool._inflight.pop(key, None)
+        await asyncio.to_thread(self.cache.put, key, self.model, text, (time.perf_counter() - start) * 1000)
+        return text
+
+    async def _acreate(self, pool: AsyncLLMPool, message: str, params: dict, deadline: float) -> str:
+        loop = asyncio.get_running_loop()
+        give_up = loop.time() + deadline
+        attempt = 0
+        while True:
+            remaining = give_up - loop.time()
+            if remaining <= 0:
+                raise TimeoutError(f"LLM call exceeded its {deadline}s deadline")
+            try:
+                # time queued behind the concurrency cap counts against the deadline
+                semaphore = pool.semaphore
+                await asyncio.wait_for(semaphore.acquire(), remaining)
+                try:
+                    remaining = give_up - loop.time()
+                    if remaining <= 0:
+                        raise TimeoutError(f"LLM call exceeded its {deadline}s deadline")
+                    pool.in_flight += 1
+                    pool.peak_in_flight = max(pool.peak_in_flight, pool.in_flight)
+                    try:
+                        return await asyncio.wait_for(
+                            self.provider.acomplete(self.model, message, pool=pool,
+                                                    timeout=remaining, **params),
+                            remaining)
+                    finally:
+                        pool.in_flight -= 1
+                finally:
+                    semaphore.release()
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"LLM call exceeded its {deadline}s deadline") from None
+            except _RETRYABLE as e:
+                delay = self.retry.delay(attempt)
+                if loop.time() + delay >= give_up:
+                    # includes the client's own timeout firing right at the deadline
+                    raise TimeoutError(f"LLM call exceeded its {deadline}s deadline") from e
+                if attempt >= self.retry.retries:
+                    raise
+                attempt += 1
+                pool.retries += 1
+                log(f"[AgentCore] {type(e).__name__}, retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats() if self.cache else {}
@@ -0,0 +1,145 @@
+"""
+Plan dependency graph: which ToolRegistry.state keys each step reads and
+writes, and which earlier steps it has to wait for
+"""
+
+import os
+import re
+from typing import Dict, List, Tuple
+
+# Wildcard key: the step may touch anything (run_python, unknown tools)
+ANY = "*"
+
+# tool name -> (reads, writes); "file:<path>" keys stand for files on disk,
+# filled in from the step's kwargs
+_EFFECTS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "read_file": (("file:{path}",), ()),
+    "write_file": ((), ("file:{path}",)),
+    "run_python": ((ANY,), (ANY,)),
+    "generate_scaffold": ((), ("file:{base_path}/{project_name}",)),
+    "load_csv": (("file:{path}",), ("df",)),
+    "preview_data": (("df",), ()),
+    "describe_data": (("df",), ()),
+    "column_info": (("df",), ()),
+    "split_data": (("df",), ("train", "test")),
+    "encode_categoricals": (("df",), ("df",)),
+    "scale_numericals": (("df",), ("df",)),
+    "save_dataframe": (("df",), ("file:{path}",)),
+    "train_model": (("df",), ("model", "metrics", "confusion_matrix")),
+    "evaluate_model": (("model", "test", "file:{path}"), ()),
+    "save_model": (("model", "df"), ("file:{path}",)),
+}
+
+# an llm clause that points back at something ("explain it", "summarize
+# the result", "why is that?") needs the previous answer
+_ANAPHORA = re.compile(
+    r"\b(?:it|its|this|that|these|those|they|them|their|above|previous|prior|"
+    r"result|results|output|answer|same|also|again|further|more)\b", re.IGNORECASE)
+# a clause stands on its own only if it reads as a full request: a question
+# or an imperative. The splitter also cuts on a bare "and", so the second
+# half of "compare logistic regression and random forest" is a fragment
+# ("random forest") that only means something after the first half.
+_STANDALONE_START = re.compile(
+    r"^(?:what|how|why|when|where|which|who|whose|is|are|can|could|does|do|should|would|"
+    r"explain|describe|define|list|give|suggest|recommend|compare|summarize|tell|write|name)\b",
+    re.IGNORECASE)
+_MIN_STANDALONE_WORDS = 3  # "what is bagging"; "explain overfitting" is still too thin
+
+
+def _key(template: str, kwargs: dict):
+    if not template.startswith("file:"):
+        return template
+    try:
+        path = template[5:].format(**kwargs)
+    except (KeyError, IndexError):
+        return None  # optional path argument not given
+    if path == "None":
+        return None
+    return "file:" + os.path.normpath(path)
+
+
+def step_effects(step: dict) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """(reads, writes) of one step; llm steps touch no tool state."""
+    if step.get("type") != "tool":
+        return (), ()
+    effects = _EFFECTS.get(step.get("name"))
+    if effects is None:
+        return (ANY,), (ANY,)
+    kwargs = step.get("kwargs", {})
+    reads, writes = ([k for k in (_key(t, kwargs) for t in ts) if k] for ts in effects)
+    return tuple(reads), tuple(writes)
+
+
+def _overlaps(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    if a.startswith("file:") and b.startswith("file:"):
+        # a directory (scaffold) overlaps every file below it
+        return b.startswith(a + os.sep) or a.startswith(b + os.sep)
+    return False
+
+
+def _conflict(first: dict, second: dict) -> bool:
+    if ANY in first["writes"] or ANY in second["writes"]:
+        return True  # barrier
+    return any(_overlaps(w, k) for w in first["writes"] for k in second["reads"] + second["writes"]) \
+        or any(_overlaps(r, w) for r in first["reads"] for w in second["writes"])
+
+
+def annotate(plan: List[dict]) -> List[dict]:
+    """
+    Add "reads", "writes" and "after" (indices of earlier steps this one
+    waits for) to every step, in place. A step waits for an earlier one
+    when either writes a key the other reads or writes; run_python and
+    unknown tools are barriers; an llm step waits for the step before it,
+    whose output it is given as context, unless that step is another llm
+    step and the clause is clearly self-contained (see refers_back).
+    """
+    for i, step in enumerate(plan):
+        step["reads"], step["writes"] = step_effects(step)
+        after = [j for j in range(i) if _conflict(plan[j], step)]
+        if step.get("type") == "llm" and i and (i - 1) not in after:
+            if plan[i - 1].get("type") != "llm" or refers_back(step["input"]):
+                after.append(i - 1)
+        step["after"] = tuple(sorted(after))
+    return plan
+
+
+def refers_back(clause: str) -> bool:
+    """
+    Does this llm clause need the previous answer? Yes unless it is clearly
+    self-contained: starts like a question or an imperative, has at least
+    _MIN_STANDALONE_WORDS words and points back at nothing.
+    """
+    clause = clause.strip(" \t\n,.;:-")
+    return (not _STANDALONE_START.match(clause) or len(clause.split()) < _MIN_STANDALONE_WORDS
+            or bool(_ANAPHORA.search(clause)))
+
+
+def llm_batches(plan: List[dict], after: List[Tuple[int, ...]]) -> List[Tuple[int, ...]]:
+    """
+    Group the plan into scheduling units: runs of consecutive llm steps
+    that don't depend on each other become one unit, every other step is
+    a unit of its own.
+    """
+    units: List[Tuple[int, ...]] = []
+    run: List[int] = []
+    for i, step in enumerate(plan):
+        if step.get("type") == "llm" and run and not set(after[i]) & set(run):
+            run.append(i)
+            continue
+        if run:
+            units.append(tuple(run))
+        run = [i] if step.get("type") == "llm" else []
+        if not run:
+            units.append((i,))
+    if run:
+        units.append(tuple(run))
+    return units
+
+
+def dependencies(plan: List[dict]) -> List[Tuple[int, ...]]:
+    """Per-step "after" lists; computed on a copy when the plan has none."""
+    if all("after" in step for step in plan):
+        return [tuple(step["after"]) for step in plan]
+    return [step["after"] for step in annotate([dict(step) for step in plan])]
@@ -3,79 +3,389 @@ Executes planned steps using available tools
 """
 
 # from agent.core import AgentCore
+import asyncio
+import json
+import queue
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, Optional
 from agent.debug import log
+from agent import dag, metrics
+
+_DEFAULT_MAX_WORKERS = 4
+
+# How runs of independent llm steps (see dag.llm_batches) are sent
+LLM_BATCH_PARALLEL = "parallel"  # one request per step, fanned out like any independent steps
+LLM_BATCH_COMBINED = "combined"  # one numbered multi-part request per run, answers split back
+LLM_BATCH_MODES = (LLM_BATCH_PARALLEL, LLM_BATCH_COMBINED)
+
+_BATCH_PROMPT = (
+    "Answer each numbered request below independently. Reply with only a JSON object "
+    "mapping each number to its full answer as a string, e.g. {\"1\": \"...\", \"2\": \"...\"}."
+)
+
+
+class StepsCancelled(Exception):
+    """execute_steps() stopped before its next step because `cancel` was set."""
 
 
 class Executor:
-    def __init__(self, core, tools, memory=None):
+    def __init__(self, core, tools, memory=None, *, max_workers: int = _DEFAULT_MAX_WORKERS,
+                 llm_batch: str = LLM_BATCH_PARALLEL):
+        """
+        max_workers > 1 runs steps that do not depend on each other (see
+        agent.dag) at the same time on a thread pool; 1 runs strictly in
+        plan order. llm_batch="combined" sends each run of independent llm
+        steps as one request; answers it doesn't return are asked for
+        one by one.
+        """
+        if llm_batch not in LLM_BATCH_MODES:
+            raise ValueError(f"Unknown llm_batch mode '{llm_batch}' (expected one of {LLM_BATCH_MODES})")
         self.core = core
         self.tools = tools
         self.memory = memory # ✅ MEMORY
-        
-    def execute_steps(self, steps):
+        self.max_workers = max_workers
+        self.llm_batch = llm_batch
+        self.batched_requests = 0   # combined requests sent
+        self.batched_steps = 0      # llm steps answered by them
+        self._stats_lock = threading.Lock()  # batches finish on pool workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def execute_steps(self, steps, *, llm_context=None, emit: Optional[Callable[[dict], None]] = None,
+                      cancel: Optional[threading.Event] = None):
         """
-        Execute a list of steps in order
+        Execute a list of steps; returns the output of the last one.
+        Dependent steps keep sequential semantics, independent ones may
+        overlap. llm_context() is called as each llm step starts; text it
+        returns is added to that step's prompt. emit, if given, receives
+        step events (see stream_steps); llm steps then stream their output.
+        Once `cancel` is set no further step starts (running ones finish)
+        and StepsCancelled is raised.
         """
 
         if isinstance(steps, dict):
             steps = [steps]
+        if not steps:
+            return None
 
-        last_output = None
+        after = dag.dependencies(steps)
+        units = self._units(steps, after)
+        if self.max_workers <= 1 or len(units) <= 1:
+            results = {}
+            for unit in units:
+                if _cancelled(cancel):
+                    raise StepsCancelled()
+                results.update(self._run_unit(unit, steps, _previous(unit, after, results), llm_context, emit))
+            return results[len(steps) - 1]
 
-        for step in steps:
-            stype = step.get("type")
-            log(f"[Executor] STEP: {step}")
+        return self._execute_parallel(steps, after, units, llm_context, emit, cancel)
 
-            if stype == "tool":
-                tool_name = step["name"]
-                kwargs = step.get("kwargs", {})
+    def stream_steps(self, steps, *, llm_context=None) -> Iterator[dict]:
+        """
+        Execute steps on a background thread and yield events as they
+        happen:
+
+          {"event": "step_started", "step": i, "type": ..., "name": ...}
+          {"event": "tool_output", "step": i, "output": str}
+          {"event": "llm_delta", "step": i, "delta": str}
+          {"event": "step_finished", "step": i}
+          {"event": "done", "output": str}   or   {"event": "error", "error": str}
+
+        Closing the generator early (the consumer went away) stops the plan
+        before its next step.
+        """
+        events: "queue.Queue" = queue.Queue()
+        finished = object()
+        cancel = threading.Event()
 
+        def run():
+            try:
+                output = self.execute_steps(steps, llm_context=llm_context, emit=events.put, cancel=cancel)
+                events.put({"event": "done", "output": None if output is None else str(output)})
+            except StepsCancelled:
+                log("[Executor] stream consumer gone: remaining steps skipped")
+            except Exception as e:
+                events.put({"event": "error", "error": str(e)})
+            finally:
+                events.put(finished)
+
+        threading.Thread(target=run, name="executor-stream", daemon=True).start()
+        try:
+            while True:
+                event = events.get()
+                if event is finished:
+                    return
+                yield event
+        finally:
+            cancel.set()
+
+    def _execute_parallel(self, steps, after, units, llm_context=None, emit=None, cancel=None):
+        pool = self._executor()
+        results = {}
+        waiting = set(range(len(units)))
+        running = {}
+        error = None
+
+        while waiting or running:
+            if error is None and _cancelled(cancel):
+                error = StepsCancelled()
+            if error is None:
+                for u in sorted(waiting):
+                    if all(j in results for j in _unit_after(units[u], after)):
+                        waiting.discard(u)
+                        previous = _previous(units[u], after, results)
+                        running[pool.submit(self._run_unit, units[u], steps, previous,
+                                            llm_context, emit)] = u
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                running.pop(fut)
                 try:
-                    result = self.tools.call(tool_name, **kwargs)
-                    success = True
-                    last_output = result
+                    results.update(fut.result())
                 except Exception as e:
-                    result = str(e)
-                    success = False
-                    last_output = result
-
-                # last_output = self.tools.call(step["name"], **step.get("kwargs", {}))
-                log(f"[Executor] TOOL OUTPUT: {last_output}")
-
-                # ✅ MEMORY: write episodic memory for tool execution
-                if self.memory:
-                    short_result = str(result)[:200]
-                    self.memory.remember(
-                        text=f"Ran tool '{tool_name}' with args={kwargs}. Result: {short_result}",
-                        kind="episodic",
-                        tags=["tool", tool_name],
-                        importance=0.4 if success else 0.7,
-                        summary=f"{tool_name} {'ok' if success else 'failed'}"
-                    )
-
-            elif stype == "llm":
-                prompt = step["input"]
-                if last_output:
-                    prompt += f"\n\nPrevious result:\n{last_output}"
+                    # stop scheduling, let running steps finish, then raise
+                    error = error or e
+        if error is not None:
+            raise error
+        return results[len(steps) - 1]
 
-                result = self.core.generate(prompt)
-                last_output = result
-
-                # last_output = self.core.generate(prompt)
-                log(f"[Executor] LLM OUTPUT: {last_output}")
-
-                # ✅ MEMORY: store conversational / reasoning memory
-                if self.memory:
-                    short_result = str(result)[:200]
-                    self.memory.remember(
-                        text=f"LLM responded to prompt. Output: {short_result}",
-                        kind="episodic",
-                        tags=["llm"],
-                        importance=0.3,
-                        summary="LLM response"
-                    )
+    def _units(self, steps, after):
+        if self.llm_batch == LLM_BATCH_COMBINED:
+            return dag.llm_batches(steps, after)
+        return [(i,) for i in range(len(steps))]
 
+    def _run_unit(self, unit, steps, previous, llm_context=None, emit=None):
+        """{step index: output} for one scheduling unit."""
+        if len(unit) == 1:
+            i = unit[0]
+            return {i: self._run_step(steps[i], previous.get(i), llm_context, _step_emitter(emit, i))}
+
+        prompts = [self._llm_prompt(steps[i], previous.get(i), llm_context) for i in unit]
+        for i in unit:
+            log(f"[Executor] STEP: {steps[i]}")
+            if emit:
+                emit({"event": "step_started", "step": i, "type": "llm", "name": None})
+        answers = _split_answers(self.core.generate(_batch_prompt(prompts)), len(unit))
+        for k, answer in enumerate(answers):
+            if answer is None:  # not in the combined reply: ask on its own
+                answers[k] = self.core.generate(prompts[k])
+        return self._finish_batch(unit, answers, emit)
+
+    def _finish_batch(self, unit, answers, emit=None):
+        with self._stats_lock:
+            self.batched_requests += 1
+            self.batched_steps += len(unit)
+        for i, answer in zip(unit, answers):
+            log(f"[Executor] LLM OUTPUT: {answer}")
+            if self.memory:
+                self.memory.remember(**_llm_memory(answer))
+            if emit:
+                emit({"event": "llm_delta", "step": i, "delta": answer})
+                emit({"event": "step_finished", "step": i})
+        return dict(zip(unit, answers))
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="executor")
+            return self._pool
+
+    def close(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def _run_step(self, step, last_output, llm_context=None, emit=None):
+        stype = step.get("type")
+        log(f"[Executor] STEP: {step}")
+        if emit:
+            emit({"event": "step_started", "type": stype, "name": step.get("name")})
+
+        if stype == "tool":
+            result = self._call_tool(step)
+            if emit:
+                emit({"event": "tool_output", "output": str(result)})
+
+        elif stype == "llm":
+            prompt = self._llm_prompt(step, last_output, llm_context)
+            if emit:
+                chunks = []
+                for delta in self.core.stream(prompt):
+                    chunks.append(delta)
+                    emit({"event": "llm_delta", "delta": delta})
+                result = "".join(chunks)
             else:
-                raise ValueError(f"Unknown step type: {stype}")
-            
-        return last_output
+                result = self.core.generate(prompt)
+            log(f"[Executor] LLM OUTPUT: {result}")
+
+            # ✅ MEMORY: store conversational / reasoning memory
+            if self.memory:
+                self.memory.remember(**_llm_memory(result))
+
+        else:
+            raise ValueError(f"Unknown step type: {stype}")
+
+        if emit:
+            emit({"event": "step_finished"})
+        return result
+
+    def _call_tool(self, step):
+        tool_name = step["name"]
+        kwargs = step.get("kwargs", {})
+
+        try:
+            with metrics.stage(metrics.TOOL):
+                result = self.tools.call(tool_name, **kwargs)
+            success = True
+        except Exception as e:
+            result = str(e)
+            success = False
+
+        log(f"[Executor] TOOL OUTPUT: {result}")
+
+        # ✅ MEMORY: write episodic memory for tool execution
+        if self.memory:
+            short_result = str(result)[:200]
+            self.memory.remember(
+                text=f"Ran tool '{tool_name}' with args={kwargs}. Result: {short_result}",
+                kind="episodic",
+                tags=["tool", tool_name],
+                importance=0.4 if success else 0.7,
+                summary=f"{tool_name} {'ok' if success else 'failed'}"
+            )
+        return result
+
+    @staticmethod
+    def _llm_prompt(step, last_output, llm_context=None) -> str:
+        prompt = step["input"]
+        if last_output:
+            prompt += f"\n\nPrevious result:\n{last_output}"
+        notes = llm_context() if llm_context else None
+        if notes:
+            prompt += f"\n\nRefined plan:\n{notes}"
+        return prompt
+
+    # ---------- async ----------
+    async def aexecute_steps(self, steps, *, llm_context=None):
+        """
+        execute_steps() on the event loop: llm steps await
+        core.agenerate(), tool steps (blocking pandas / file I/O) run in
+        worker threads. Independent steps overlap unless max_workers <= 1.
+        """
+        if isinstance(steps, dict):
+            steps = [steps]
+        if not steps:
+            return None
+
+        after = dag.dependencies(steps)
+        units = self._units(steps, after)
+        results = {}
+        if self.max_workers <= 1 or len(units) <= 1:
+            for unit in units:
+                results.update(await self._arun_unit(unit, steps, _previous(unit, after, results), llm_context))
+            return results[len(steps) - 1]
+
+        owner = {i: u for u, unit in enumerate(units) for i in unit}
+        tasks = []
+
+        async def run(u):
+            deps = {owner[j] for j in _unit_after(units[u], after)}
+            if deps:
+                await asyncio.gather(*(tasks[d] for d in deps))
+            out = await self._arun_unit(units[u], steps, _previous(units[u], after, results), llm_context)
+            results.update(out)
+            return out
+
+        for u in range(len(units)):
+            tasks.append(asyncio.ensure_future(run(u)))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return results[len(steps) - 1]
+
+    async def _arun_unit(self, unit, steps, previous, llm_context=None):
+        if len(unit) == 1:
+            i = unit[0]
+            return {i: await self._arun_step(steps[i], previous.get(i), llm_context)}
+
+        prompts = [self._llm_prompt(steps[i], previous.get(i), llm_context) for i in unit]
+        answers = _split_answers(await self.core.agenerate(_batch_prompt(prompts)), len(unit))
+        missing = [k for k, answer in enumerate(answers) if answer is None]
+        for k, answer in zip(missing, await asyncio.gather(*(self.core.agenerate(prompts[k]) for k in missing))):
+            answers[k] = answer
+        # memory writes are quick (write-behind) and keep batch order
+        return await asyncio.to_thread(self._finish_batch, unit, answers)
+
+    async def _arun_step(self, step, last_output, llm_context=None):
+        stype = step.get("type")
+        log(f"[Executor] STEP: {step}")
+
+        if stype == "tool":
+            return await asyncio.to_thread(self._call_tool, step)
+
+        elif stype == "llm":
+            result = await self.core.agenerate(self._llm_prompt(step, last_output, llm_context))
+            log(f"[Executor] LLM OUTPUT: {result}")
+            if self.memory:
+                await self.memory.aremember(**_llm_memory(result))
+            return result
+
+        else:
+            raise ValueError(f"Unknown step type: {stype}")
+
+
+def _unit_after(unit, after):
+    # steps outside the unit that any of its steps wait for
+    return set().union(*(after[i] for i in unit)) - set(unit)
+
+
+def _previous(unit, after, results):
+    # a step that waits for the one right before it gets that step's output
+    return {i: results.get(i - 1) for i in unit if i and (i - 1) in after[i]}
+
+
+def _batch_prompt(prompts) -> str:
+    parts = "\n\n".join(f"{k}. {p}" for k, p in enumerate(prompts, 1))
+    return f"{_BATCH_PROMPT}\n\n{parts}"
+
+
+def _split_answers(text: str, n: int):
+    """Answers 1..n from a combined reply; None where one is missing."""
+    match = re.search(r"\{.*\}", text or "", re.DOTALL)
+    try:
+        doc = json.loads(match.group(0)) if match else {}
+    except ValueError:
+        doc = {}
+    if not isinstance(doc, dict):
+        doc = {}
+    return [None if doc.get(str(k)) is None else str(doc[str(k)]) for k in range(1, n + 1)]
+
+
+def _llm_memory(result) -> dict:
+    return dict(
+        text=f"LLM responded to prompt. Output: {str(result)[:200]}",
+        kind="episodic",
+        tags=["llm"],
+        importance=0.3,
+        summary="LLM response"
+    )
+
+
+def _cancelled(cancel: Optional[threading.Event]) -> bool:
+    return cancel is not None and cancel.is_set()
+
+
+def _step_emitter(emit, index: int):
+    # tag every event from one step with its position in the plan
+    if emit is None:
+        return None
+    return lambda event: emit({**event, "step": index})
@@ -0,0 +1,213 @@
+"""
+On-disk LLM response cache, content-addressed by model + prompt + params
+"""
+
+from __future__ import annotations
+import hashlib, json, sqlite3, threading, time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+from agent.debug import log
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,            -- sha256 of model + prompt + params
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at INTEGER NOT NULL,     -- epoch microseconds; TTL counts from here
+    last_used_at INTEGER NOT NULL,   -- LRU order
+    size INTEGER NOT NULL,           -- bytes of response (UTF-8)
+    latency_ms REAL NOT NULL         -- what the original call took
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used_at);
+"""
+
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+)
+
+_DEFAULT_TTL_SECONDS = 24 * 3600
+_DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+_EVICT_BATCH = 64
+
+
+def _now_micros() -> int:
+    return int(time.time() * 1_000_000)
+
+
+def cache_key(model: str, prompt: str, params: Optional[dict] = None) -> str:
+    doc = json.dumps({"model": model, "input": prompt, "params": params or {}},
+                     sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(doc.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite file of LLM responses keyed on cache_key(). Entries expire
+    `ttl` seconds after they were written; once the stored responses
+    exceed `max_bytes`, least recently used ones are evicted. Concurrent
+    misses for the same key share one in-flight call (single-flight), and
+    failed calls are never cached.
+    """
+
+    def __init__(self, path: str = "llm_cache.db", *, ttl: float = _DEFAULT_TTL_SECONDS,
+                 max_bytes: int = _DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()       # guards the connection
+        self._flight_lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._cx = sqlite3.connect(path, check_same_thread=False)
+        for pragma in _PRAGMAS:
+            self._cx.execute(pragma)
+        self._cx.executescript(_SCHEMA)
+        self._bytes = self._cx.execute("SELECT coalesce(sum(size), 0) FROM responses").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0        # misses served by another caller's in-flight call
+        self.evictions = 0
+        self.expired = 0
+        self.saved_ms = 0.0       # sum of the original latencies of cache hits
+
+    def close(self) -> None:
+        with self._lock:
+            self._cx.close()
+
+    # ---------- lookups ----------
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """(response, original latency ms), or None if missing or expired."""
+        now = _now_micros()
+        with self._lock, self._cx as cx:
+            row = cx.execute("SELECT response, created_at, latency_ms, size FROM responses WHERE key=?",
+                             (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and row[1] < now - int(self.ttl * 1_000_000):
+                cx.execute("DELETE FROM responses WHERE key=?", (key,))
+                self._bytes -= row[3]
+                self.expired += 1
+                return None
+            cx.execute("UPDATE responses SET last_used_at=? WHERE key=?", (now, key))
+        return row[0], row[2]
+
+    def put(self, key: str, model: str, response: str, latency_ms: float) -> None:
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = _now_micros()
+        with self._lock, self._cx as cx:
+            old = cx.execute("SELECT size FROM responses WHERE key=?", (key,)).fetchone()
+            cx.execute(
+                """INSERT OR REPLACE INTO responses(key, model, response, created_at, last_used_at, size, latency_ms)
+                   VALUES(?,?,?,?,?,?,?)""",
+                (key, model, response, now, now, size, latency_ms),
+            )
+            self._bytes += size - (old[0] if old else 0)
+            self._evict(cx, now)
+
+    def _evict(self, cx: sqlite3.Connection, now: int) -> None:
+        if self._bytes <= self.max_bytes:
+            return
+        if self.ttl is not None:  # expired rows go first
+            cutoff = now - int(self.ttl * 1_000_000)
+            freed, n = cx.execute("SELECT coalesce(sum(size), 0), count(*) FROM responses WHERE created_at < ?",
+                                  (cutoff,)).fetchone()
+            cx.execute("DELETE FROM responses WHERE created_at < ?", (cutoff,))
+            self._bytes -= freed
+            self.expired += n
+        while self._bytes > self.max_bytes:
+            rows = cx.execute("SELECT key, size FROM responses ORDER BY last_used_at LIMIT ?",
+                              (_EVICT_BATCH,)).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                victims.append((key,))
+                self._bytes -= size
+                if self._bytes <= self.max_bytes:
+                    break
+            cx.executemany("DELETE FROM responses WHERE key=?", victims)
+            self.evictions += len(victims)
+
+    # ---------- read-through ----------
+    def lookup(self, key: str) -> Optional[str]:
+        """Cached response (counted as a hit) or None (counted as a miss)."""
+        hit = self.get(key)
+        if hit is None:
+            with self._flight_lock:
+                self.misses += 1
+            return None
+        self._record_hit(hit[1])
+        return hit[0]
+
+    def _record_hit(self, latency_ms: float) -> None:
+        with self._flight_lock:
+            self.hits += 1
+            self.saved_ms += latency_ms
+
+    def get_or_call(self, key: str, model: str, call: Callable[[], str]) -> str:
+        """Cached response for key, else call() once (shared by concurrent callers) and store it."""
+        hit = self.get(key)
+        if hit is not None:
+            self._record_hit(hit[1])
+            return hit[0]
+
+        with self._flight_lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return fut.result()
+
+        try:
+            # a previous leader may have stored it between our get() and now
+            hit = self.get(key)
+            if hit is None:
+                start = time.perf_counter()
+                response = call()
+                latency_ms = (time.perf_counter() - start) * 1000
+        except BaseException as e:
+            self._land(key)
+            fut.set_exception(e)
+            raise
+        if hit is not None:
+            self._land(key)
+            fut.set_result(hit[0])
+            return hit[0]
+
+        fut.set_result(response)
+        try:
+            self.put(key, model, response, latency_ms)
+        except sqlite3.Error as e:
+            log(f"[LLMCache] could not store response: {e}")
+        finally:
+            self._land(key)  # only after put(), so late callers find it on disk
+        return response
+
+    def _land(self, key: str) -> None:
+        with self._flight_lock:
+            self._inflight.pop(key, None)
+
+    # ---------- stats ----------
+    def count(self) -> int:
+        with self._lock:
+            return self._cx.execute("SELECT count(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> Dict[str, float]:
+        with self._flight_lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+                "saved_ms": round(self.saved_ms, 3),
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "bytes": self._bytes,
+            }
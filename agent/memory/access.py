@@ -0,0 +1,71 @@
+from __future__ import annotations
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from agent.debug import log
+from .models import to_micros
+
+
+class AccessTracker:
+    """
+    Coalesces last-access touches from recall() in memory and writes them
+    in one transaction every `interval` seconds (or on flush()). Repeated
+    touches of the same memory between flushes cost one UPDATE, and reads
+    no longer write on the request path.
+    """
+
+    def __init__(self, store, *, interval: float = 5.0):
+        self.store = store
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending: Dict[int, int] = {}  # id -> latest touch (epoch micros)
+        self.touches = 0
+        self.rows_written = 0
+        self.flushes = 0
+        self.last_error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memory-access", daemon=True)
+        self._thread.start()
+
+    def touch(self, ids: Iterable[int]) -> None:
+        now = to_micros(datetime.utcnow())
+        with self._lock:
+            for mid in ids:
+                self._pending[mid] = now
+                self.touches += 1
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """Write pending touches now; returns rows updated."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        try:
+            n = self.store.update_last_access(batch)
+        except Exception as e:
+            self.last_error = e
+            log(f"[Memory] access flush of {len(batch)} touches failed: {e}")
+            with self._lock:  # keep them for the next round; newer touches win
+                for mid, ts in batch.items():
+                    self._pending.setdefault(mid, ts)
+            return 0
+        self.flushes += 1
+        self.rows_written += n
+        return n
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {"touches": self.touches, "pending": self.pending,
+                "flushes": self.flushes, "rows_written": self.rows_written}
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
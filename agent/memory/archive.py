@@ -0,0 +1,111 @@
+from __future__ import annotations
+import json, sqlite3, threading, zlib
+from typing import List, Optional, Sequence
+from .fts import QueryHints, compile_query
+from .models import MemoryRecord, to_micros
+
+# text / summary / meta live in one zlib-compressed JSON blob; the FTS index
+# is contentless, so the archive holds no uncompressed copy of the text.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive (
+    id INTEGER PRIMARY KEY,
+    hot_id INTEGER NOT NULL,          -- id the memory had in the hot shard
+    kind TEXT NOT NULL,
+    tags TEXT NOT NULL,               -- JSON array
+    importance REAL NOT NULL,
+    created_at INTEGER NOT NULL,      -- epoch microseconds (UTC)
+    last_accessed_at INTEGER NOT NULL,
+    hits INTEGER NOT NULL,
+    body BLOB NOT NULL,               -- zlib(JSON [text, summary, meta])
+    UNIQUE (hot_id, created_at)       -- hot ids can be reused after deletes
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS archive_fts USING fts5(
+    text, summary, tags, content='', prefix='2 3'
+);
+"""
+
+_COMPRESSION_LEVEL = 9
+
+
+def _pack(m: MemoryRecord) -> bytes:
+    return zlib.compress(json.dumps([m.text, m.summary, m.meta]).encode("utf-8"), _COMPRESSION_LEVEL)
+
+
+class ArchiveStore:
+    """
+    Cold tier next to a hot shard: old, rarely accessed memories moved out
+    by MemoryModule.archive_old(). Searches go through a read-only
+    connection and never touch access times; append() is the only writer.
+    Records come back with negative ids (-archive id) so they can't be
+    mistaken for hot memories.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._writer = sqlite3.connect(path, check_same_thread=False)
+        self._writer.executescript(_SCHEMA)
+        self._reader = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self) -> None:
+        with self._lock:
+            self._reader.close()
+            self._writer.close()
+
+    def append(self, memories: Sequence[MemoryRecord]) -> int:
+        """Copy memories in (idempotent per hot id + created_at); one transaction. Returns rows added."""
+        added = 0
+        with self._lock, self._writer as cx:
+            for m in memories:
+                cur = cx.execute(
+                    """INSERT OR IGNORE INTO archive(hot_id,kind,tags,importance,created_at,last_accessed_at,hits,body)
+                       VALUES(?,?,?,?,?,?,?,?)""",
+                    (m.id, m.kind, json.dumps(m.tags), m.importance, to_micros(m.created_at),
+                     to_micros(m.last_accessed_at), m.hits, _pack(m)),
+                )
+                if cur.rowcount:
+                    cx.execute("INSERT INTO archive_fts(rowid, text, summary, tags) VALUES(?,?,?,?)",
+                               (cur.lastrowid, m.text, m.summary or "", json.dumps(m.tags)))
+                    added += 1
+        return added
+
+    def count(self) -> int:
+        with self._lock:
+            return self._reader.execute("SELECT count(*) FROM archive").fetchone()[0]
+
+    def search(self, query: str, limit: int = 8, *,
+               tags: Optional[List[str]] = None,
+               kind: Optional[str] = None,
+               hints: Optional[QueryHints] = None) -> List[MemoryRecord]:
+        """BM25 search over the archive, same filters as SQLiteMemoryStore.search()."""
+        fts_query = compile_query(query, hints)
+        if not fts_query or limit <= 0:
+            return []
+        where, params = "", []
+        if kind is not None:
+            where += " AND a.kind = ?"
+            params.append(kind)
+        if tags:
+            where += (" AND NOT EXISTS (SELECT 1 FROM json_each(?) w"
+                      " WHERE w.value NOT IN (SELECT value FROM json_each(a.tags)))")
+            params.append(json.dumps(list(tags)))
+        with self._lock:
+            rows = self._reader.execute(
+                f"""
+                SELECT a.id, a.kind, a.tags, a.importance, a.created_at,
+                       a.last_accessed_at, a.hits, a.body
+                FROM archive_fts
+                JOIN archive a ON a.id = archive_fts.rowid
+                WHERE archive_fts MATCH ?{where}
+                ORDER BY bm25(archive_fts) ASC
+                LIMIT ?
+                """,
+                (fts_query, *params, limit),
+            ).fetchall()
+        out = []
+        for mid, kind_, tags_, importance, created, accessed, hits, body in rows:
+            text, summary, meta = json.loads(zlib.decompress(body))
+            out.append(MemoryRecord(-mid, kind_, text, summary, tags_, importance,
+                                    created, accessed, meta, hits))
+        return out
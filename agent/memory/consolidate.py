@@ -0,0 +1,123 @@
+from __future__ import annotations
+import json, re, sqlite3, zlib
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+# Executor's tool memories: "Ran tool 'name' with args={...}. Result: ..."
+_CALL_RE = re.compile(r"(Ran tool '[^']*' with args=.*?)\. Result: ", re.DOTALL)
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+
+
+def shingles(text: str, size: int = 2) -> FrozenSet[str]:
+    """Word n-gram shingles of the lower-cased text."""
+    toks = _TOKEN_RE.findall(text.lower())
+    if len(toks) < size:
+        return frozenset([" ".join(toks)]) if toks else frozenset()
+    return frozenset(" ".join(toks[i:i + size]) for i in range(len(toks) - size + 1))
+
+
+def split_call(text: str) -> Tuple[str, str]:
+    """(tool call with its arguments, free text); the call is "" for other memories."""
+    m = _CALL_RE.match(text)
+    if m is None:
+        return "", text
+    return m.group(1), text[m.end():]
+
+
+def _tag_key(tags: Iterable[str]) -> str:
+    if isinstance(tags, str):
+        tags = json.loads(tags)
+    return json.dumps(sorted(set(tags or [])))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHashLSH:
+    """
+    MinHash signatures over word shingles, banded for LSH. Bucket rows live
+    in the `memory_lsh` table so lookups are index probes, not scans:
+    candidates share at least one (band, bucket); they are then confirmed
+    with the exact shingle Jaccard against `threshold`.
+
+    Only the free text is shingled. Tags and, for tool memories, the call
+    with its arguments must match exactly: they salt the buckets and are
+    compared again on the candidates, so loads of two different files (or
+    the same tool with different arguments) never merge.
+
+    With bands=16, rows=4 the LSH S-curve crosses 50% around J~0.5, so
+    near-duplicates (J >= 0.8) are found with probability > 0.99.
+    """
+
+    def __init__(self, threshold: float = 0.8, bands: int = 16, rows: int = 4, seed: int = 1):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        rng = np.random.default_rng(seed)
+        n = bands * rows
+        # universal hashing (a*x + b) mod p, kept within uint64 by 32-bit a/x
+        self._a = rng.integers(1, _MASK, size=n, dtype=np.uint64)
+        self._b = rng.integers(0, _MASK, size=n, dtype=np.uint64)
+
+    def signature(self, sh: FrozenSet[str]) -> np.ndarray:
+        if not sh:
+            return np.zeros(self.bands * self.rows, dtype=np.uint64)
+        x = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in sh), dtype=np.uint64, count=len(sh))
+        return ((np.outer(x, self._a) + self._b) % np.uint64(_PRIME)).min(axis=0)
+
+    def buckets(self, sig: np.ndarray, salt: bytes = b"") -> List[int]:
+        out = []
+        for band in range(self.bands):
+            chunk = sig[band * self.rows:(band + 1) * self.rows].tobytes()
+            out.append(zlib.crc32(salt + chunk) | (band << 32))  # band-salted, fits in int64
+        return out
+
+    def _keys(self, text: str, tags) -> Tuple[str, str, FrozenSet[str]]:
+        call, free = split_call(text)
+        return call, _tag_key(tags), shingles(free)
+
+    def _probe(self, call: str, tag_key: str, sh: FrozenSet[str]) -> List[int]:
+        return self.buckets(self.signature(sh), f"{call}\0{tag_key}\0".encode("utf-8"))
+
+    # ---------- table access (caller owns the transaction) ----------
+    def find_duplicate(self, cx: sqlite3.Connection, text: str, kind: str, tags=(),
+                       exclude: Optional[int] = None) -> Optional[int]:
+        """
+        Id of an indexed memory of the same kind, the same tags and the same
+        tool call whose free text is a near-duplicate.
+        """
+        call, tag_key, sh = self._keys(text, tags)
+        if not sh:
+            return None
+        marks = ",".join("?" * self.bands)
+        rows = cx.execute(
+            f"""
+            SELECT DISTINCT m.id, m.text, m.tags FROM memory_lsh l
+            JOIN memories m ON m.id = l.memory_id
+            WHERE l.band_bucket IN ({marks}) AND m.kind = ? AND m.id != ?
+            ORDER BY m.id DESC
+            LIMIT 32
+            """,
+            (*self._probe(call, tag_key, sh), kind, exclude or 0),
+        ).fetchall()
+        for mid, other, other_tags in rows:
+            other_call, other_free = split_call(other)
+            if other_call != call or _tag_key(other_tags) != tag_key:
+                continue
+            if jaccard(sh, shingles(other_free)) >= self.threshold:
+                return int(mid)
+        return None
+
+    def index(self, cx: sqlite3.Connection, memory_id: int, text: str, tags=()) -> None:
+        call, tag_key, sh = self._keys(text, tags)
+        if not sh:
+            return
+        cx.executemany(
+            "INSERT OR IGNORE INTO memory_lsh(band_bucket, memory_id) VALUES(?, ?)",
+            [(b, memory_id) for b in self._probe(call, tag_key, sh)],
+        )
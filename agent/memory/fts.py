@@ -0,0 +1,94 @@
+from __future__ import annotations
+import re
+from dataclasses import dataclass
+from typing import FrozenSet, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")  # matches FTS5 unicode61 splitting for ASCII
+
+# Function words that occur in almost every row and only add OR fan-out.
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be been before being
+below between both but by can could did do does doing done down during each
+few for from further had has have having he her here hers him his how i if in
+into is it its itself just let me more most my no nor not now of off on once
+only or other our out over own please same she should so some such than that
+the their them then there these they this those through to too under until up
+us very was we were what when where which while who whom why will with would
+you your
+""".split())
+
+_DEFAULT_MAX_PREFIX = 3
+
+
+@dataclass(frozen=True)
+class ColumnWeights:
+    """bm25() weight per fts_memories column; tags are short, curated keywords."""
+    text: float = 1.0
+    summary: float = 0.5
+    tags: float = 2.0
+
+    def sql_args(self) -> Tuple[float, float, float]:
+        return (self.text, self.summary, self.tags)
+
+DEFAULT_COLUMN_WEIGHTS = ColumnWeights()
+
+
+@dataclass(frozen=True)
+class QueryHints:
+    """
+    Extra structure a caller (e.g. the planner) knows about the query:
+    `phrases` must match as exact token sequences, each `near` group within
+    `near_distance` tokens of each other. Hints are OR-ed into the query, so
+    they boost rows that satisfy them rather than filter the rest out.
+    """
+    phrases: Tuple[str, ...] = ()
+    near: Tuple[Tuple[str, ...], ...] = ()
+    near_distance: int = 10
+
+    def __bool__(self) -> bool:
+        return bool(self.phrases or self.near)
+
+
+def terms(text: str) -> list:
+    """Lower-cased query terms with stopwords removed (all terms if that leaves none)."""
+    toks = [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 or t.isdigit()]
+    kept = [t for t in toks if t not in STOPWORDS] or toks
+    return list(dict.fromkeys(kept))  # de-dup, keep order
+
+
+def _phrase(text: str) -> Optional[str]:
+    toks = _TOKEN_RE.findall(text.lower())
+    return '"' + " ".join(toks) + '"' if toks else None
+
+
+def compile_query(text: str, hints: Optional[QueryHints] = None, *,
+                  max_prefix: int = _DEFAULT_MAX_PREFIX,
+                  common: FrozenSet[str] = frozenset()) -> str:
+    """
+    Natural language -> FTS5 MATCH expression.
+    - stopwords dropped, terms de-duplicated
+    - `common` terms (corpus-specific stopwords, see
+      SQLiteMemoryStore.common_terms) dropped unless nothing else is left
+    - only the first `max_prefix` word terms get a `*` prefix; short ones
+      (2-3 chars, the expensive expansions) are served by the prefix='2 3'
+      index
+    - phrase / NEAR hints added as extra OR branches
+    Every term is quoted, so user text can never produce a syntax error.
+    Returns "" when nothing searchable is left.
+    """
+    parts = []
+    budget = max_prefix
+    words = terms(text)
+    for t in [w for w in words if w not in common] or words:
+        if budget > 0 and not t.isdigit() and t not in STOPWORDS:
+            parts.append(f'"{t}"*')
+            budget -= 1
+        else:
+            parts.append(f'"{t}"')
+    if hints:
+        parts.extend(p for p in map(_phrase, hints.phrases) if p)
+        for group in hints.near:
+            phrases = [p for p in map(_phrase, group) if p]
+            if len(phrases) > 1:
+                parts.append(f"NEAR({' '.join(phrases)}, {int(hints.near_distance)})")
+    return " OR ".join(parts)
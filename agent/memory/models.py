@@ -1,10 +1,24 @@
 from __future__ import annotations
+import json
 from dataclasses import dataclass, field
-from typing import List, Optional, Literal, Dict
-from datetime import datetime
+from typing import Any, List, Optional, Literal, Dict, Sequence
+from datetime import datetime, timedelta
 
 MemoryKind = Literal["episodic", "semantic", "working"]
 
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_micros(dt: datetime) -> int:
+    """Naive UTC datetime -> epoch microseconds (the on-disk timestamp format)."""
+    return (dt - _EPOCH) // _MICROSECOND
+
+
+def from_micros(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=us)
+
+
 @dataclass
 class Memory:
     id: Optional[int]
@@ -16,4 +30,89 @@ class Memory:
     created_at: datetime = field(default_factory=datetime.utcnow)
     last_accessed_at: datetime = field(default_factory=datetime.utcnow)
     meta: Dict[str, str] = field(default_factory=dict)      # e.g., {"task_id":"...", "tool":"search"}
-    
\ No newline at end of file
+    hits: int = 1                       # near-duplicates merged into this memory
+
+
+@dataclass
+class MaintenanceStats:
+    """What a prune()/decay() pass did."""
+    rows: int = 0                       # rows deleted / updated
+    batches: int = 0                    # committed chunks
+    seconds: float = 0.0                # wall time for the whole pass
+
+
+# Column order of MemoryRecord's constructor / a full projection.
+MEMORY_COLUMNS = ("id", "kind", "text", "summary", "tags", "importance",
+                  "created_at", "last_accessed_at", "meta", "hits")
+
+_SLOT_FOR = {c: c for c in MEMORY_COLUMNS}
+_SLOT_FOR.update(tags="_tags", meta="_meta",
+                 created_at="_created_at", last_accessed_at="_last_accessed_at")
+
+
+class MemoryRecord:
+    """
+    Read-side memory row returned by the store. Compact (__slots__), and
+    tags/meta (JSON) and timestamps (epoch micros) are decoded only on first
+    access. Rows fetched with a column projection leave the other fields
+    unset; touching them raises AttributeError.
+    """
+    __slots__ = ("id", "kind", "text", "summary", "importance", "hits",
+                 "_tags", "_meta", "_created_at", "_last_accessed_at")
+
+    def __init__(self, id, kind, text, summary, tags, importance,
+                 created_at, last_accessed_at, meta, hits=1):
+        self.id = id
+        self.kind = kind
+        self.text = text
+        self.summary = summary
+        self._tags = tags
+        self.importance = importance
+        self._created_at = created_at
+        self._last_accessed_at = last_accessed_at
+        self._meta = meta
+        self.hits = hits
+
+    @classmethod
+    def from_row(cls, columns: Sequence[str], row: Sequence[Any]) -> "MemoryRecord":
+        rec = cls.__new__(cls)
+        for col, value in zip(columns, row):
+            setattr(rec, _SLOT_FOR[col], value)
+        return rec
+
+    @property
+    def tags(self) -> List[str]:
+        raw = self._tags
+        if isinstance(raw, str):
+            raw = self._tags = json.loads(raw) if raw else []
+        return raw
+
+    @property
+    def meta(self) -> Dict[str, str]:
+        raw = self._meta
+        if isinstance(raw, str):
+            raw = self._meta = json.loads(raw) if raw else {}
+        return raw
+
+    @property
+    def created_at(self) -> datetime:
+        raw = self._created_at
+        if isinstance(raw, int):
+            raw = self._created_at = from_micros(raw)
+        return raw
+
+    @property
+    def last_accessed_at(self) -> datetime:
+        raw = self._last_accessed_at
+        if isinstance(raw, int):
+            raw = self._last_accessed_at = from_micros(raw)
+        return raw
+
+    def to_memory(self) -> Memory:
+        return Memory(id=self.id, kind=self.kind, text=self.text, summary=self.summary,
+                      tags=list(self.tags), importance=self.importance,
+                      created_at=self.created_at, last_accessed_at=self.last_accessed_at,
+                      meta=dict(self.meta), hits=self.hits)
+
+    def __repr__(self) -> str:
+        return f"MemoryRecord(id={getattr(self, 'id', None)!r}, kind={getattr(self, 'kind', None)!r})"
@@ -1,22 +1,115 @@
 from __future__ import annotations
-from typing import List, Optional, Dict
-from datetime import datetime
-from .models import Memory
+import asyncio, functools, threading, time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Tuple
+from datetime import datetime, timedelta
+from agent.debug import log
+from .models import Memory, MemoryRecord, MaintenanceStats, from_micros, to_micros
 from .store import SQLiteMemoryStore
-from . import ranking
+from .writer import WriteBehindQueue
+from .archive import ArchiveStore
+from .access import AccessTracker
+from . import ranking, packing
+from .fts import QueryHints
 
 _DEFAULT_CONTEXT_BUDGET_CHARS = 2400  # keep it model-agnostic
+_DEFAULT_CONTEXT_CACHE_SIZE = 128
+_MAINTENANCE_BATCH = 1000  # rows per committed chunk in prune()/decay()
+# decay() fades idle memories down to this floor, and prune() may drop
+# anything at or below it, so faded memories are the first to go
+_DECAY_FLOOR = 0.15
+_DEFAULT_ASYNC_READERS = 4
 
 class MemoryModule:
-    def __init__(self, db_path: str = "agent_memory.db"):
+    def __init__(self, db_path: str = "agent_memory.db", *,
+                 write_behind: bool = False,
+                 batch_size: int = 64,
+                 flush_interval: float = 0.05,
+                 vector_search: bool = False,
+                 context_cache_size: int = _DEFAULT_CONTEXT_CACHE_SIZE,
+                 ranking_weights: ranking.RankingWeights = ranking.DEFAULT_WEIGHTS,
+                 consolidate: bool = False,
+                 archive_path: Optional[str] = None,
+                 touch_interval: float = 5.0,
+                 async_readers: int = _DEFAULT_ASYNC_READERS):
+        """
+        write_behind=True queues remember() calls and persists them in
+        batches on a background thread; reads flush pending writes first.
+        vector_search=True adds a local embedding index (<db>.vec) whose
+        candidates are fused with BM25 results before reranking.
+        context() results are cached (LRU, `context_cache_size` entries) and
+        invalidated by the store's write generation; 0 disables the cache.
+        ranking_weights tune BM25 position vs recency vs importance.
+        consolidate=True merges near-duplicate episodic memories (MinHash
+        LSH) into one row with a hit count, at insert time.
+        archive_path names a compressed, read-only cold tier that archive()
+        moves old memories into; recall() searches it only when the hot
+        shard returns fewer than k results.
+        touch_interval: recall() records access times in memory and writes
+        them every `touch_interval` seconds; <= 0 updates synchronously.
+        arecall()/acontext() run on `async_readers` worker threads (one
+        pooled connection each), aremember() on a single writer thread.
+        """
         self.store = SQLiteMemoryStore(db_path)
+        self.ranking_weights = ranking_weights
+        if vector_search:
+            from .vector import VectorIndex  # optional: needs numpy
+            self.store.attach_vectors(VectorIndex(db_path))
+        if consolidate:
+            from .consolidate import MinHashLSH  # optional: needs numpy
+            self.store.consolidator = MinHashLSH()
+        self.archive: Optional[ArchiveStore] = ArchiveStore(archive_path) if archive_path else None
+        self._ctx_cache: OrderedDict[Tuple[str, int, Optional[QueryHints]], Tuple[int, str]] = OrderedDict()
+        self._ctx_cache_size = context_cache_size
+        self._ctx_lock = threading.Lock()
+        self._own_touches = threading.local()  # synchronous touches by this thread's context() build
+        self.context_hits = 0
+        self.context_misses = 0
+        self._maintenance: Optional[Tuple[threading.Event, threading.Thread]] = None
+        self._writer: Optional[WriteBehindQueue] = None
+        self._access: Optional[AccessTracker] = None
+        self._async_readers = max(1, async_readers)
+        self._async_lock = threading.Lock()
+        self._read_pool: Optional[ThreadPoolExecutor] = None
+        self._write_pool: Optional[ThreadPoolExecutor] = None
+        if touch_interval > 0:
+            self._access = AccessTracker(self.store, interval=touch_interval)
+        if write_behind:
+            self._writer = WriteBehindQueue(self.store, batch_size=batch_size,
+                                            flush_interval=flush_interval)
+
+    def flush(self) -> None:
+        """Wait until queued writes are committed (no-op in synchronous mode)."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self) -> None:
+        """Drain queued writes and release pooled SQLite connections."""
+        self.stop_maintenance()
+        with self._async_lock:
+            pools, self._read_pool, self._write_pool = (self._read_pool, self._write_pool), None, None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=True)
+        if self._writer is not None:
+            self._writer.close()
+        if self._access is not None:
+            self._access.close()
+        self.store.close()
+        if self.archive is not None:
+            self.archive.close()
 
     # ---------- write ----------
     def remember(self, text: str, *, kind: str = "episodic",
                  tags: Optional[List[str]] = None,
                  importance: float = 0.5,
                  summary: Optional[str] = None,
-                 meta: Optional[Dict[str, str]] = None) -> int:
+                 meta: Optional[Dict[str, str]] = None) -> Optional[int]:
+        """
+        Store a memory. Returns its id, or None in write-behind mode where
+        the id is assigned when the batch is committed.
+        """
         m = Memory(
             id=None,
             kind=kind,
@@ -26,61 +119,287 @@ class MemoryModule:
             importance=max(0.0, min(1.0, importance)),
             meta=meta or {},
         )
+        if self._writer is not None:
+            self._writer.put(m)
+            return None
         return self.store.insert(m)
 
     # ---------- read ----------
-    def recall(self, query: str, k: int = 8) -> List[Memory]:
-        results = self.store.search(query, limit=max(1, k * 2))
-        reranked = ranking.rerank(results)
-        top = reranked[:k]
-        self.store.update_last_access([m.id for m in top if m.id is not None])
+    def recall(self, query: str, k: int = 8, *,
+               tags: Optional[List[str]] = None,
+               kind: Optional[str] = None,
+               hints: Optional[QueryHints] = None) -> List[MemoryRecord]:
+        """
+        Ranked memories for `query`. `tags` (all must match) and `kind`
+        are applied inside SQL, e.g. recall("csv", tags=["tool", "load_csv"]).
+        `hints` carries phrase / NEAR hints for the FTS query.
+        """
+        self.flush()  # read-your-writes
+        limit = max(1, k * 2)
+        if self.store.vectors is None:
+            # scored and cut to k inside SQLite
+            top = self.store.search_ranked(query, k, pool=limit, weights=self.ranking_weights,
+                                           tags=tags, kind=kind, hints=hints)
+        else:
+            results = self.store.search(query, limit=limit, tags=tags, kind=kind, hints=hints)
+            results = self._hybrid(query, results, limit, tags=tags, kind=kind)
+            top = ranking.rerank(results, self.ranking_weights)[:k]
+        self._touch([m.id for m in top if m.id is not None])
+        if self.archive is not None and len(top) < k:
+            # cold tier: read-only, so no access-time update
+            top += self.archive.search(query, k - len(top), tags=tags, kind=kind, hints=hints)
         return top
 
-    def recent(self, k: int = 12) -> List[Memory]:
+    def _touch(self, ids: List[int]) -> None:
+        if self._access is not None:
+            self._access.touch(ids)
+        elif self.store.update_last_access(ids):
+            self._own_touches.count = getattr(self._own_touches, "count", 0) + 1
+
+    def flush_access(self) -> None:
+        """Write coalesced last-access times now (maintenance reads them)."""
+        if self._access is not None:
+            self._access.flush()
+
+    def access_stats(self) -> Dict[str, int]:
+        return self._access.stats() if self._access is not None else {}
+
+    def _hybrid(self, query: str, lexical: List[MemoryRecord], limit: int, *,
+                tags: Optional[List[str]] = None,
+                kind: Optional[str] = None) -> List[MemoryRecord]:
+        from .vector import fuse
+        dense = [mid for mid, _ in self.store.vectors.search(query, k=limit)]
+        by_id = {m.id: m for m in lexical}
+        missing = [mid for mid in dense if mid not in by_id]
+        for m in self.store.get_many(missing):
+            # the vector index is unfiltered; apply the same filters as SQL
+            if (kind is None or m.kind == kind) and set(tags or []) <= set(m.tags):
+                by_id[m.id] = m
+        dense = [mid for mid in dense if mid in by_id]
+        order = fuse([[m.id for m in lexical], dense])[:limit]
+        return [by_id[mid] for mid in order]
+
+    def pinned(self, k: int = 3) -> List[MemoryRecord]:
+        """Memories tagged 'pinned', via the tag index."""
+        self.flush()
+        return self.store.by_tags(["pinned"], limit=k)
+
+    def recent(self, k: int = 12) -> List[MemoryRecord]:
+        self.flush()
         return self.store.recent(limit=k)
 
-    # ---------- context ----------
-    def context(self, task: str, token_budget_chars: int = _DEFAULT_CONTEXT_BUDGET_CHARS) -> str:
-        buckets: List[str] = []
+    # ---------- async ----------
+    def _pools(self) -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+        # created on first use so sync-only callers don't pay for the threads
+        with self._async_lock:
+            if self._read_pool is None:
+                self._read_pool = ThreadPoolExecutor(self._async_readers,
+                                                     thread_name_prefix="memory-read")
+                self._write_pool = ThreadPoolExecutor(1, thread_name_prefix="memory-write")
+            return self._read_pool, self._write_pool
+
+    async def aremember(self, text: str, **kwargs) -> Optional[int]:
+        """remember() on the single writer thread; same keyword arguments."""
+        _, writer = self._pools()
+        return await asyncio.get_running_loop().run_in_executor(
+            writer, functools.partial(self.remember, text, **kwargs))
 
-        rel = self.recall(task, k=6)
-        if rel:
-            buckets.append(_format_block("Task-Relevant Memories", rel))
+    async def arecall(self, query: str, k: int = 8, **kwargs) -> List[MemoryRecord]:
+        """recall() on a reader thread; readers don't block each other."""
+        reader, _ = self._pools()
+        return await asyncio.get_running_loop().run_in_executor(
+            reader, functools.partial(self.recall, query, k, **kwargs))
 
-        recent_mem = self.recent(k=8)
-        if recent_mem:
-            buckets.append(_format_block("Recent Session", recent_mem))
+    async def acontext(self, task: str, token_budget_chars: int = _DEFAULT_CONTEXT_BUDGET_CHARS,
+                       **kwargs) -> str:
+        """context() on a reader thread."""
+        reader, _ = self._pools()
+        return await asyncio.get_running_loop().run_in_executor(
+            reader, functools.partial(self.context, task, token_budget_chars, **kwargs))
+
+    # ---------- context ----------
+    def context(self, task: str, token_budget_chars: int = _DEFAULT_CONTEXT_BUDGET_CHARS, *,
+                hints: Optional[QueryHints] = None) -> str:
+        """
+        Formatted memory block for prompts. Served from cache while no
+        memory has been inserted, merged, deleted, decayed or touched since
+        it was built (a cache hit does not refresh last-access times).
+        """
+        self.flush()
+        if self._ctx_cache_size <= 0:
+            return self._build_context(task, token_budget_chars, hints)
 
-        pinned = self.recall("tags pinned", k=3)  # tolerant query
-        if pinned:
-            buckets.append(_format_block("Pinned Facts", pinned))
+        key = (_normalize_task(task), token_budget_chars, hints or None)
+        generation = self.store.generation
+        with self._ctx_lock:
+            hit = self._ctx_cache.get(key)
+            if hit is not None and hit[0] == generation:
+                self._ctx_cache.move_to_end(key)
+                self.context_hits += 1
+                return hit[1]
+            self.context_misses += 1
 
-        ctx = "\n\n".join(buckets)
-        if len(ctx) > token_budget_chars:
-            ctx = ctx[: token_budget_chars - 200] + "\n\n[...truncated memory...]"
+        self._own_touches.count = 0
+        ctx = self._build_context(task, token_budget_chars, hints)
+        if self.store.generation == generation + self._own_touches.count:
+            # only the build's own recall touches moved it, and the Recent
+            # section was read after them
+            generation = self.store.generation
+        with self._ctx_lock:
+            self._ctx_cache[key] = (generation, ctx)
+            self._ctx_cache.move_to_end(key)
+            while len(self._ctx_cache) > self._ctx_cache_size:
+                self._ctx_cache.popitem(last=False)
         return ctx
 
+    def context_cache_stats(self) -> Dict[str, int]:
+        with self._ctx_lock:
+            return {
+                "hits": self.context_hits,
+                "misses": self.context_misses,
+                "size": len(self._ctx_cache),
+                "generation": self.store.generation,
+            }
+
+    def _build_context(self, task: str, token_budget_chars: int,
+                       hints: Optional[QueryHints] = None) -> str:
+        # pinned first so it wins dedup and is never crowded out
+        sections = [
+            packing.Section("Pinned Facts", self.pinned(k=3), weight=3.0),
+            packing.Section("Task-Relevant Memories", self.recall(task, k=6, hints=hints), weight=2.0),
+            packing.Section("Recent Session", self.recent(k=8), weight=1.0),
+        ]
+        return packing.pack(sections, packing.budget_from_chars(token_budget_chars))
+
     # ---------- maintenance ----------
-    def decay(self, min_importance: float = 0.15, hours_threshold: float = 72.0) -> None:
-        _ = (min_importance, hours_threshold)
-        # (Optional) left as a placeholder; safe no-op for now.
-
-    def prune(self, max_items: int = 5000, drop_below: float = 0.10) -> int:
-        rows = self.store.all_ids_with_scores()
-        if len(rows) <= max_items:
-            return 0
-        rows.sort(key=lambda r: (r[1], r[2]))  # (importance asc, oldest first)
-        to_delete = [r[0] for r in rows if r[1] <= drop_below]
-        overflow = len(rows) - max_items
-        if overflow > 0:
-            to_delete = to_delete[:overflow]
-        return self.store.delete(to_delete)
-
-
-def _format_block(title: str, ms: List[Memory]) -> str:
-    lines = [f"### {title}"]
-    for m in ms:
-        tag_str = f" [{','.join(m.tags)}]" if m.tags else ""
-        summ = f" — {m.summary}" if m.summary else ""
-        lines.append(f"- ({m.kind}{tag_str}; imp={m.importance:.2f}) {m.text}{summ}")
-    return "\n".join(lines)
+    def decay(self, min_importance: float = _DECAY_FLOOR, hours_threshold: float = 72.0,
+              half_life_hours: float = 168.0,
+              batch_size: int = _MAINTENANCE_BATCH) -> MaintenanceStats:
+        """
+        Fade memories not accessed for `hours_threshold` hours. Importance
+        halves every `half_life_hours` of idle time (computed in SQL from
+        last access, counting only time since the previous pass) and never
+        drops below `min_importance`. Runs in committed chunks of `batch_size`.
+        """
+        self.flush()
+        self.flush_access()
+        stats, start = MaintenanceStats(), time.perf_counter()
+        now = datetime.utcnow()
+        last_pass = self.store.get_meta("last_decay_at")
+        since_last = now - from_micros(last_pass) if last_pass is not None else None
+        cursor = (0, 0)
+        while cursor is not None:
+            cursor, n = self.store.decay_batch(
+                cursor=cursor, limit=batch_size, now=now,
+                idle=timedelta(hours=hours_threshold),
+                half_life=timedelta(hours=half_life_hours),
+                max_span=since_last, floor=min_importance,
+            )
+            if cursor is not None:
+                stats.rows += n
+                stats.batches += 1
+        self.store.set_meta("last_decay_at", to_micros(now))
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def prune(self, max_items: int = 5000, drop_below: float = _DECAY_FLOOR,
+              batch_size: int = _MAINTENANCE_BATCH) -> MaintenanceStats:
+        """
+        Delete low-importance memories (importance <= drop_below, least
+        important and oldest first) until at most `max_items` remain, in
+        committed chunks of `batch_size`. The default threshold is decay()'s
+        floor, so memories decay has fully faded can be evicted.
+        """
+        self.flush()
+        self.flush_access()
+        stats, start = MaintenanceStats(), time.perf_counter()
+        overflow = self.store.count() - max_items
+        while overflow > 0:
+            n = self.store.prune_batch(drop_below, min(batch_size, overflow))
+            if n == 0:
+                break
+            stats.rows += n
+            stats.batches += 1
+            overflow -= n
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def consolidate(self, batch_size: int = _MAINTENANCE_BATCH) -> MaintenanceStats:
+        """
+        Batch pass for rows written before consolidation was enabled: index
+        every episodic memory and fold near-duplicates into the earliest copy.
+        rows = memories merged away.
+        """
+        self.flush()
+        stats, start = MaintenanceStats(), time.perf_counter()
+        after = 0
+        while after is not None:
+            after, merged = self.store.consolidate_batch(after, batch_size)
+            if after is not None:
+                stats.rows += merged
+                stats.batches += 1
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def archive_old(self, older_than_hours: float = 720.0, max_importance: float = 0.8,
+                    batch_size: int = _MAINTENANCE_BATCH) -> MaintenanceStats:
+        """
+        Move memories not accessed for `older_than_hours` (and below
+        `max_importance`, never pinned ones) from the hot shard into the
+        archive, in committed chunks of `batch_size`. Each chunk is copied
+        before it is deleted, so an interrupted pass only leaves duplicates
+        that the next pass skips. rows = memories moved.
+        """
+        stats = MaintenanceStats()
+        if self.archive is None:
+            return stats
+        self.flush()
+        self.flush_access()
+        start = time.perf_counter()
+        before = datetime.utcnow() - timedelta(hours=older_than_hours)
+        cursor = (0, 0)
+        while cursor is not None:
+            cursor, recs = self.store.archive_candidates(
+                cursor=cursor, limit=batch_size, before=before, max_importance=max_importance)
+            if recs:
+                self.archive.append(recs)
+                stats.rows += self.store.delete([m.id for m in recs])
+                stats.batches += 1
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def start_maintenance(self, interval: float = 600.0, *, max_items: int = 5000) -> None:
+        """Run decay(), archive_old() and prune() every `interval` seconds on a daemon thread."""
+        if self._maintenance is not None:
+            return
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    if self.store.consolidator is not None:
+                        self.consolidate()
+                    d = self.decay()
+                    a = self.archive_old()
+                    p = self.prune(max_items=max_items)
+                    log(f"[Memory] maintenance: decayed {d.rows} in {d.seconds:.3f}s, "
+                        f"archived {a.rows} in {a.seconds:.3f}s, "
+                        f"pruned {p.rows} in {p.seconds:.3f}s")
+                except Exception as e:
+                    log(f"[Memory] maintenance failed: {e}")
+
+        thread = threading.Thread(target=loop, name="memory-maintenance", daemon=True)
+        self._maintenance = (stop, thread)
+        thread.start()
+
+    def stop_maintenance(self) -> None:
+        if self._maintenance is None:
+            return
+        stop, thread = self._maintenance
+        stop.set()
+        thread.join()
+        self._maintenance = None
+
+
+def _normalize_task(task: str) -> str:
+    return " ".join(task.lower().split())
@@ -0,0 +1,69 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+from .models import Memory
+
+_CHARS_PER_TOKEN = 4  # rough average for English prose / code under BPE tokenizers
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, -(-len(text) // _CHARS_PER_TOKEN))  # ceil
+
+
+def format_line(m: Memory) -> str:
+    tag_str = f" [{','.join(m.tags)}]" if m.tags else ""
+    summ = f" — {m.summary}" if m.summary else ""
+    hits = f"; x{m.hits}" if m.hits > 1 else ""
+    return f"- ({m.kind}{tag_str}; imp={m.importance:.2f}{hits}) {m.text}{summ}"
+
+
+@dataclass
+class Section:
+    title: str
+    memories: Sequence[Memory]          # best first
+    weight: float = 1.0                 # how much a line here is worth
+
+
+def pack(sections: List[Section], budget_tokens: int) -> str:
+    """
+    Build the context block from whole memory lines:
+    - a memory appears once, in the first (highest-priority) section listing it
+    - each line costs estimate_tokens(line); a section header is paid for
+      with its first line
+    - lines are taken greedily by value per token until the budget is spent;
+      a line that does not fit is skipped, never cut
+    Sections and lines keep their original order in the output.
+    """
+    seen = set()
+    candidates: List[Tuple[float, int, int, str, int]] = []
+    for s_idx, section in enumerate(sections):
+        for pos, m in enumerate(section.memories):
+            key = m.id if m.id is not None else ("text", m.text)
+            if key in seen:
+                continue
+            seen.add(key)
+            line = format_line(m)
+            cost = estimate_tokens(line)
+            # rank within the section decays the value; importance lifts it
+            value = section.weight * (0.5 + m.importance) / (1.0 + 0.25 * pos)
+            candidates.append((value / cost, s_idx, pos, line, cost))
+
+    header_cost = [estimate_tokens(f"### {s.title}") + 1 for s in sections]
+    chosen: List[List[Tuple[int, str]]] = [[] for _ in sections]
+    used = 0
+    for _, s_idx, pos, line, cost in sorted(candidates, key=lambda c: -c[0]):
+        extra = cost + (0 if chosen[s_idx] else header_cost[s_idx])
+        if used + extra > budget_tokens:
+            continue
+        chosen[s_idx].append((pos, line))
+        used += extra
+
+    blocks = []
+    for section, lines in zip(sections, chosen):
+        if lines:
+            blocks.append("\n".join([f"### {section.title}"] + [l for _, l in sorted(lines)]))
+    return "\n\n".join(blocks)
+
+
+def budget_from_chars(chars: int) -> int:
+    return max(0, chars // _CHARS_PER_TOKEN)
@@ -1,13 +1,28 @@
 from __future__ import annotations
-from typing import List, Tuple
+from dataclasses import dataclass
+from typing import List, Optional
 from datetime import datetime
 import math
 from .models import Memory
 
+@dataclass(frozen=True)
+class RankingWeights:
+    """
+    score = bm25 * rank_position + recency * ln(1 + age_hours)
+            + importance * (1 - importance_value)
+    Lower is better. The same formula runs in SQL (store.search_ranked)
+    and in rerank() below.
+    """
+    bm25: float = 1.0
+    recency: float = 1.0
+    importance: float = 2.0
+
+DEFAULT_WEIGHTS = RankingWeights()
+
 def _age_hours(dt: datetime) -> float:
     return max(0.0, (datetime.utcnow() - dt).total_seconds() / 3600.0)
 
-def score(memory: Memory, bm25_rank: int) -> float:
+def score(memory: Memory, bm25_rank: int, weights: RankingWeights = DEFAULT_WEIGHTS) -> float:
     """
     Lower is better (for sorting). Combine:
     - BM25 rank position
@@ -17,13 +32,23 @@ def score(memory: Memory, bm25_rank: int) -> float:
     age = _age_hours(memory.last_accessed_at)
     # map to a small penalty; newer memories preferred
     recency_pen = math.log1p(age) # 0 for fresh; grows slowly
-    importance_gain = (1.0 - memory.importance) * 2.0 # high importance -> negative gain
-    return bm25_rank + recency_pen + importance_gain
+    importance_gain = (1.0 - memory.importance) # high importance -> negative gain
+    return (weights.bm25 * bm25_rank + weights.recency * recency_pen
+            + weights.importance * importance_gain)
 
-def rerank(bm25_results: List[Memory]) -> List[(Memory)]:
-    tuples: List[Tuple[float, Memory]] = []
-    for i, m in enumerate(bm25_results):
-        s = score(m, i + 1)
-        tuples.append((s, m))
-    tuples.sort(key=lambda x: x[0])
-    return [m for _, m in tuples]
+def rerank(bm25_results: List[Memory], weights: RankingWeights = DEFAULT_WEIGHTS,
+           now: Optional[datetime] = None) -> List[(Memory)]:
+    """Vectorized score() over the whole candidate list (one clock read)."""
+    if not bm25_results:
+        return []
+    import numpy as np  # only here: the store itself has no external dependencies
+    now = now or datetime.utcnow()
+    n = len(bm25_results)
+    ages = np.fromiter(((now - m.last_accessed_at).total_seconds() for m in bm25_results),
+                       dtype=np.float64, count=n)
+    imp = np.fromiter((m.importance for m in bm25_results), dtype=np.float64, count=n)
+    scores = (weights.bm25 * np.arange(1, n + 1)
+              + weights.recency * np.log1p(np.maximum(ages, 0.0) / 3600.0)
+              + weights.importance * (1.0 - imp))
+    order = np.argsort(scores, kind="stable")
+    return [bm25_results[i] for i in order]
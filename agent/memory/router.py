@@ -0,0 +1,75 @@
+from __future__ import annotations
+import hashlib, os, re, threading
+from typing import Dict, Optional, Tuple
+from .module import MemoryModule
+
+# no dots: "acme.archive" would otherwise name tenant acme's archive shard
+_SAFE_KEY = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_HASHED_PREFIX = "h-"
+DEFAULT_TENANT = "default"
+
+
+def shard_name(key: str) -> str:
+    """
+    File-system safe name for a tenant/session key. Keys that aren't plain
+    [A-Za-z0-9_-] names, or that look like a hashed name, are hashed, so
+    two keys never share a shard or reach another key's archive.
+    """
+    if _SAFE_KEY.match(key) and not key.startswith(_HASHED_PREFIX):
+        return key
+    return _HASHED_PREFIX + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+class MemoryRouter:
+    """
+    Routes memory to one SQLite shard per tenant (or per tenant + session):
+
+        <root>/<tenant>.db                    hot shard
+        <root>/<tenant>.archive.db            cold tier (archive=True)
+        <root>/<tenant>/<session>.db          per-session shard
+
+    Each shard is its own MemoryModule, so tenants never share a write lock
+    or an FTS index. Modules are opened on first use and kept until close().
+    `module_kwargs` are passed to every MemoryModule.
+    """
+
+    def __init__(self, root: str = "memory", *, archive: bool = True, **module_kwargs):
+        self.root = root
+        self.archive = archive
+        self.module_kwargs = module_kwargs
+        self._lock = threading.Lock()
+        self._shards: Dict[Tuple[str, Optional[str]], MemoryModule] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, tenant: str = DEFAULT_TENANT, session: Optional[str] = None) -> str:
+        if session is None:
+            return os.path.join(self.root, shard_name(tenant) + ".db")
+        return os.path.join(self.root, shard_name(tenant), shard_name(session) + ".db")
+
+    def get(self, tenant: str = DEFAULT_TENANT, session: Optional[str] = None) -> MemoryModule:
+        """The MemoryModule for this tenant (and session), opening it if needed."""
+        key = (tenant, session)
+        with self._lock:
+            module = self._shards.get(key)
+            if module is None:
+                path = self.path_for(tenant, session)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                archive_path = path[:-len(".db")] + ".archive.db" if self.archive else None
+                module = MemoryModule(path, archive_path=archive_path, **self.module_kwargs)
+                self._shards[key] = module
+            return module
+
+    def open_shards(self) -> Dict[Tuple[str, Optional[str]], MemoryModule]:
+        with self._lock:
+            return dict(self._shards)
+
+    def close(self, tenant: Optional[str] = None, session: Optional[str] = None) -> None:
+        """Close one shard, or every open shard when tenant is None."""
+        with self._lock:
+            if tenant is None:
+                modules, self._shards = list(self._shards.values()), {}
+            else:
+                module = self._shards.pop((tenant, session), None)
+                modules = [module] if module is not None else []
+        for module in modules:
+            module.close()
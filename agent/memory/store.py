@@ -1,12 +1,31 @@
 from __future__ import annotations
-import json, sqlite3, threading, re
-from typing import Iterable, List, Tuple, Optional
-from datetime import datetime
-from .models import Memory
+import json, math, sqlite3, threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple, Optional, Sequence, Union
+from datetime import datetime, timedelta
+from .models import Memory, MemoryRecord, MEMORY_COLUMNS, to_micros
+from .ranking import RankingWeights, DEFAULT_WEIGHTS
+from .fts import ColumnWeights, DEFAULT_COLUMN_WEIGHTS, QueryHints, compile_query, terms
 
-_SCHEMA = """
-PRAGMA journal_mode=WAL;
+if TYPE_CHECKING:  # numpy is only needed when these features are enabled
+    from .vector import VectorIndex
+    from .consolidate import MinHashLSH
 
+# Applied once per pooled connection (journal_mode is persistent on the file).
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",     # 256 MiB
+    "PRAGMA cache_size=-16000",       # ~16 MiB page cache
+    "PRAGMA temp_store=MEMORY",
+)
+
+_STATEMENT_CACHE_SIZE = 128
+
+# common_terms(): below this many rows nothing is dropped
+_COMMON_TERM_MIN_ROWS = 100
+_COMMON_TERM_CACHE_SIZE = 10000
+
+_MEMORIES_TABLE = """
 CREATE TABLE IF NOT EXISTS memories (
     id INTEGER PRIMARY KEY,
     kind TEXT NOT NULL,
@@ -14,15 +33,29 @@ CREATE TABLE IF NOT EXISTS memories (
     summary TEXT,
     tags TEXT NOT NULL,               -- JSON array of strings
     importance REAL NOT NULL,
-    created_at TEXT NOT NULL,
-    last_accessed_at TEXT NOT NULL,
-    meta TEXT NOT NULL                -- JSON object
+    created_at INTEGER NOT NULL,      -- epoch microseconds (UTC)
+    last_accessed_at INTEGER NOT NULL,
+    meta TEXT NOT NULL,               -- JSON object
+    hits INTEGER NOT NULL DEFAULT 1   -- near-duplicates consolidated into this row
 );
+"""
 
--- FTS5 index for BM25-style search
+_FTS_TABLE = """
 CREATE VIRTUAL TABLE IF NOT EXISTS fts_memories USING fts5(
-    text, summary, tags, content='memories', content_rowid='id'
+    text, summary, tags, content='memories', content_rowid='id', prefix='2 3'
 );
+"""
+
+_SCHEMA = _MEMORIES_TABLE + """
+-- recency (recent, decay) and eviction order (prune) are index range scans
+CREATE INDEX IF NOT EXISTS idx_memories_last_access ON memories(last_accessed_at);
+CREATE INDEX IF NOT EXISTS idx_memories_importance_access ON memories(importance, last_accessed_at);
+
+-- FTS5 index for BM25-style search
+""" + _FTS_TABLE + """
+
+-- per-term document counts, for common_terms()
+CREATE VIRTUAL TABLE IF NOT EXISTS fts_memories_vocab USING fts5vocab(fts_memories, 'row');
 
 -- keep FTS in sync
 CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
@@ -35,133 +68,755 @@ CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
   VALUES ('delete', old.id, old.text, coalesce(old.summary,''), old.tags);
 END;
 
-CREATE TRIGGER IF NOT EXISTS memories_au AFTER UPDATE ON memories BEGIN
+-- only the indexed columns; access-time / importance / hits updates skip FTS
+CREATE TRIGGER IF NOT EXISTS memories_au AFTER UPDATE OF text, summary, tags ON memories BEGIN
   INSERT INTO fts_memories(fts_memories, rowid, text, summary, tags)
   VALUES ('delete', old.id, old.text, coalesce(old.summary,''), old.tags);
   INSERT INTO fts_memories(rowid, text, summary, tags)
   VALUES (new.id, new.text, coalesce(new.summary,''), new.tags);
 END;
+
+-- normalized tags; (tag, memory_id) primary key doubles as a covering index
+CREATE TABLE IF NOT EXISTS memory_tags (
+    memory_id INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, memory_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_memory_tags_memory ON memory_tags(memory_id);
+
+-- small key/value table for maintenance bookkeeping (e.g. last decay pass)
+CREATE TABLE IF NOT EXISTS memory_meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+
+-- MinHash LSH buckets for near-duplicate consolidation (see consolidate.py)
+CREATE TABLE IF NOT EXISTS memory_lsh (
+    band_bucket INTEGER NOT NULL,
+    memory_id INTEGER NOT NULL,
+    PRIMARY KEY (band_bucket, memory_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_memory_lsh_memory ON memory_lsh(memory_id);
+
+CREATE TRIGGER IF NOT EXISTS memories_lsh_ad AFTER DELETE ON memories BEGIN
+  DELETE FROM memory_lsh WHERE memory_id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS memories_tags_ai AFTER INSERT ON memories BEGIN
+  INSERT OR IGNORE INTO memory_tags(memory_id, tag)
+  SELECT new.id, value FROM json_each(new.tags);
+END;
+
+CREATE TRIGGER IF NOT EXISTS memories_tags_ad AFTER DELETE ON memories BEGIN
+  DELETE FROM memory_tags WHERE memory_id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS memories_tags_au AFTER UPDATE OF tags ON memories BEGIN
+  DELETE FROM memory_tags WHERE memory_id = old.id;
+  INSERT OR IGNORE INTO memory_tags(memory_id, tag)
+  SELECT new.id, value FROM json_each(new.tags);
+END;
 """
 
-def _sanitize_to_fts_query(q: str) -> str:
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _now_micros() -> int:
+    return to_micros(datetime.utcnow())
+
+
+# ---------- migrations ----------
+# Each step returns the SQL to run (may be empty); _migrate() applies it and
+# bumps PRAGMA user_version in the same transaction.
+
+def _m_backfill_tags(cx: sqlite3.Connection) -> str:
+    # databases created before the memory_tags index
+    return """INSERT OR IGNORE INTO memory_tags(memory_id, tag)
+              SELECT m.id, j.value FROM memories m, json_each(m.tags) j;"""
+
+
+def _iso_to_micros(cx: sqlite3.Connection) -> None:
+    cx.create_function("iso_to_micros", 1,
+                       lambda v: to_micros(datetime.fromisoformat(v)) if isinstance(v, str) else v,
+                       deterministic=True)
+
+
+def _m_integer_timestamps(cx: sqlite3.Connection) -> str:
+    # ISO-8601 TEXT timestamps -> INTEGER epoch micros (rebuilds the table;
+    # ids are kept so fts_memories and memory_tags stay valid)
+    cols = {r["name"]: r["type"] for r in cx.execute("PRAGMA table_info(memories)")}
+    if cols.get("last_accessed_at", "").upper() == "INTEGER":
+        return ""
+    _iso_to_micros(cx)
+    return _MEMORIES_TABLE.replace("IF NOT EXISTS memories", "memories_v2") + """
+        INSERT INTO memories_v2(id,kind,text,summary,tags,importance,created_at,last_accessed_at,meta)
+        SELECT id,kind,text,summary,tags,importance,
+               iso_to_micros(created_at),iso_to_micros(last_accessed_at),meta
+        FROM memories;
+        DROP TABLE memories;
+        ALTER TABLE memories_v2 RENAME TO memories;"""
+
+
+def _m_hits_column(cx: sqlite3.Connection) -> str:
+    cols = {r["name"] for r in cx.execute("PRAGMA table_info(memories)")}
+    if "hits" in cols:
+        return ""
+    return "ALTER TABLE memories ADD COLUMN hits INTEGER NOT NULL DEFAULT 1;"
+
+
+def _m_fts_prefix_index(cx: sqlite3.Connection) -> str:
+    # prefix='2 3' needs a new FTS table; also the one-off repopulation that
+    # used to run on every open
+    sql = cx.execute("SELECT sql FROM sqlite_master WHERE name = 'fts_memories'").fetchone()[0]
+    recreate = "" if "prefix" in sql else (
+        "DROP TABLE fts_memories;" + _FTS_TABLE.replace(" IF NOT EXISTS", ""))
+    return recreate + "INSERT INTO fts_memories(fts_memories) VALUES ('rebuild');"
+
+
+def _m_fts_update_trigger(cx: sqlite3.Connection) -> str:
+    # memories_au used to fire on every UPDATE (e.g. last_accessed_at);
+    # _SCHEMA re-creates it with an UPDATE OF column list
+    return "DROP TRIGGER IF EXISTS memories_au;"
+
+
+def _m_meta_decay_micros(cx: sqlite3.Connection) -> str:
+    # decay() wrote its last pass as ISO-8601 text; epoch micros like the rest
+    _iso_to_micros(cx)
+    return """UPDATE memory_meta SET value = iso_to_micros(value)
+              WHERE key = 'last_decay_at' AND typeof(value) = 'text';"""
+
+
+_MIGRATIONS = (
+    _m_backfill_tags,        # 1
+    _m_integer_timestamps,   # 2
+    _m_hits_column,          # 3
+    _m_fts_prefix_index,     # 4
+    _m_fts_update_trigger,   # 5
+    _m_meta_decay_micros,    # 6
+)
+
+
+_INSERT_SQL = """INSERT INTO memories(kind,text,summary,tags,importance,created_at,last_accessed_at,meta,hits)
+                 VALUES(?,?,?,?,?,?,?,?,?)"""
+
+
+def _memory_params(m: Memory) -> tuple:
+    return (
+        m.kind,
+        m.text,
+        m.summary,
+        json.dumps(m.tags),
+        float(m.importance),
+        to_micros(m.created_at),
+        to_micros(m.last_accessed_at),
+        json.dumps(m.meta or {}),
+        int(m.hits),
+    )
+
+
+def _migrate(cx: sqlite3.Connection) -> bool:
+    """Apply pending migrations; returns True if any ran."""
+    version = cx.execute("PRAGMA user_version").fetchone()[0]
+    for target, step in enumerate(_MIGRATIONS[version:], start=version + 1):
+        cx.executescript(f"BEGIN; {step(cx)} PRAGMA user_version={target}; COMMIT;")
+    return version < len(_MIGRATIONS)
+
+
+def _filter_sql(tags: Optional[List[str]], kind: Optional[str]) -> Tuple[str, list]:
     """
-    Convert natural language into a tolerant FTS5 query.
-    - keep alphanumerics
-    - drop punctuation that confuses the parser (e.g., '?', ':', etc.)
-    - OR-join tokens with prefix matches to avoid syntax errors
+    SQL predicate over alias `m` for kind / all-of-tags filters, served by
+    the memory_tags primary key.
     """
-    tokens = re.findall(r"[A-Za-z0-9_]+", q)
-    if not tokens:
-        return ""  # will return 0 rows cleanly
-    # add '*' for prefix search where useful (skip tiny tokens)
-    safe = " OR ".join([t if len(t) < 3 else f"{t}*" for t in tokens])
-    return safe
+    clauses, params = [], []
+    if kind:
+        clauses.append("m.kind = ?")
+        params.append(kind)
+    tags = list(dict.fromkeys(tags or []))
+    if tags:
+        marks = ",".join("?" * len(tags))
+        clauses.append(
+            f"m.id IN (SELECT memory_id FROM memory_tags WHERE tag IN ({marks}) "
+            f"GROUP BY memory_id HAVING count(*) = ?)"
+        )
+        params.extend(tags)
+        params.append(len(tags))
+    return "".join(f" AND {c}" for c in clauses), params
+
+
+def _projection(columns: Sequence[str]) -> Tuple[str, ...]:
+    if columns is MEMORY_COLUMNS:
+        return MEMORY_COLUMNS
+    unknown = set(columns) - set(MEMORY_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown memory columns: {sorted(unknown)}")
+    return ("id",) + tuple(c for c in columns if c != "id")
+
+
+def _select_list(columns: Sequence[str]) -> str:
+    return ", ".join(f"m.{c}" for c in columns)
+
+
+def _fetch_records(cx: sqlite3.Connection, columns: Tuple[str, ...],
+                   sql: str, params) -> List[MemoryRecord]:
+    # plain tuples (no sqlite3.Row) straight into slotted records
+    cur = cx.cursor()
+    cur.row_factory = None
+    cur.execute(sql, params)
+    if columns is MEMORY_COLUMNS:
+        n = len(columns)
+        return [MemoryRecord(*row[:n]) for row in cur]
+    make = MemoryRecord.from_row
+    return [make(columns, row) for row in cur]
+
+
+def _merge_into(cx: sqlite3.Connection, target: int, hits: int,
+                importance: float, last_access_us: int) -> None:
+    # repeated evidence nudges importance up with diminishing returns
+    # (SET expressions see the old `hits`); recency follows the newest copy
+    cx.execute(
+        """
+        UPDATE memories
+        SET hits = hits + :hits,
+            importance = min(1.0, max(importance, :imp) + 0.05 * :hits / (hits + :hits)),
+            last_accessed_at = max(last_accessed_at, :ts)
+        WHERE id = :id
+        """,
+        {"hits": hits, "imp": float(importance), "ts": last_access_us, "id": target},
+    )
+
+
+def _register_functions(cx: sqlite3.Connection) -> None:
+    # exp()/ln() are only built in when SQLite has math functions enabled
+    for name, fn in (("exp", math.exp), ("ln", math.log)):
+        try:
+            cx.execute(f"SELECT {name}(1)")
+        except sqlite3.OperationalError:
+            cx.create_function(name, 1, fn, deterministic=True)
+
+
+def _embed_text(text: str, summary: Optional[str], tags) -> str:
+    if not isinstance(tags, str):
+        tags = " ".join(tags or [])
+    return f"{text} {summary or ''} {tags}"
+
+
+class _ConnectionPool:
+    """
+    One long-lived connection per thread. Pragmas are applied when the
+    connection is opened; sqlite3's statement cache handles statement reuse.
+    Connections of threads that have exited (short-lived server workers)
+    are closed whenever another thread opens one, so the pool never holds
+    more than one per live thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._closed = False
+
+    def get(self) -> sqlite3.Connection:
+        cx = getattr(self._local, "cx", None)
+        if cx is not None:
+            return cx
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("memory store is closed")
+            self._release_dead()
+            cx = sqlite3.connect(
+                self.path,
+                check_same_thread=False,
+                cached_statements=_STATEMENT_CACHE_SIZE,
+            )
+            cx.row_factory = sqlite3.Row
+            for pragma in _PRAGMAS:
+                cx.execute(pragma)
+            _register_functions(cx)
+            self._conns[threading.current_thread()] = cx
+        self._local.cx = cx
+        return cx
+
+    def _release_dead(self) -> None:
+        # caller holds self._lock
+        for thread in [t for t in self._conns if not t.is_alive()]:
+            try:
+                self._conns.pop(thread).close()
+            except sqlite3.Error:
+                pass
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._conns)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            conns, self._conns = list(self._conns.values()), {}
+        for cx in conns:
+            try:
+                cx.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
 
 class SQLiteMemoryStore:
     """
     Lightweight, fast store with FTS5 (BM25). No external dependencies.
+    Connections are pooled per thread; call close() on shutdown. Writes
+    are serialized by one lock, reads run concurrently (WAL).
     """
 
     def __init__(self, path: str = "agent_memory.db"):
         self.path = path
+        # serializes writers only; readers use their own pooled connection
+        # and WAL gives each read a consistent snapshot
         self._lock = threading.RLock()
+        self._pool = _ConnectionPool(path)
+        self.vectors: Optional[VectorIndex] = None
+        # when set, episodic inserts are merged into near-duplicates
+        self.consolidator: Optional[MinHashLSH] = None
+        # bumped by every write that changes what a read returns (insert,
+        # merge, delete, decay, access times) so readers can invalidate caches
+        self.generation = 0
+        # bm25() weights for the text / summary / tags columns
+        self.column_weights: ColumnWeights = DEFAULT_COLUMN_WEIGHTS
+        self._row_count: Tuple[int, int] = (-1, 0)  # (generation, count)
+        self._common: Dict[str, bool] = {}          # common_terms() verdicts
+        self._common_lock = threading.Lock()
+        self._common_rows = 0
         with self._conn() as cx:
             cx.executescript(_SCHEMA)
-            # Ensure FTS is fully populated from content table (no-op if fresh)
-            try:
-                cx.execute("INSERT INTO fts_memories(fts_memories) VALUES ('rebuild')")
-            except sqlite3.OperationalError:
-                # On old SQLite builds 'rebuild' may not exist; safe to ignore
-                pass
+            if _migrate(cx):
+                cx.executescript(_SCHEMA)  # re-create triggers/indexes on rebuilt tables
 
-    def _conn(self):
-        cx = sqlite3.connect(self.path, check_same_thread=False)
-        cx.row_factory = sqlite3.Row
-        return cx
+    def _conn(self) -> sqlite3.Connection:
+        return self._pool.get()
+
+    def close(self) -> None:
+        with self._lock:
+            if self.vectors is not None:
+                self.vectors.flush()
+            self._pool.close()
+
+    def attach_vectors(self, index: VectorIndex) -> None:
+        """
+        Keep `index` in sync with inserts/deletes from now on. Rebuilds it
+        from the table if it disagrees with the stored rows (new or stale file).
+        """
+        with self._lock:
+            cx = self._conn()
+            ids = {r[0] for r in cx.execute("SELECT id FROM memories")}
+            if ids != index.ids():
+                index.clear()
+                rows = cx.execute("SELECT id, text, summary, tags FROM memories")
+                index.add((r["id"], _embed_text(r["text"], r["summary"], r["tags"])) for r in rows)
+                index.flush()
+            self.vectors = index
+
+    def __enter__(self) -> "SQLiteMemoryStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     def insert(self, m: Memory) -> int:
         with self._lock, self._conn() as cx:
-            cur = cx.execute(
-                """INSERT INTO memories(kind,text,summary,tags,importance,created_at,last_accessed_at,meta)
-                   VALUES(?,?,?,?,?,?,?,?)""",
-                (
-                    m.kind,
-                    m.text,
-                    m.summary,
-                    json.dumps(m.tags),
-                    float(m.importance),
-                    m.created_at.isoformat(),
-                    m.last_accessed_at.isoformat(),
-                    json.dumps(m.meta or {}),
-                ),
-            )
-            return int(cur.lastrowid)
+            new_id = self._insert_one(cx, m)
+            self.generation += 1
+            return new_id
 
-    def update_last_access(self, ids: Iterable[int]) -> None:
-        now = datetime.utcnow().isoformat()
-        ids = list(ids)
-        if not ids:
-            return
+    def insert_many(self, ms: List[Memory]) -> List[int]:
+        """
+        Insert a batch in one transaction (one commit/fsync for the group).
+        Returns the new ids in input order (the surviving id for records
+        merged into a near-duplicate).
+        """
+        if not ms:
+            return []
         with self._lock, self._conn() as cx:
-            cx.executemany(
-                "UPDATE memories SET last_accessed_at=? WHERE id=?",
-                [(now, _id) for _id in ids],
+            if self.consolidator is not None:
+                # each record may merge into an earlier one, so go row by row
+                ids = [self._insert_one(cx, m) for m in ms]
+            else:
+                # rowid aliases are assigned max(id)+1, so inside one write
+                # transaction an executemany batch gets a contiguous id range.
+                # Take the database write lock before reading max(id): the
+                # thread lock does not cover other processes or connections.
+                if not cx.in_transaction:
+                    cx.execute("BEGIN IMMEDIATE")
+                start = cx.execute("SELECT coalesce(max(id), 0) FROM memories").fetchone()[0] + 1
+                cx.executemany(_INSERT_SQL, [_memory_params(m) for m in ms])
+                ids = list(range(start, start + len(ms)))
+                if self.vectors is not None:
+                    self.vectors.add((i, _embed_text(m.text, m.summary, m.tags)) for i, m in zip(ids, ms))
+            self.generation += 1
+        return ids
+
+    def _insert_one(self, cx: sqlite3.Connection, m: Memory) -> int:
+        lsh = self.consolidator if m.kind == "episodic" else None
+        if lsh is not None:
+            dup = lsh.find_duplicate(cx, m.text, m.kind, m.tags)
+            if dup is not None:
+                _merge_into(cx, dup, m.hits, m.importance, to_micros(m.last_accessed_at))
+                return dup
+        new_id = int(cx.execute(_INSERT_SQL, _memory_params(m)).lastrowid)
+        if lsh is not None:
+            lsh.index(cx, new_id, m.text, m.tags)
+        if self.vectors is not None:
+            self.vectors.add([(new_id, _embed_text(m.text, m.summary, m.tags))])
+        return new_id
+
+    def consolidate_batch(self, after_id: int, limit: int) -> Tuple[Optional[int], int]:
+        """
+        Index up to `limit` episodic memories with id > after_id in the LSH
+        table, merging each into an already-indexed near-duplicate when one
+        exists. Returns (last id scanned or None when done, rows merged).
+        """
+        lsh = self.consolidator
+        if lsh is None:
+            raise RuntimeError("consolidation is not enabled on this store")
+        with self._lock, self._conn() as cx:
+            rows = cx.execute(
+                """
+                SELECT id, kind, text, tags, hits, importance, last_accessed_at FROM memories
+                WHERE id > ? AND kind = 'episodic'
+                  AND id NOT IN (SELECT memory_id FROM memory_lsh)
+                ORDER BY id
+                LIMIT ?
+                """,
+                (after_id, limit),
+            ).fetchall()
+            if not rows:
+                return None, 0
+            merged = []
+            for r in rows:
+                dup = lsh.find_duplicate(cx, r["text"], r["kind"], r["tags"], exclude=r["id"])
+                if dup is None:
+                    lsh.index(cx, r["id"], r["text"], r["tags"])
+                else:
+                    _merge_into(cx, dup, r["hits"], r["importance"], r["last_accessed_at"])
+                    merged.append(r["id"])
+            if merged:
+                self._delete_ids(cx, merged)
+            else:
+                self.generation += 1
+            return rows[-1]["id"], len(merged)
+
+    def update_last_access(self, touches: Union[Iterable[int], Dict[int, int]]) -> int:
+        """
+        Set last_accessed_at for `touches`: ids (touched now) or an
+        {id: epoch micros} map, as collected by AccessTracker. Never moves a
+        timestamp backwards. Only the memories_au trigger's columns rewrite
+        the FTS row, so this leaves the full-text index alone.
+        """
+        if not isinstance(touches, dict):
+            touches = dict.fromkeys(touches, _now_micros())
+        if not touches:
+            return 0
+        with self._lock, self._conn() as cx:
+            cur = cx.executemany(
+                "UPDATE memories SET last_accessed_at = ? WHERE id = ? AND last_accessed_at < ?",
+                [(ts, mid, ts) for mid, ts in touches.items()],
             )
+            if cur.rowcount:
+                self.generation += 1  # recent() order follows last access
+            return cur.rowcount
 
     def delete(self, ids: Iterable[int]) -> int:
         ids = list(ids)
         if not ids:
             return 0
         with self._lock, self._conn() as cx:
-            cx.executemany("DELETE FROM memories WHERE id=?", [(i,) for i in ids])
-            return cx.total_changes
+            return self._delete_ids(cx, ids)
+
+    def _delete_ids(self, cx: sqlite3.Connection, ids: List[int]) -> int:
+        # one set-based statement; total_changes is cumulative on a pooled
+        # connection, so report rowcount
+        cur = cx.execute("DELETE FROM memories WHERE id IN (SELECT value FROM json_each(?))",
+                         (json.dumps(ids),))
+        self.generation += 1
+        if self.vectors is not None:
+            self.vectors.remove(ids)
+        return cur.rowcount
 
-    def search(self, query: str, limit: int = 8) -> List[Memory]:
-        # Sanitize NL into FTS-friendly text
-        fts_query = _sanitize_to_fts_query(query)
+    def search(self, query: str, limit: int = 8, *,
+               tags: Optional[List[str]] = None,
+               kind: Optional[str] = None,
+               hints: Optional[QueryHints] = None,
+               columns: Sequence[str] = MEMORY_COLUMNS) -> List[MemoryRecord]:
+        """
+        BM25 search, optionally restricted to memories carrying all `tags`
+        and/or of `kind`. With no usable query terms but a tag filter, falls
+        back to the tag index (see by_tags). `hints` adds phrase / NEAR
+        branches (see fts.compile_query). `columns` projects the result
+        (id is always included).
+        """
+        fts_query = self._compile(query, hints)
         if not fts_query:
+            return self.by_tags(tags, limit=limit, kind=kind, columns=columns) if tags else []
+
+        columns = _projection(columns)
+        where, params = _filter_sql(tags, kind)
+        with self._conn() as cx:
+            return _fetch_records(
+                cx, columns,
+                f"""
+                SELECT {_select_list(columns)}, bm25(fts_memories, ?, ?, ?) AS score
+                FROM fts_memories
+                JOIN memories m ON m.id = fts_memories.rowid
+                WHERE fts_memories MATCH ?{where}
+                ORDER BY score ASC
+                LIMIT ?
+                """,
+                (*self.column_weights.sql_args(), fts_query, *params, limit),
+            )
+
+    def search_ranked(self, query: str, k: int = 8, *, pool: Optional[int] = None,
+                      weights: RankingWeights = DEFAULT_WEIGHTS,
+                      tags: Optional[List[str]] = None,
+                      kind: Optional[str] = None,
+                      hints: Optional[QueryHints] = None,
+                      columns: Sequence[str] = MEMORY_COLUMNS) -> List[MemoryRecord]:
+        """
+        search() + ranking.rerank() in one query: take the best `pool`
+        (default 2k) BM25 hits, score them with the ranking formula in SQL
+        and return only the top k rows.
+        """
+        fts_query = self._compile(query, hints)
+        if not fts_query:
+            return self.by_tags(tags, limit=k, kind=kind, columns=columns) if tags else []
+
+        columns = _projection(columns)
+        where, params = _filter_sql(tags, kind)
+        with self._conn() as cx:
+            return _fetch_records(
+                cx, columns,
+                f"""
+                WITH cand AS (
+                    SELECT m.id AS id, bm25(fts_memories, ?, ?, ?) AS bm
+                    FROM fts_memories
+                    JOIN memories m ON m.id = fts_memories.rowid
+                    WHERE fts_memories MATCH ?{where}
+                    ORDER BY bm ASC
+                    LIMIT ?
+                ), ranked AS (
+                    SELECT id, row_number() OVER (ORDER BY bm ASC) AS pos FROM cand
+                )
+                SELECT {_select_list(columns)},
+                       ? * r.pos
+                       + ? * ln(1.0 + max(0, ? - m.last_accessed_at) / 3600000000.0)
+                       + ? * (1.0 - m.importance) AS rank_score
+                FROM ranked r
+                JOIN memories m ON m.id = r.id
+                ORDER BY rank_score ASC, r.pos ASC
+                LIMIT ?
+                """,
+                (*self.column_weights.sql_args(), fts_query, *params, pool or max(1, k * 2),
+                 weights.bm25, weights.recency, _now_micros(), weights.importance, k),
+            )
+
+    def common_terms(self, words: Sequence[str]) -> frozenset:
+        """
+        Those of `words` that occur in more than half of all rows. FTS5
+        clamps their bm25 IDF to ~0, so they add nothing to the ranking and
+        only widen the match set ("data", "model" in an ML agent's memory).
+        Verdicts are cached until the row count drifts by more than 10%:
+        fts5vocab counts documents by walking the term's doclist.
+        """
+        if not words:
+            return frozenset()
+        with self._common_lock, self._conn() as cx:
+            generation, n = self._row_count
+            if generation != self.generation:
+                n = cx.execute("SELECT count(*) FROM memories").fetchone()[0]
+                self._row_count = (self.generation, n)
+            if n < _COMMON_TERM_MIN_ROWS:
+                return frozenset()
+            if abs(n - self._common_rows) * 10 > self._common_rows or \
+                    len(self._common) > _COMMON_TERM_CACHE_SIZE:
+                self._common, self._common_rows = {}, n
+            todo = [w for w in words if w not in self._common]
+            if todo:
+                self._common.update(dict.fromkeys(todo, False))
+                for term, doc in cx.execute(
+                    """
+                    SELECT v.term, v.doc FROM json_each(?) j
+                    JOIN fts_memories_vocab v ON v.term = j.value
+                    """,
+                    (json.dumps(todo),),
+                ):
+                    self._common[term] = doc * 2 > n
+        return frozenset(w for w in words if self._common.get(w))
+
+    def _compile(self, query: str, hints: Optional[QueryHints]) -> str:
+        return compile_query(query, hints, common=self.common_terms(terms(query)))
+
+    def by_tags(self, tags: List[str], limit: int = 8, *,
+                kind: Optional[str] = None,
+                columns: Sequence[str] = MEMORY_COLUMNS) -> List[MemoryRecord]:
+        """Memories carrying all `tags`, most important first (index lookup, no FTS)."""
+        if not tags:
             return []
+        columns = _projection(columns)
+        where, params = _filter_sql(tags, kind)
+        with self._conn() as cx:
+            return _fetch_records(
+                cx, columns,
+                f"""
+                SELECT {_select_list(columns)} FROM memories m
+                WHERE 1{where}
+                ORDER BY m.importance DESC, m.id DESC
+                LIMIT ?
+                """,
+                (*params, limit),
+            )
+
+    def get_many(self, ids: List[int], *,
+                 columns: Sequence[str] = MEMORY_COLUMNS) -> List[MemoryRecord]:
+        """Fetch memories by id, preserving the order of `ids`."""
+        if not ids:
+            return []
+        columns = _projection(columns)
+        with self._conn() as cx:
+            recs = _fetch_records(
+                cx, columns,
+                f"SELECT {_select_list(columns)} FROM memories m "
+                f"WHERE m.id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(ids)),),
+            )
+        by_id = {r.id: r for r in recs}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def recent(self, limit: int = 20, *,
+               columns: Sequence[str] = MEMORY_COLUMNS) -> List[MemoryRecord]:
+        columns = _projection(columns)
+        with self._conn() as cx:
+            return _fetch_records(
+                cx, columns,
+                f"""
+                SELECT {_select_list(columns)} FROM memories m
+                ORDER BY m.last_accessed_at DESC
+                LIMIT ?
+                """,
+                (limit,),
+            )
+
+    def count(self) -> int:
+        with self._conn() as cx:
+            return int(cx.execute("SELECT count(*) FROM memories").fetchone()[0])
+
+    def prune_batch(self, drop_below: float, limit: int) -> int:
+        """
+        Delete up to `limit` memories with importance <= drop_below, least
+        important and oldest first (range scan on idx_memories_importance_access).
+        One transaction per call; returns rows deleted.
+        """
+        with self._lock, self._conn() as cx:
+            ids = [r[0] for r in cx.execute(
+                """
+                SELECT id FROM memories
+                WHERE importance <= ?
+                ORDER BY importance ASC, last_accessed_at ASC
+                LIMIT ?
+                """,
+                (drop_below, limit),
+            )]
+            return self._delete_ids(cx, ids) if ids else 0
 
+    def decay_batch(self, *, cursor: Tuple[int, int], limit: int, now: datetime,
+                    idle: timedelta, half_life: timedelta,
+                    max_span: Optional[timedelta], floor: float) -> Tuple[Optional[Tuple[int, int]], int]:
+        """
+        Exponentially decay importance for the next `limit` memories idle
+        longer than `idle`, walking idx_memories_last_access from `cursor`
+        (a (last_accessed_at, id) pair; start with (0, 0)):
+
+            importance *= 0.5 ** (min(age - idle, max_span) / half_life)
+
+        age is time since last access; max_span caps the decay at the time
+        elapsed since the previous pass. Pinned memories are skipped.
+        Returns (next cursor or None when done, rows updated).
+        """
+        now_us = to_micros(now)
+        idle_us = idle // _MICROSECOND
         with self._lock, self._conn() as cx:
             rows = cx.execute(
                 """
-                SELECT m.*, bm25(fts_memories) AS score
-                FROM fts_memories
-                JOIN memories m ON m.id = fts_memories.rowid
-                WHERE fts_memories MATCH ?
-                ORDER BY score ASC
+                SELECT id, last_accessed_at FROM memories
+                WHERE last_accessed_at < ? AND (last_accessed_at, id) > (?, ?)
+                ORDER BY last_accessed_at, id
                 LIMIT ?
                 """,
-                (fts_query, limit),
+                (now_us - idle_us, cursor[0], cursor[1], limit),
             ).fetchall()
-        return [self._row_to_memory(r) for r in rows]
+            if not rows:
+                return None, 0
+            cur = cx.execute(
+                """
+                UPDATE memories
+                SET importance = max(:floor, importance * exp(-:ln2 *
+                    min(:now - last_accessed_at - :idle, :span) / :half_life))
+                WHERE id IN (SELECT value FROM json_each(:ids))
+                  AND importance > :floor
+                  AND id NOT IN (SELECT memory_id FROM memory_tags WHERE tag = 'pinned')
+                """,
+                {
+                    "floor": floor, "ln2": math.log(2.0), "now": now_us, "idle": idle_us,
+                    "span": max_span // _MICROSECOND if max_span is not None else now_us,
+                    "half_life": half_life // _MICROSECOND,
+                    "ids": json.dumps([r[0] for r in rows]),
+                },
+            )
+            if cur.rowcount:
+                self.generation += 1
+            last = rows[-1]
+            return (last[1], last[0]), cur.rowcount
 
-    def recent(self, limit: int = 20) -> List[Memory]:
-        with self._lock, self._conn() as cx:
+    def archive_candidates(self, *, cursor: Tuple[int, int], limit: int, before: datetime,
+                           max_importance: float) -> Tuple[Optional[Tuple[int, int]], List[MemoryRecord]]:
+        """
+        Next `limit` memories last accessed before `before`, walking
+        idx_memories_last_access from `cursor` like decay_batch(), and of
+        those the ones below `max_importance` and not pinned.
+        Returns (next cursor or None when done, records).
+        """
+        with self._conn() as cx:
             rows = cx.execute(
                 """
-                SELECT * FROM memories
-                ORDER BY datetime(last_accessed_at) DESC
+                SELECT id, last_accessed_at FROM memories
+                WHERE last_accessed_at < ? AND (last_accessed_at, id) > (?, ?)
+                ORDER BY last_accessed_at, id
                 LIMIT ?
                 """,
-                (limit,),
+                (to_micros(before), cursor[0], cursor[1], limit),
             ).fetchall()
-        return [self._row_to_memory(r) for r in rows]
+            if not rows:
+                return None, []
+            recs = _fetch_records(
+                cx, MEMORY_COLUMNS,
+                f"""
+                SELECT {_select_list(MEMORY_COLUMNS)} FROM memories m
+                WHERE m.id IN (SELECT value FROM json_each(?))
+                  AND m.importance < ?
+                  AND m.id NOT IN (SELECT memory_id FROM memory_tags WHERE tag = 'pinned')
+                """,
+                (json.dumps([r[0] for r in rows]), max_importance),
+            )
+            last = rows[-1]
+            return (last[1], last[0]), recs
+
+    def get_meta(self, key: str, default=None):
+        with self._conn() as cx:
+            row = cx.execute("SELECT value FROM memory_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
 
-    def all_ids_with_scores(self) -> List[Tuple[int, float, str]]:
+    def set_meta(self, key: str, value) -> None:
         with self._lock, self._conn() as cx:
+            cx.execute("INSERT OR REPLACE INTO memory_meta(key, value) VALUES(?, ?)", (key, value))
+
+    def all_ids_with_scores(self) -> List[Tuple[int, float, int]]:
+        with self._conn() as cx:
             rows = cx.execute("SELECT id, importance, last_accessed_at FROM memories").fetchall()
         return [(r["id"], float(r["importance"]), r["last_accessed_at"]) for r in rows]
-
-    def _row_to_memory(self, r: sqlite3.Row) -> Memory:
-        return Memory(
-            id=int(r["id"]),
-            kind=r["kind"],
-            text=r["text"],
-            summary=r["summary"],
-            tags=json.loads(r["tags"]) if r["tags"] else [],
-            importance=float(r["importance"]),
-            created_at=datetime.fromisoformat(r["created_at"]),
-            last_accessed_at=datetime.fromisoformat(r["last_accessed_at"]),
-            meta=json.loads(r["meta"]) if r["meta"] else {},
-        )
@@ -0,0 +1,149 @@
+from __future__ import annotations
+import os, re, threading, zlib
+from typing import Iterable, List, Sequence, Tuple
+import numpy as np
+
+_DEFAULT_DIM = 128
+_MIN_CAPACITY = 1024
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+
+def embed(text: str, dim: int = _DEFAULT_DIM) -> np.ndarray:
+    """
+    Local, deterministic embedding: signed feature hashing of word unigrams
+    and character trigrams (so 'csv' ~ 'csv_file', typos still overlap).
+    Returns an L2-normalized float32 vector. No network, no model files.
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    for tok in _TOKEN_RE.findall(text.lower()):
+        _add(vec, "w:" + tok, 1.0)
+        padded = f"#{tok}#"
+        for i in range(len(padded) - 2):
+            _add(vec, padded[i:i + 3], 0.5)
+    norm = float(np.linalg.norm(vec))
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+def _add(vec: np.ndarray, feature: str, weight: float) -> None:
+    h = zlib.crc32(feature.encode("utf-8"))
+    vec[h % vec.shape[0]] += weight if (h >> 31) & 1 else -weight
+
+
+class VectorIndex:
+    """
+    Memory-mapped float32 matrix of embeddings kept next to the SQLite file:
+      <db>.vec      rows x dim float32
+      <db>.vec.ids  rows int64 memory ids (0 = free slot)
+    Search is a brute-force vectorized dot product + argpartition top-k.
+    Inserts append (or reuse a freed slot); deletes zero the slot.
+    """
+
+    def __init__(self, db_path: str, dim: int = _DEFAULT_DIM):
+        self.dim = dim
+        self.vec_path = db_path + ".vec"
+        self.ids_path = db_path + ".vec.ids"
+        self._lock = threading.RLock()
+        self._row_of: dict = {}
+        self._free: List[int] = []
+        self._n = 0  # high-water mark of used rows
+        self._open()
+
+    # ---------- storage ----------
+    def _open(self) -> None:
+        capacity = _MIN_CAPACITY
+        if os.path.exists(self.ids_path):
+            capacity = max(capacity, os.path.getsize(self.ids_path) // 8)
+        self._map(capacity)
+        used = np.flatnonzero(self._ids[:capacity])
+        self._n = int(used[-1]) + 1 if used.size else 0
+        self._row_of = {int(self._ids[r]): int(r) for r in used}
+        self._free = np.flatnonzero(self._ids[: self._n] == 0).tolist()
+
+    def _map(self, capacity: int) -> None:
+        for path, itemsize in ((self.vec_path, 4 * self.dim), (self.ids_path, 8)):
+            size = capacity * itemsize
+            with open(path, "ab") as f:
+                if f.tell() < size:
+                    f.truncate(size)
+        self._vecs = np.memmap(self.vec_path, dtype=np.float32, mode="r+",
+                               shape=(capacity, self.dim))
+        self._ids = np.memmap(self.ids_path, dtype=np.int64, mode="r+", shape=(capacity,))
+
+    def _grow(self) -> None:
+        self._vecs.flush()
+        self._ids.flush()
+        self._map(self._ids.shape[0] * 2)
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def ids(self) -> set:
+        return set(self._row_of)
+
+    # ---------- updates ----------
+    def add(self, items: Iterable[Tuple[int, str]]) -> None:
+        """Embed and add (memory_id, text) pairs."""
+        with self._lock:
+            for mid, text in items:
+                row = self._row_of.get(mid)
+                if row is None:
+                    if self._free:
+                        row = self._free.pop()
+                    else:
+                        if self._n >= self._ids.shape[0]:
+                            self._grow()
+                        row = self._n
+                        self._n += 1
+                    self._row_of[mid] = row
+                self._vecs[row] = embed(text, self.dim)
+                self._ids[row] = mid
+
+    def remove(self, ids: Iterable[int]) -> None:
+        with self._lock:
+            for mid in ids:
+                row = self._row_of.pop(int(mid), None)
+                if row is None:
+                    continue
+                self._vecs[row] = 0.0
+                self._ids[row] = 0
+                self._free.append(row)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vecs[: self._n] = 0.0
+            self._ids[: self._n] = 0
+            self._row_of, self._free, self._n = {}, [], 0
+
+    def flush(self) -> None:
+        with self._lock:
+            self._vecs.flush()
+            self._ids.flush()
+
+    # ---------- search ----------
+    def search(self, query: str, k: int = 8) -> List[Tuple[int, float]]:
+        """Top-k (memory_id, cosine) pairs, best first."""
+        q = embed(query, self.dim)
+        if not q.any():
+            return []
+        with self._lock:
+            n = self._n
+            if n == 0:
+                return []
+            scores = self._vecs[:n] @ q
+            ids = np.array(self._ids[:n])
+        scores = np.where(ids > 0, scores, -np.inf)
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[r]), float(scores[r])) for r in top if scores[r] > 0]
+
+
+def fuse(rankings: Sequence[Sequence[int]], k: int = 60) -> List[int]:
+    """Reciprocal-rank fusion of several ranked id lists."""
+    scores: dict = {}
+    for ranking in rankings:
+        for pos, mid in enumerate(ranking):
+            scores[mid] = scores.get(mid, 0.0) + 1.0 / (k + pos + 1)
+    return sorted(scores, key=lambda mid: -scores[mid])
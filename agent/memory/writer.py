@@ -0,0 +1,112 @@
+from __future__ import annotations
+import queue, threading, time
+from typing import List, Optional
+from agent.debug import log
+from .models import Memory
+
+_STOP = object()    # drain and exit
+
+
+class _Flush:
+    """Marker that forces the current batch out; `done` is set once
+    everything queued ahead of it is committed."""
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class WriteBehindQueue:
+    """
+    Bounded in-process queue in front of SQLiteMemoryStore.insert_many().
+    A background thread groups records into one transaction per batch and
+    flushes when the batch is full or `flush_interval` seconds have passed.
+    put() blocks when the queue is full (back-pressure instead of unbounded RAM).
+    """
+
+    def __init__(self, store, *, batch_size: int = 64,
+                 flush_interval: float = 0.05, max_queue: int = 1024):
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._q: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self.batches_written = 0
+        self.records_written = 0
+        self.last_error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+        self._thread.start()
+
+    # ---------- producer side ----------
+    def put(self, m: Memory) -> None:
+        if self._closed:
+            raise RuntimeError("write-behind queue is closed")
+        self._q.put(m)
+
+    @property
+    def pending(self) -> int:
+        return self._q.unfinished_tasks
+
+    def flush(self) -> None:
+        """
+        Block until everything queued before this call is committed.
+        Records other threads queue afterwards are not waited for, so a
+        steady stream of remember() calls can't hold up a reader.
+        """
+        if self._closed or self.pending == 0:
+            return
+        marker = _Flush()
+        self._q.put(marker)
+        marker.done.wait()
+
+    def close(self) -> None:
+        """Drain remaining records and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(_STOP)
+        self._thread.join()
+
+    # ---------- writer thread ----------
+    def _run(self) -> None:
+        batch: List[Memory] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._q.get(timeout=timeout)
+            except queue.Empty:
+                self._write(batch)  # time-based flush
+                batch, deadline = [], None
+                continue
+
+            if item is _STOP or isinstance(item, _Flush):
+                self._write(batch)
+                batch, deadline = [], None
+                self._q.task_done()
+                if item is not _STOP:
+                    item.done.set()
+                if item is _STOP:
+                    return
+                continue
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:  # size-based flush
+                self._write(batch)
+                batch, deadline = [], None
+
+    def _write(self, batch: List[Memory]) -> None:
+        if not batch:
+            return
+        try:
+            self.store.insert_many(batch)
+            self.batches_written += 1
+            self.records_written += len(batch)
+        except Exception as e:
+            self.last_error = e
+            log(f"[Memory] write-behind batch of {len(batch)} failed: {e}")
+        finally:
+            for _ in batch:
+                self._q.task_done()
@@ -0,0 +1,80 @@
+"""
+Per-stage latency sampling (plan, memory_context, tool, llm). Off unless a
+StageTimings collector is installed; then every stage() block adds one
+sample to it, from any thread or coroutine
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+PLAN = "plan"                      # splitting + intent detection (plan cache included)
+MEMORY_CONTEXT = "memory_context"  # recall for the planner's memory context
+TOOL = "tool"                      # one ToolRegistry call
+LLM = "llm"                        # one AgentCore call, cache hits and retries included
+STAGES = (PLAN, MEMORY_CONTEXT, TOOL, LLM)
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class StageTimings:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(name, []).append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per stage: count, total/mean/p50/p95/max in ms."""
+        with self._lock:
+            samples = {name: sorted(s) for name, s in self._samples.items()}
+        out = {}
+        for name in list(STAGES) + sorted(set(samples) - set(STAGES)):
+            ordered = samples.get(name)
+            if not ordered:
+                continue
+            total = sum(ordered)
+            out[name] = {
+                "count": len(ordered),
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total / len(ordered) * 1000, 3),
+                "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+                "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+        return out
+
+
+_collector: Optional[StageTimings] = None
+
+
+def collect(timings: Optional[StageTimings] = None) -> StageTimings:
+    """Install a process-wide collector (a new one by default) and return it."""
+    global _collector
+    _collector = timings or StageTimings()
+    return _collector
+
+
+def stop() -> Optional[StageTimings]:
+    """Uninstall the collector; returns it."""
+    global _collector
+    timings, _collector = _collector, None
+    return timings
+
+
+@contextmanager
+def stage(name: str):
+    timings = _collector
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.record(name, time.perf_counter() - start)
@@ -3,24 +3,198 @@ Natural language multi-step planning (v2)
 """
 
 import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 from agent.debug import log
+from agent import dag, metrics
+from agent.memory.fts import QueryHints
+
+
+# ---------------------------
+# INTENT TABLE
+# ---------------------------
+# (name, keywords, patterns, build) in priority order. Patterns run on the
+# lower-cased clause; build(match, clause) turns the first match into a
+# step, so extraction only happens for the intent that won.
+# Every pattern contains one of its keywords literally, so a clause with
+# none of them can skip the intent without running its regexes.
+
+def _tool(name, **kwargs):
+    return {"type": "tool", "name": name, "kwargs": kwargs}
+
+
+def _build_write_file(m, clause):
+    orig = _WRITE_FILE_CASED.search(clause)
+    return _tool("write_file", path=orig.group(2), content=orig.group(3))
+
+
+def _build_run_python(m, clause):
+    orig = _RUN_PYTHON_CASED.search(clause)
+    return _tool("run_python", code=orig.group(2).strip())
+
+
+def _build_preview(m, clause):
+    n = 5
+    if len(m.groups()) >= 2 and m.group(2).isdigit():
+        n = int(m.group(2))
+    return _tool("preview_data", n=n)
+
+
+_WRITE_FILE = r"(write|save|create|output)\s+(?:this\s+)?to\s+file\s+([^\s:]+):\s*(.+)"
+_RUN_PYTHON = r"(run python|execute python|run code|python code|execute code)[: ]+(.+)"
+# extraction re-runs these on the original clause to keep exact casing
+_WRITE_FILE_CASED = re.compile(_WRITE_FILE, re.IGNORECASE | re.DOTALL)
+_RUN_PYTHON_CASED = re.compile(_RUN_PYTHON, re.IGNORECASE | re.DOTALL)
+
+_INTENT_SPECS = [
+    ("read_file", ("file",), [
+        (r"(read|open|load|show|display)\s+(?:the\s+)?file\s+([^\s]+)", 0),
+    ], lambda m, c: _tool("read_file", path=m.group(2))),
+    ("write_file", ("file",), [(_WRITE_FILE, re.DOTALL)], _build_write_file),
+    ("run_python", ("python", "code"), [(_RUN_PYTHON, re.DOTALL)], _build_run_python),
+    ("generate_scaffold", ("project",), [
+        (r"(create|make|generate)\s+(?:a\s+)?project\s+(?:called|named)\s+([^\s]+)\s+in\s+([^\s]+)", 0),
+    ], lambda m, c: _tool("generate_scaffold", project_name=m.group(2), base_path=m.group(3))),
+    ("load_csv", ("csv",), [
+        (r"(load|read)\s+(?:the\s+)?csv\s+file\s+([^\s]+)", 0),
+        (r"(load|read)\s+([^\s]+\.csv)", 0),
+    ], lambda m, c: _tool("load_csv", path=m.group(2))),
+    ("preview_data", ("data", "rows"), [
+        (r"(show|preview|display)\s+(?:the\s+)?data(?:\s+head)?", 0),
+        (r"(show|preview)\s+first\s+(\d+)\s+rows", 0),
+    ], _build_preview),
+    ("describe_data", ("data",), [
+        (r"(describe|summarize)\s+(?:the\s+)?data", 0),
+        (r"data\s+summary", 0),
+    ], lambda m, c: _tool("describe_data")),
+    ("column_info", ("column",), [
+        (r"(show|list)\s+(?:the\s+)?columns", 0),
+        (r"(column|columns)\s+info", 0),
+    ], lambda m, c: _tool("column_info")),
+    ("split_data", ("data",), [
+        (r"(split|train test split|train\/test)\s+data", 0),
+        (r"split\s+the\s+data", 0),
+    ], lambda m, c: _tool("split_data")),
+    ("encode_categoricals", ("categor",), [
+        (r"(encode|transform)\s+(categorical|categoricals|categories)", 0),
+        (r"encode\s+categoricals", 0),
+    ], lambda m, c: _tool("encode_categoricals")),
+    ("scale_numericals", ("num",), [
+        (r"(scale|standardize|normalize)\s+(numerical|numeric|numbers)", 0),
+        (r"scale\s+numerical", 0),
+    ], lambda m, c: _tool("scale_numericals")),
+    ("save_dataframe", ("dataframe",), [
+        (r"(save|export)\s+(?:the\s+)?dataframe\s+to\s+([^\s]+)", 0),
+    ], lambda m, c: _tool("save_dataframe", path=m.group(2))),
+]
+
+_INTENTS = [(name, frozenset(kws), [re.compile(p, f) for p, f in pats], build)
+            for name, kws, pats, build in _INTENT_SPECS]
+
+# One pass over the clause finds every keyword: a zero-width lookahead at
+# each position reports overlapping hits too. Longest alternatives first,
+# and a hit also counts for keywords it contains ("dataframe" -> "data").
+_KEYWORDS = sorted({k for _, kws, _, _ in _INTENTS for k in kws}, key=len, reverse=True)
+_KEYWORD_RE = re.compile("(?=(" + "|".join(map(re.escape, _KEYWORDS)) + "))")
+_IMPLIES = {k: frozenset(k2 for k2 in _KEYWORDS if k2 in k) for k in _KEYWORDS}
+
+_SPLITTER = re.compile(r"(?i)\b(?:and then|then|next|after that|followed by|and)\b")
+
+_DEFAULT_PLAN_CACHE_SIZE = 256
+# steps whose arguments are copied verbatim from the text (whitespace matters)
+_VERBATIM_TOOLS = frozenset({"write_file", "run_python"})
+
+
+def _normalize_input(text: str) -> str:
+    # collapse whitespace, keep case: extraction preserves the original casing
+    return " ".join(text.split())
+
+
+def _copy_plan(plan):
+    # step values are str/int, so copying the dicts is enough
+    return [dict(step, kwargs=dict(step["kwargs"])) if "kwargs" in step else dict(step)
+            for step in plan]
+
+
+def _is_verbatim(plan) -> bool:
+    return any(step["type"] == "llm" or step.get("name") in _VERBATIM_TOOLS for step in plan)
+
+
+class PlanCache:
+    """
+    LRU cache of parsed plans keyed on whitespace-normalized input. Plans
+    that carry text verbatim (llm prompts, file content, code) only hit for
+    the exact same input. get() returns a fresh copy, so callers may mutate
+    it freely. Memory context is not cached here (MemoryModule.context()
+    has its own cache, invalidated by writes).
+    """
+
+    def __init__(self, size: int = _DEFAULT_PLAN_CACHE_SIZE):
+        self.size = size
+        self._entries: OrderedDict[str, Tuple[str, bool, list]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_input: str):
+        source = user_input.strip()
+        key = _normalize_input(source)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (not entry[1] or entry[0] == source):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy_plan(entry[2])
+            self.misses += 1
+        return None
+
+    def put(self, user_input: str, plan) -> None:
+        if self.size <= 0:
+            return
+        source = user_input.strip()
+        entry = (source, _is_verbatim(plan), _copy_plan(plan))
+        with self._lock:
+            key = _normalize_input(source)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "capacity": self.size,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
 
 
 class Planner:
-    def __init__(self, memory=None):
+    def __init__(self, memory=None, *, cache_size: int = _DEFAULT_PLAN_CACHE_SIZE):
         # Add memory moduel if avail
         self.memory = memory
 
         # Natural language sequence markers (case-insensitive)
-        self.splitter_pattern = r"(?i)\b(?:and then|then|next|after that|followed by|and)\b"
-        
+        self.splitter_pattern = _SPLITTER.pattern
+
+        # Parsed plans for repeated commands (0 disables)
+        self.plan_cache: Optional[PlanCache] = PlanCache(cache_size) if cache_size > 0 else None
+
 
     def _split_into_steps(self, text: str):
         """
         Split natural language into sequential clauses.
         Preserves original casing
         """
-        raw_parts = re.split(self.splitter_pattern, text)
+        raw_parts = _SPLITTER.split(text)
         clauses = [p.strip() for p in raw_parts if p.strip()]
         log(f"[Planner] Clauses: {clauses}")
         return clauses
@@ -31,201 +205,52 @@ class Planner:
         Uses clause_lower for intent, clause for exact extraction.
         """
         clause_lower = clause.lower()
+        found = set()
+        for k in _KEYWORD_RE.findall(clause_lower):
+            found |= _IMPLIES[k]
+        if found:
+            for name, keywords, patterns, build in _INTENTS:
+                if found.isdisjoint(keywords):
+                    continue
+                for pat in patterns:
+                    m = pat.search(clause_lower)
+                    if m:
+                        return build(m, clause)
 
-        # ---------------------------
-        # READ FILE INTENT
-        # ---------------------------
-        read_patterns = [
-            r"(read|open|load|show|display)\s+(?:the\s+)?file\s+([^\s]+)"
-        ]
-        for pat in read_patterns:
-            m = re.search(pat, clause_lower)
-            if m:
-                return {"type": "tool", 
-                        "name": "read_file",
-                        "kwargs": {"path": m.group(2)}}
-        
-        # ---------------------------
-        # WRITE FILE INTENT
-        # ---------------------------
-        write_patterns = [
-            r"(write|save|create|output)\s+(?:this\s+)?to\s+file\s+([^\s:]+):\s*(.+)"
-        ]
-        for pat in write_patterns:
-            m = re.search(pat, clause_lower, re.DOTALL)
-            if m:
-                # Extract exact content using original clause
-                orig = re.search(pat, clause, re.DOTALL)
-                return {
-                    "type": "tool", 
-                    "name": "write_file",
-                    "kwargs": {
-                        "path": orig.group(2), 
-                        "content": orig.group(3)
-                    }
-                }
-        
-        # ---------------------------
-        # RUN PYTHON
-        # ---------------------------
-        python_patterns = [
-            r"(run python|execute python|run code|python code|execute code)[: ]+(.+)"
-        ]
-        for pat in python_patterns:
-            m = re.search(pat, clause_lower, re.DOTALL)
-            if m:
-                # Extract code from original clause (preserves exact casing)
-                orig = re.search(pat, clause, re.IGNORECASE | re.DOTALL)
-                if orig:
-                    code = orig.group(2).strip()
-                    return {
-                        "type": "tool", 
-                        "name": "run_python",
-                        "kwargs": {"code": code}
-                    }
-        
-        # ---------------------------
-        # GENERATE SCAFFOLD
-        # ---------------------------
-        scaffold_patterns = [
-            r"(create|make|generate)\s+(?:a\s+)?project\s+(?:called|named)\s+([^\s]+)\s+in\s+([^\s]+)"
-        ]
-
-        for pat in scaffold_patterns:
-            m = re.search(pat, clause_lower)
-            if m:
-                return {
-                    "type": "tool", 
-                    "name": "generate_scaffold",
-                    "kwargs": {
-                        "project_name": m.group(2),
-                        "base_path": m.group(3)
-                    }
-                }
-            
-        # LOAD CSV
-        csv_patterns = [
-            r"(load|read)\s+(?:the\s+)?csv\s+file\s+([^\s]+)",
-            r"(load|read)\s+([^\s]+\.csv)"
-        ]
-        for pat in csv_patterns:
-            m = re.search(pat, clause_lower)
-            if m:
-                return {
-                    "type": "tool",
-                    "name": "load_csv",
-                    "kwargs": {"path": m.group(2)}
-                }
-            
-        # PREVIEW DATA
-        preview_patterns = [
-            r"(show|preview|display)\s+(?:the\s+)?data(?:\s+head)?",
-            r"(show|preview)\s+first\s+(\d+)\s+rows"
-        ]
-        for pat in preview_patterns:
-            m = re.search(pat, clause_lower)
-            if m:
-                n = 5
-                if len(m.groups()) >= 2 and m.group(2).isdigit():
-                    n = int(m.group(2))
-                return {
-                    "type": "tool",
-                    "name": "preview_data",
-                    "kwargs": {"n": n}
-                }
-            
-        # DESCRIBE DATA
-        describe_patterns = [
-            r"(describe|summarize)\s+(?:the\s+)?data",
-            r"data\s+summary"
-        ]
-        for pat in describe_patterns:
-            m = re.search(pat, clause_lower)
-            if m:
-                return {
-                    "type": "tool",
-                    "name": "describe_data",
-                    "kwargs": {}
-                }
-            
-        # COLUMN INFO
-        colinfo_patterns = [
-            r"(show|list)\s+(?:the\s+)?columns",
-            r"(column|columns)\s+info"
-        ]
-
-        for pat in colinfo_patterns:
-            m = re.search(pat, clause_lower)
-            if m:
-                return {
-                    "type": "tool",
-                    "name": "column_info",
-                    "kwargs": {}
-                }
-            
-        # TRAIN/TEST SPLIT
-        split_patterns = [
-            r"(split|train test split|train\/test)\s+data",
-            r"split\s+the\s+data"
-        ]
-        for pat in split_patterns:
-            m = re.search(pat, clause_lower)
-            if m:
-                return {
-                    "type": "tool",
-                    "name": "split_data",
-                    "kwargs": {}
-                }
-            
-        encode_patterns = [
-            r"(encode|transform)\s+(categorical|categoricals|categories)",
-            r"encode\s+categoricals"
-        ]
-        for pat in encode_patterns:
-            m = re.search(pat, clause_lower)
-            if m:
-                return {
-                    "type": "tool",
-                    "name": "encode_categoricals",
-                    "kwargs": {}
-                }
-            
-        scale_patterns = [
-            r"(scale|standardize|normalize)\s+(numerical|numeric|numbers)",
-            r"scale\s+numerical"
-        ]
-        for pat in scale_patterns:
-            m = re.search(pat, clause_lower)
-            if m:
-                return {
-                    "type": "tool",
-                    "name": "scale_numericals",
-                    "kwargs": {}
-                }
-            
-        save_patterns = [
-            r"(save|export)\s+(?:the\s+)?dataframe\s+to\s+([^\s]+)",
-        ]
-        for pat in save_patterns:
-            m = re.search(pat, clause_lower)
-            if m:
-                return {
-                    "type": "tool",
-                    "name": "save_dataframe",
-                    "kwargs": {"path": m.group(2)}
-                }
-        
         # ---------------------------
         # DEFAULT -> LLM
         # ---------------------------
         return {"type": "llm", "input": clause}
 
+    def _memory_hints(self, user_input: str, plan):
+        """
+        Phrase / NEAR hints for memory recall: quoted text is a phrase, and
+        each detected tool should appear near its path argument (episodic
+        memories read "Ran tool 'load_csv' with args={'path': ...}").
+        """
+        phrases = re.findall(r'"([^"]+)"', user_input)
+        near = []
+        for step in plan:
+            if step["type"] != "tool":
+                continue
+            phrases.append(step["name"])
+            path = step["kwargs"].get("path")
+            if path:
+                near.append((step["name"], path))
+        return QueryHints(phrases=tuple(dict.fromkeys(phrases)), near=tuple(near))
+
     def create_plan(self, user_input: str):
         """
         Multi-step NL -> full sequential tool plan
         """
-        clauses = self._split_into_steps(user_input)
-        plan = [self._detect_single_intent(c) for c in clauses]
+        with metrics.stage(metrics.PLAN):
+            plan = self.plan_cache.get(user_input) if self.plan_cache else None
+            if plan is None:
+                clauses = self._split_into_steps(user_input)
+                # each step also records its state reads/writes and dependencies
+                plan = dag.annotate([self._detect_single_intent(c) for c in clauses])
+                if plan and self.plan_cache:
+                    self.plan_cache.put(user_input, plan)
 
         # Fallback
         if not plan:
@@ -240,11 +265,16 @@ class Planner:
         # =====================================================
         mem_ctx = ""
         if self.memory:
-            mem_ctx = self.memory.context(task=user_input, token_budget_chars=2400)
+            with metrics.stage(metrics.MEMORY_CONTEXT):
+                mem_ctx = self.memory.context(task=user_input, token_budget_chars=2400,
+                                              hints=self._memory_hints(user_input, plan))
 
         return {
             "plan": plan,
             "memory_context": mem_ctx
         }
 
+    def plan_cache_stats(self) -> Dict[str, float]:
+        return self.plan_cache.stats() if self.plan_cache else {}
+
     
@@ -0,0 +1,166 @@
+"""
+LLM backends behind AgentCore: the interface, and an offline fake for CI
+and benchmarks (the OpenAI one lives in core.py, next to its shared clients)
+"""
+
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Tuple
+
+_LATENCY_DISTS = ("fixed", "uniform", "lognormal")
+
+# what Executor's combined llm requests look like (see executor._batch_prompt)
+_BATCH_HEADER = "Answer each numbered request"
+_BATCH_ITEM = re.compile(r"^(\d+)\. (.*)$", re.MULTILINE)
+
+_VOCAB = ("the", "model", "data", "feature", "train", "test", "split", "score", "loss",
+          "a", "of", "to", "is", "and", "validation", "accuracy", "baseline", "column",
+          "value", "each", "fold", "error", "we", "can", "use", "with", "more", "less")
+
+
+class ProviderUnavailable(Exception):
+    """Transient backend failure (overload, dropped connection); worth a retry."""
+
+
+class LLMProvider(ABC):
+    """
+    What AgentCore needs from a backend: complete(). `params` are the extra
+    request parameters (temperature, ...). stream() and acomplete() fall
+    back to complete(); acomplete() gets the AsyncLLMPool the call runs
+    under and the seconds left before its deadline.
+    """
+
+    @abstractmethod
+    def complete(self, model: str, prompt: str, **params) -> str:
+        ...
+
+    def stream(self, model: str, prompt: str, **params) -> Iterator[str]:
+        yield self.complete(model, prompt, **params)
+
+    async def acomplete(self, model: str, prompt: str, *, pool=None, timeout=None, **params) -> str:
+        return await asyncio.to_thread(self.complete, model, prompt, **params)
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic local backend: no network, no API key. Each call waits a
+    time to first token drawn from `latency` ("fixed", "uniform" within
+    +-spread, or "lognormal" with sigma=spread; latency_ms is the median),
+    then emits its tokens at tokens_per_sec (0 = all at once), and fails
+    with ProviderUnavailable at failure_rate. Latency, answer and failure
+    depend only on seed, model, prompt and how often that prompt was sent
+    before, so a replay is identical however calls interleave; a retry
+    of a failed prompt rolls again.
+    """
+
+    def __init__(self, *, seed: int = 0, latency_ms: float = 200.0, latency: str = "lognormal",
+                 spread: float = 0.5, tokens_per_sec: float = 80.0,
+                 answer_tokens: Tuple[int, int] = (20, 60), failure_rate: float = 0.0):
+        if latency not in _LATENCY_DISTS:
+            raise ValueError(f"Unknown latency distribution '{latency}' (expected one of {_LATENCY_DISTS})")
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.latency = latency
+        self.spread = spread
+        self.tokens_per_sec = tokens_per_sec
+        self.answer_tokens = answer_tokens
+        self.failure_rate = failure_rate
+        self._lock = threading.Lock()
+        self._sent: Dict[str, int] = {}
+        self.calls = 0
+        self.failures = 0
+        self.tokens = 0
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "FakeProvider":
+        """"latency_ms=50,tokens_per_sec=0,failure_rate=0.1" -> FakeProvider(...)."""
+        kwargs = {}
+        for item in filter(None, (s.strip() for s in spec.split(","))):
+            name, _, value = item.partition("=")
+            name = name.strip()
+            if name == "latency":
+                kwargs[name] = value.strip()
+            elif name == "answer_tokens":
+                lo, _, hi = value.partition("-")
+                kwargs[name] = (int(lo), int(hi or lo))
+            elif name == "seed":
+                kwargs[name] = int(value)
+            else:
+                kwargs[name] = float(value)
+        return cls(**kwargs)
+
+    # ---------- one call ----------
+    def _roll(self, model: str, prompt: str):
+        """(seconds to first token, tokens, failed) for this call."""
+        digest = hashlib.sha256(f"{self.seed}\0{model}\0{prompt}".encode("utf-8")).hexdigest()
+        with self._lock:
+            attempt = self._sent.get(digest, 0)
+            self._sent[digest] = attempt + 1
+            self.calls += 1
+        rng = random.Random(f"{digest}:{attempt}")
+        failed = rng.random() < self.failure_rate
+        if self.latency == "fixed":
+            first = self.latency_ms
+        elif self.latency == "uniform":
+            first = self.latency_ms * rng.uniform(1 - self.spread, 1 + self.spread)
+        else:
+            first = self.latency_ms * math.exp(rng.gauss(0, self.spread))
+        tokens = self._answer(prompt, rng)
+        with self._lock:
+            self.failures += failed
+            self.tokens += 0 if failed else len(tokens)
+        return max(first, 0.0) / 1000, tokens, failed
+
+    def _answer(self, prompt: str, rng: random.Random) -> List[str]:
+        if prompt.startswith(_BATCH_HEADER):
+            # one JSON object with an answer per numbered request
+            answers = {n: "".join(self._words(rng)).strip() for n, _ in _BATCH_ITEM.findall(prompt)}
+            return [json.dumps(answers)]
+        return self._words(rng)
+
+    def _words(self, rng: random.Random) -> List[str]:
+        n = rng.randint(*self.answer_tokens)
+        return [(" " if i else "") + rng.choice(_VOCAB) for i in range(n)]
+
+    def _per_token(self) -> float:
+        return 1 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+
+    def _fail(self):
+        return ProviderUnavailable("fake provider: injected failure")
+
+    # ---------- LLMProvider ----------
+    def complete(self, model: str, prompt: str, **params) -> str:
+        first, tokens, failed = self._roll(model, prompt)
+        time.sleep(first)
+        if failed:
+            raise self._fail()
+        time.sleep(self._per_token() * len(tokens))
+        return "".join(tokens)
+
+    def stream(self, model: str, prompt: str, **params) -> Iterator[str]:
+        first, tokens, failed = self._roll(model, prompt)
+        time.sleep(first)
+        if failed:
+            raise self._fail()
+        for token in tokens:
+            time.sleep(self._per_token())
+            yield token
+
+    async def acomplete(self, model: str, prompt: str, *, pool=None, timeout=None, **params) -> str:
+        first, tokens, failed = self._roll(model, prompt)
+        await asyncio.sleep(first)
+        if failed:
+            raise self._fail()
+        await asyncio.sleep(self._per_token() * len(tokens))
+        return "".join(tokens)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {"calls": self.calls, "failures": self.failures, "tokens": self.tokens}
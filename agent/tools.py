@@ -2,16 +2,25 @@
 Tool registry and routing logic
 """
 
+import inspect
+
+
 class ToolRegistry:
     def __init__(self):
         self.tools = {}
         self.state= {} # shared memory for tools (df, splits, scaler, etc)
+        self._stateful = set() # tools whose first parameter is `state`
 
     def register(self, name: str, tool_fn):
         """
         Add a new tool function by name.
         """
         self.tools[name] = tool_fn
+        params = list(inspect.signature(tool_fn).parameters)
+        if params and params[0] == "state":
+            self._stateful.add(name)
+        else:
+            self._stateful.discard(name)
 
     def call(self, name: str, **kwargs):
         """
@@ -21,4 +30,6 @@ class ToolRegistry:
         if tool_fn is None:
             raise ValueError(f"Tool '{name}' is not registered")
         
-        return tool_fn(self.state, **kwargs)
\ No newline at end of file
+        if name in self._stateful:
+            return tool_fn(self.state, **kwargs)
+        return tool_fn(**kwargs)
@@ -5,15 +5,23 @@ Exposes endoints to interact with the agent or trigger ML operations
 """
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.openapi.utils import get_openapi
 from typing import Optional
 from pydantic import BaseModel, Field
-from agent.agent import Agent
+from agent.agent import Agent, default_router
+from agent.core import shared_async_pool
+from agent.llm_cache import ResponseCache
 from tools import ml_tools
 from tools.feature_tools import encode_categoricals, scale_numericals
 import pandas as pd
+import asyncio
+import json
 import os
+import threading
+import time
 import uvicorn
+from collections import OrderedDict
 
 
 # -----------------------------------------------------
@@ -41,7 +49,94 @@ app = FastAPI(
     },
 )
 
-bot = Agent() # initialize your agent once at startup
+# optional on-disk LLM response cache shared by every agent (MLE_AGENT_LLM_CACHE=<path>)
+llm_cache = ResponseCache(os.environ["MLE_AGENT_LLM_CACHE"]) if os.environ.get("MLE_AGENT_LLM_CACHE") else None
+
+bot = Agent(llm_cache=llm_cache) # initialize your agent once at startup
+
+
+class AgentPool:
+    """
+    One agent per (tenant, session), each routed to its own memory shard.
+    Tenant and session come from the client, so the pool is bounded: past
+    `max_agents`, or after `idle_seconds` unused, an agent nobody is using
+    is closed together with its shard. The default agent is never evicted.
+    """
+
+    def __init__(self, default: Agent, max_agents: int = 64, idle_seconds: float = 900.0):
+        self.max_agents = max_agents
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        # key -> [agent, last used (monotonic), requests using it]; LRU order
+        self._agents: "OrderedDict[tuple, list]" = OrderedDict({("default", None): [default, time.monotonic(), 0]})
+
+    def acquire(self, tenant: Optional[str], session: Optional[str]) -> Agent:
+        """The agent for this key, built if needed (blocking: opens SQLite). Pair with release()."""
+        key = (tenant or "default", session)
+        with self._lock:
+            entry = self._lookup(key)
+        if entry is None:
+            agent = Agent(tenant=key[0], session=session, llm_cache=llm_cache)
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is None:
+                    entry = self._agents[key] = [agent, time.monotonic(), 1]
+                    self._evict()
+                else:
+                    agent.close()  # a racing request built it first; the shard is shared
+        return entry[0]
+
+    def _lookup(self, key):
+        entry = self._agents.get(key)
+        if entry is not None:
+            self._agents.move_to_end(key)
+            entry[1] = time.monotonic()
+            entry[2] += 1
+        return entry
+
+    def release(self, agent: Agent) -> None:
+        with self._lock:
+            entry = self._agents.get((agent.tenant, agent.session))
+            if entry is not None and entry[0] is agent:
+                entry[1] = time.monotonic()
+                entry[2] -= 1
+
+    def _evict(self) -> None:
+        # under self._lock, so a key is never rebuilt while its shard is closing
+        now = time.monotonic()
+        for key, (agent, last_used, active) in list(self._agents.items()):
+            if len(self._agents) <= self.max_agents and now - last_used < self.idle_seconds:
+                break  # LRU order: everything after this is newer
+            if active or key == ("default", None):
+                continue
+            del self._agents[key]
+            agent.close()
+            default_router().close(agent.tenant, agent.session)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._agents)
+
+    def close(self) -> None:
+        with self._lock:
+            agents, self._agents = [entry[0] for entry in self._agents.values()], OrderedDict()
+        for agent in agents:
+            agent.close()
+
+
+agents = AgentPool(bot, max_agents=int(os.environ.get("MLE_AGENT_MAX_AGENTS", "64")),
+                   idle_seconds=float(os.environ.get("MLE_AGENT_IDLE_SECONDS", "900")))
+
+
+@app.on_event("shutdown")
+async def shutdown_agent():
+    agents.close()
+    # close pooled memory connections of every shard cleanly
+    default_router().close()
+    if llm_cache is not None:
+        llm_cache.close()
+    await shared_async_pool().aclose()
+
 
 # -----------------------------------------------------
 # Request models
@@ -51,6 +146,8 @@ class QueryRequest(BaseModel):
         ...,
         example="Explain the difference between classification and regression in machine learning."
     )
+    tenant: Optional[str] = Field(None, example="acme", description="Memory shard to use (default: shared 'default').")
+    session: Optional[str] = Field(None, description="Optional per-session shard within the tenant.")
 
     class Config:
         schema_extra = {
@@ -69,15 +166,69 @@ def root():
 
 
 @app.post("/agent/query")
-def run_agent(request: QueryRequest):
+async def run_agent(request: QueryRequest):
     """
     Accepts a natural-language query and returns the agent's response.
+    Runs on the event loop (Agent.arun_detailed), so concurrent queries
+    don't each hold a worker thread while waiting on the LLM.
     """
+    # building an agent opens (and may migrate) its shard: keep it off the loop
+    agent = await asyncio.to_thread(agents.acquire, request.tenant, request.session)
     try:
-        result = bot.run(request.query)
-        return {"query": request.query, "response": result}
+        result = await agent.arun_detailed(request.query)
+        return {
+            "query": request.query,
+            "response": result.output,
+            "refinement": result.refinement(),
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        agents.release(agent)
+
+
+class _LeasedStream(StreamingResponse):
+    """
+    StreamingResponse that hands its agent back to the pool once the
+    response is over, however it ends: fully streamed, client gone, an
+    error, or a body that was never iterated.
+    """
+
+    def __init__(self, agent: Agent, content, **kwargs):
+        super().__init__(content, **kwargs)
+        self.agent = agent
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            agents.release(self.agent)
+
+
+def _ndjson(events):
+    for event in events:
+        yield json.dumps(event, default=str) + "\n"
+
+
+def _sse(events):
+    for event in events:
+        yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@app.post("/agent/query/stream")
+def stream_agent(request: QueryRequest, format: str = "ndjson"):
+    """
+    Same as /agent/query, streamed as the plan runs: one event per step
+    start, tool output and LLM text delta, then a final "done" event.
+    format=ndjson (one JSON object per line) or format=sse (Server-Sent Events).
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    agent = agents.acquire(request.tenant, request.session)  # sync endpoint: runs on a worker thread
+    events = agent.stream(request.query)
+    if format == "sse":
+        return _LeasedStream(agent, _sse(events), media_type="text/event-stream")
+    return _LeasedStream(agent, _ndjson(events), media_type="application/x-ndjson")
     
 
 # -----------------------------------------------------
@@ -0,0 +1,260 @@
+"""
+Benchmark - end-to-end agent, offline
+-------------------------------------
+Replays a corpus of natural-language commands (a built-in mix of CSV/EDA
+tool chains, file and python steps and standalone questions, or one
+command per line from --corpus) through:
+
+  run     Agent.run(), one command at a time
+  arun    Agent.arun(), --concurrency commands in flight on one event loop
+  http    POST /agent/query (FastAPI TestClient), from --concurrency threads
+
+with every LLM call answered by agent.providers.FakeProvider (seeded
+latency distribution, token rate, failure injection), so it needs no
+network and no API key. Memory shards, data files and tool output go to
+a scratch directory. Per mode it measures:
+
+  throughput   commands/s, errors (and a few of their messages)
+  command_ms   end-to-end latency per command
+  stages       plan, memory_context, tool and llm latency (agent.metrics)
+  memory       RSS before/after, peak RSS, and peak Python heap (--tracemalloc)
+
+Results are printed (or written with --out) as one JSON document so runs can
+be diffed across versions. Exits non-zero if a command failed while no
+failures were injected.
+
+Usage: python scripts/bench_agent.py [--repeat 3] [--concurrency 8] [--latency-ms 50]
+           [--latency lognormal] [--spread 0.5] [--tokens-per-sec 200] [--failure-rate 0]
+           [--refine off] [--modes run,arun,http] [--corpus FILE] [--tracemalloc]
+           [--out results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)  # the run happens in a scratch cwd
+
+from agent import metrics
+from agent.agent import Agent
+from agent.core import default_provider, shared_async_pool
+from agent.memory.router import MemoryRouter
+
+CORPUS = [
+    "load bench.csv and then show first 10 rows, then describe the data",
+    "load bench.csv and list the columns, then encode categoricals and then scale numericals",
+    "load bench.csv and then split the data, next what is a good baseline model for this?",
+    "what is cross validation, then what is bagging and then compare them",
+    "explain the difference between classification and regression",
+    "write this to file notes/summary.txt: baseline accuracy 0.81, then read file notes/summary.txt",
+    "run python: print(sum(range(1000))) and then explain the output",
+    "load bench.csv and then save the dataframe to bench_copy.csv",
+    "read file notes/summary.txt and then summarize it",
+    "how do I choose the number of trees in a random forest?",
+]
+
+COMMAND = "command"  # end-to-end sample name in the StageTimings
+
+
+def write_dataset(path: str, rows: int, rng: random.Random) -> None:
+    with open(path, "w") as f:
+        f.write("age,income,plan,region,tenure,churn\n")
+        for _ in range(rows):
+            f.write(f"{rng.randint(18, 80)},{rng.randint(20, 200) * 1000},"
+                    f"{rng.choice(['basic', 'plus', 'pro'])},{rng.choice(['north', 'south', 'east', 'west'])},"
+                    f"{rng.randint(0, 72)},{rng.random() < 0.3:d}\n")
+
+
+def load_corpus(path):
+    if not path:
+        return list(CORPUS)
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024, 1)  # bytes vs KiB
+
+
+def git_version() -> str:
+    try:
+        return subprocess.run(["git", "-C", REPO, "describe", "--always", "--dirty"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+# ---------- modes: each replays the commands, returns the errors ----------
+def replay_run(agent, commands, concurrency, timings):
+    errors = []
+    for command in commands:
+        start = time.perf_counter()
+        try:
+            agent.run(command)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        timings.record(COMMAND, time.perf_counter() - start)
+    return errors
+
+
+def replay_arun(agent, commands, concurrency, timings):
+    async def main():
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one(command):
+            async with gate:
+                start = time.perf_counter()
+                try:
+                    await agent.arun(command)
+                except Exception as e:
+                    return f"{type(e).__name__}: {e}"
+                finally:
+                    timings.record(COMMAND, time.perf_counter() - start)
+
+        return [e for e in await asyncio.gather(*(one(c) for c in commands)) if e]
+
+    return asyncio.run(main())
+
+
+def replay_http(client, commands, concurrency, timings):
+    def one(command):
+        start = time.perf_counter()
+        try:
+            resp = client.post("/agent/query", json={"query": command})
+        finally:
+            timings.record(COMMAND, time.perf_counter() - start)
+        return None if resp.status_code == 200 else f"HTTP {resp.status_code}: {resp.text}"
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return [e for e in pool.map(one, commands) if e]
+
+
+def measure(name, replay, target, commands, args) -> dict:
+    before = rss_mb()
+    if args.tracemalloc:
+        tracemalloc.start()
+    timings = metrics.collect()
+    start = time.perf_counter()
+    errors = replay(target, commands, 1 if name == "run" else args.concurrency, timings)
+    elapsed = time.perf_counter() - start
+    metrics.stop()
+    memory = {"rss_before_mb": before, "rss_after_mb": rss_mb(), "peak_rss_mb": peak_rss_mb()}
+    if args.tracemalloc:
+        memory["py_heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        tracemalloc.stop()
+
+    stages = timings.summary()
+    return {
+        "commands": len(commands),
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:3],
+        "seconds": round(elapsed, 3),
+        "commands_per_s": round(len(commands) / elapsed, 2),
+        "command_ms": stages.pop(COMMAND),
+        "stages": stages,
+        "memory": memory,
+    }
+
+
+def run(args) -> dict:
+    commands = load_corpus(args.corpus) * args.repeat
+    spec = (f"seed={args.seed},latency_ms={args.latency_ms},latency={args.latency},spread={args.spread},"
+            f"tokens_per_sec={args.tokens_per_sec},failure_rate={args.failure_rate}")
+    # every agent below, the app's included, gets this one FakeProvider
+    os.environ["MLE_AGENT_LLM_PROVIDER"] = "fake:" + spec
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(modes) - {"run", "arun", "http"}
+    if unknown:
+        raise SystemExit(f"unknown modes {sorted(unknown)} (expected run, arun, http)")
+    result = {
+        "version": git_version(),
+        "python": platform.python_version(),
+        "config": {"commands": len(commands), "repeat": args.repeat, "concurrency": args.concurrency,
+                   "refine": args.refine, "provider": "fake:" + spec, "modes": modes},
+        "modes": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        write_dataset("bench.csv", args.rows, random.Random(args.seed))
+        provider = default_provider()
+        for name in modes:
+            pool_retries = shared_async_pool().retries
+            if name == "http":
+                import app as api  # builds its agents now, on the fake provider
+                from fastapi.testclient import TestClient
+
+                api.bot.refine = args.refine
+                with TestClient(api.app) as client:  # one event loop for every request
+                    result["modes"][name] = measure(name, replay_http, client, commands, args)
+                core = api.bot.core
+            else:
+                router = MemoryRouter(os.path.join(tmp, f"memory_{name}"), write_behind=True, consolidate=True)
+                agent = Agent(router=router, refine=args.refine, provider=provider)
+                replay = replay_run if name == "run" else replay_arun
+                result["modes"][name] = measure(name, replay, agent, commands, args)
+                router.close()
+                core = agent.core
+            result["modes"][name]["llm_retries"] = core.retries + shared_async_pool().retries - pool_retries
+        result["provider"] = provider.stats()
+        os.chdir(REPO)  # before the scratch directory goes
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="end-to-end agent benchmark (offline, fake LLM)")
+    parser.add_argument("--repeat", type=int, default=3, help="replays of the corpus per mode")
+    parser.add_argument("--concurrency", type=int, default=8, help="commands in flight (arun, http)")
+    parser.add_argument("--modes", default="run,arun,http")
+    parser.add_argument("--corpus", help="file with one command per line (# comments)")
+    parser.add_argument("--rows", type=int, default=2000, help="rows in the synthetic bench.csv")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="median time to first token")
+    parser.add_argument("--latency", default="lognormal", choices=("fixed", "uniform", "lognormal"))
+    parser.add_argument("--spread", type=float, default=0.5, help="uniform +-fraction / lognormal sigma")
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0, help="0 = whole answer at once")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="injected transient failures")
+    parser.add_argument("--refine", default="off", choices=("off", "llm_steps", "speculative"))
+    parser.add_argument("--tracemalloc", action="store_true", help="also trace the Python heap (slower)")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+    # the run chdirs to a scratch directory
+    args.corpus = args.corpus and os.path.abspath(args.corpus)
+    args.out = args.out and os.path.abspath(args.out)
+
+    result = run(args)
+    doc = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(doc + "\n")
+        print(f"wrote {args.out}", file=sys.stderr)
+    else:
+        print(doc)
+    if not args.failure_rate and any(m["errors"] for m in result["modes"].values()):
+        sys.exit(1)
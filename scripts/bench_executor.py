@@ -0,0 +1,86 @@
+"""
+Benchmark - sequential vs dependency-aware parallel step execution
+------------------------------------------------------------------
+Plans multi-clause commands with the real Planner and runs them through
+Executor with max_workers=1 (plan order) and max_workers=N (independent
+steps overlap). Tools and the LLM are stand-ins that sleep for a fixed
+time, like file / network I/O would, and record what they read so the
+two runs can be checked for identical results.
+
+Usage: python scripts/bench_executor.py [step_ms] [workers]
+"""
+
+import sys
+import time
+
+from agent.executor import Executor
+from agent.planner import Planner
+from agent.tools import ToolRegistry
+
+COMMANDS = [
+    "read file a.txt and read file b.txt and read file c.txt and then run python: print(1)",
+    "load data/x.csv and then show first 10 rows, then describe the data and then list the columns",
+    "load data/x.csv and then split the data, next what is a good baseline model?",
+    "read file notes.md and write this to file out.txt: done, then read file out.txt",
+]
+
+
+class SleepCore:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def generate(self, prompt: str) -> str:
+        time.sleep(self.delay)
+        return f"answer({len(prompt)})"
+
+
+def registry(delay: float) -> ToolRegistry:
+    tools = ToolRegistry()
+
+    def stateful(name):
+        def tool(state, **kwargs):
+            time.sleep(delay)
+            state[name] = state.get("df")
+            if name == "load_csv":
+                state["df"] = kwargs["path"]
+            return f"{name}:{state.get('df')}:{sorted(kwargs.items())}"
+        return tool
+
+    def stateless(name):
+        def tool(**kwargs):
+            time.sleep(delay)
+            return f"{name}:{sorted(kwargs.items())}"
+        return tool
+
+    for name in ("load_csv", "preview_data", "describe_data", "column_info", "split_data"):
+        tools.register(name, stateful(name))
+    for name in ("read_file", "write_file", "run_python"):
+        tools.register(name, stateless(name))
+    return tools
+
+
+def run(plans, delay: float, workers: int):
+    ex = Executor(SleepCore(delay), registry(delay), max_workers=workers)
+    start = time.perf_counter()
+    outputs = [ex.execute_steps(plan) for plan in plans]
+    elapsed = time.perf_counter() - start
+    ex.close()
+    return elapsed, outputs
+
+
+if __name__ == "__main__":
+    delay = (float(sys.argv[1]) if len(sys.argv) > 1 else 50.0) / 1000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    planner = Planner()
+    plans = [planner.create_plan(c)["plan"] for c in COMMANDS]
+
+    seq, seq_out = run(plans, delay, 1)
+    par, par_out = run(plans, delay, workers)
+    assert seq_out == par_out, (seq_out, par_out)
+    for cmd, plan in zip(COMMANDS, plans):
+        depth = {}
+        for i, step in enumerate(plan):
+            depth[i] = 1 + max((depth[j] for j in step["after"]), default=0)
+        print(f"{len(plan)} steps, critical path {max(depth.values())}: {cmd[:60]}")
+    print(f"sequential     {seq * 1000:8.1f} ms")
+    print(f"parallel x{workers:<3}  {par * 1000:8.1f} ms  ({seq / par:.1f}x)")
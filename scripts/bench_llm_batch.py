@@ -0,0 +1,101 @@
+"""
+Benchmark - runs of independent llm steps: serial vs fan-out vs combined
+------------------------------------------------------------------------
+Plans a command of several standalone questions (plus one that refers
+back, which has to wait) and executes it with:
+
+  serial     max_workers=1, one request per step in plan order
+  parallel   independent llm steps fanned out concurrently
+  combined   one numbered multi-part request per run, answers split back
+
+against a fake core whose requests take a fixed latency. Reports wall
+time and round trips (sync and async paths), and checks every step got
+its own answer and memory record.
+
+Usage: python scripts/bench_llm_batch.py [latency_ms]
+"""
+
+import asyncio
+import json
+import re
+import sys
+import threading
+import time
+
+from agent.executor import Executor
+from agent.planner import Planner
+from agent.tools import ToolRegistry
+
+COMMAND = ("what is cross validation, then what is bagging, then what is boosting "
+           "and then what is early stopping, then compare them")
+
+
+class FakeCore:
+    """Answers "A<question>"; a combined prompt gets a JSON object of answers."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _answer(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+        if prompt.startswith("Answer each numbered request"):
+            items = re.findall(r"^(\d+)\. (.*)$", prompt, re.MULTILINE)
+            return json.dumps({n: f"A<{q}>" for n, q in items})
+        return f"A<{prompt.splitlines()[0]}>"
+
+    def generate(self, prompt: str) -> str:
+        time.sleep(self.latency)
+        return self._answer(prompt)
+
+    def stream(self, prompt: str):
+        yield self.generate(prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        await asyncio.sleep(self.latency)
+        return self._answer(prompt)
+
+
+class CountingMemory:
+    def __init__(self):
+        self.records = []
+
+    def remember(self, **kw):
+        self.records.append(kw["text"])
+
+    async def aremember(self, **kw):
+        self.remember(**kw)
+
+
+def run(plan, latency, workers, mode, use_async):
+    core, memory = FakeCore(latency), CountingMemory()
+    ex = Executor(core, ToolRegistry(), memory=memory, max_workers=workers, llm_batch=mode)
+    results = {}
+    # capture each step's answer through the streaming events
+    emit = lambda e: e["event"] == "llm_delta" and results.__setitem__(e["step"], e["delta"])
+    start = time.perf_counter()
+    if use_async:
+        last = asyncio.run(ex.aexecute_steps(plan))
+    else:
+        last = ex.execute_steps(plan, emit=emit if mode == "combined" else None)
+    elapsed = time.perf_counter() - start
+    ex.close()
+    assert len(memory.records) == len(plan), memory.records
+    return elapsed, core.calls, last, results
+
+
+if __name__ == "__main__":
+    latency = (float(sys.argv[1]) if len(sys.argv) > 1 else 200.0) / 1000
+    plan = Planner(cache_size=0).create_plan(COMMAND)["plan"]
+    print("steps:", [(s["input"], s["after"]) for s in plan])
+
+    for use_async in (False, True):
+        for name, workers, mode in (("serial", 1, "parallel"), ("parallel", 4, "parallel"),
+                                    ("combined", 4, "combined")):
+            elapsed, calls, last, per_step = run(plan, latency, workers, mode, use_async)
+            if per_step:
+                assert all(per_step[i] == f"A<{plan[i]['input']}>" for i in range(4)), per_step
+            print(f"{'async' if use_async else 'sync':<5} {name:<9} {elapsed * 1000:7.1f} ms  "
+                  f"{calls} round trips  last: {last[:40]}")
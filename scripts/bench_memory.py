@@ -0,0 +1,202 @@
+"""
+Benchmark suite - agent.memory
+------------------------------
+Reproducible, offline benchmark of SQLiteMemoryStore / MemoryModule on a
+synthetic corpus of episodic (tool runs, LLM answers) and semantic (facts,
+preferences) memories. Measures:
+
+  insert      remember() rows/s (synchronous and write-behind), insert_many() rows/s
+  recall      p50 / p95 / p99 ms
+  context     p50 / p95 / p99 ms, uncached and cached
+  maintenance decay() and prune() seconds
+  db_size     bytes on disk (database + WAL + vector files)
+
+Results are printed (or written with --out) as one JSON document so runs can
+be diffed across versions.
+
+Usage: python scripts/bench_memory.py [--size 10000] [--queries 200] [--seed 7]
+           [--vector] [--consolidate] [--out results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from agent.memory.models import Memory
+from agent.memory.module import MemoryModule
+
+TOOLS = ["load_csv", "preview_data", "describe_data", "column_info", "split_data",
+         "encode_categoricals", "scale_numericals", "train_model", "evaluate_model",
+         "save_model", "run_python", "read_file", "write_file"]
+DATASETS = ["telco", "churn", "housing", "titanic", "iris", "credit", "sales", "weather"]
+MODELS = ["logistic", "xgboost", "random_forest", "svm", "lightgbm", "mlp"]
+FACTS = [
+    "The {d} dataset label column is {c}",
+    "User prefers {m} models for {d}",
+    "Project deploys to docker with the {m} pipeline",
+    "The {d} data has missing values in {c}",
+    "Always scale numerical features before training {m}",
+]
+COLUMNS = ["Churn", "price", "Survived", "species", "default", "revenue", "tenure", "target"]
+QUERIES = [
+    "load the {d} csv and train a {m} model",
+    "what label column does {d} use",
+    "how did {m} do on {d}",
+    "preview the {d} data",
+    "which model does the user prefer",
+    "docker deploy pipeline",
+    "missing values in {c}",
+]
+
+
+def synthetic(n: int, rng: random.Random):
+    """n memories, ~80% episodic / 20% semantic, spread over the last 90 days."""
+    now = datetime.utcnow()
+    for i in range(n):
+        d, m, c = rng.choice(DATASETS), rng.choice(MODELS), rng.choice(COLUMNS)
+        ts = now - timedelta(seconds=rng.randrange(90 * 24 * 3600))
+        if rng.random() < 0.8:
+            if rng.random() < 0.7:
+                tool = rng.choice(TOOLS)
+                ok = rng.random() < 0.9
+                text = (f"Ran tool '{tool}' with args={{'path': 'data/{d}/{d}_{i % 97}.csv'}}. "
+                        f"Result: {'ok' if ok else 'failed'} ({m})")
+                yield Memory(id=None, kind="episodic", text=text, tags=["tool", tool],
+                             summary=f"{tool} {'ok' if ok else 'failed'}",
+                             importance=0.4 if ok else 0.7, created_at=ts, last_accessed_at=ts)
+            else:
+                yield Memory(id=None, kind="episodic", tags=["llm"], summary="LLM response",
+                             text=f"LLM responded to prompt. Output: {m} on {d} scored {rng.random():.3f}",
+                             importance=0.3, created_at=ts, last_accessed_at=ts)
+        else:
+            tags = ["fact", d] + (["pinned"] if rng.random() < 0.01 else [])
+            yield Memory(id=None, kind="semantic", text=rng.choice(FACTS).format(d=d, m=m, c=c),
+                         tags=tags, importance=rng.uniform(0.5, 1.0), created_at=ts, last_accessed_at=ts)
+
+
+def queries(n: int, rng: random.Random):
+    return [rng.choice(QUERIES).format(d=rng.choice(DATASETS), m=rng.choice(MODELS),
+                                       c=rng.choice(COLUMNS)) for _ in range(n)]
+
+
+def percentiles(samples_ms):
+    s = sorted(samples_ms)
+    pick = lambda p: round(s[min(len(s) - 1, int(p / 100 * len(s)))], 4)
+    return {"p50": pick(50), "p95": pick(95), "p99": pick(99),
+            "mean": round(sum(s) / len(s), 4), "n": len(s)}
+
+
+def timed_calls(fn, args):
+    out = []
+    for a in args:
+        start = time.perf_counter()
+        fn(a)
+        out.append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def db_size(path: str) -> int:
+    return sum(os.path.getsize(p) for p in (path, path + "-wal", path + ".vec", path + ".vec.ids")
+               if os.path.exists(p))
+
+
+def git_version() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    corpus = list(synthetic(args.size, rng))
+    qs = queries(args.queries, rng)
+    opts = dict(vector_search=args.vector, consolidate=args.consolidate)
+    result = {
+        "version": git_version(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "config": {"size": args.size, "queries": args.queries, "seed": args.seed, **opts},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # --- insert throughput ---
+        sample = corpus[:min(len(corpus), args.remember_sample)]
+        insert = {}
+        for name, wb in (("remember_sync", False), ("remember_write_behind", True)):
+            mem = MemoryModule(os.path.join(tmp, f"{name}.db"), write_behind=wb, **opts)
+            start = time.perf_counter()
+            for m in sample:
+                mem.remember(m.text, kind=m.kind, tags=m.tags, importance=m.importance, summary=m.summary)
+            mem.flush()
+            insert[name + "_rows_per_s"] = round(len(sample) / (time.perf_counter() - start), 1)
+            mem.close()
+
+        path = os.path.join(tmp, "bench.db")
+        mem = MemoryModule(path, context_cache_size=0, **opts)
+        start = time.perf_counter()
+        for i in range(0, len(corpus), args.batch):
+            mem.store.insert_many(corpus[i:i + args.batch])
+        insert["insert_many_rows_per_s"] = round(len(corpus) / (time.perf_counter() - start), 1)
+        result["insert"] = insert
+
+        # --- reads ---
+        timed_calls(lambda q: mem.recall(q, k=6), qs[:10])  # warm-up
+        result["recall_ms"] = percentiles(timed_calls(lambda q: mem.recall(q, k=6), qs))
+        result["context_ms"] = percentiles(timed_calls(mem.context, qs))
+        mem.close()
+
+        cached = MemoryModule(path, **opts)
+        cached_qs = qs[:max(1, len(qs) // 10)] * 10  # 10% distinct tasks
+        result["context_cached_ms"] = percentiles(timed_calls(cached.context, cached_qs))
+        result["context_cached_ms"]["hit_rate"] = round(
+            cached.context_hits / max(1, cached.context_hits + cached.context_misses), 3)
+        cached.close()
+
+        # --- maintenance + size ---
+        mem = MemoryModule(path, **opts)
+        with mem.store._conn() as cx:
+            cx.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        result["db_size_bytes"] = db_size(path)
+        d = mem.decay()
+        p = mem.prune(max_items=int(args.size * args.prune_keep), drop_below=1.0)
+        result["maintenance"] = {
+            "decay_s": round(d.seconds, 4), "decay_rows": d.rows,
+            "prune_s": round(p.seconds, 4), "prune_rows": p.rows,
+        }
+        result["rows_after_prune"] = mem.store.count()
+        mem.close()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="agent.memory benchmark suite (offline)")
+    parser.add_argument("--size", type=int, default=10000, help="corpus size (rows)")
+    parser.add_argument("--queries", type=int, default=200, help="recall/context calls")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--batch", type=int, default=1000, help="insert_many batch size")
+    parser.add_argument("--remember-sample", type=int, default=1000,
+                        help="rows used for the remember() throughput runs")
+    parser.add_argument("--prune-keep", type=float, default=0.8,
+                        help="prune() down to this fraction of the corpus")
+    parser.add_argument("--vector", action="store_true", help="enable the vector index")
+    parser.add_argument("--consolidate", action="store_true", help="enable near-dup consolidation")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    doc = json.dumps(run(args), indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(doc + "\n")
+        print(f"wrote {args.out}", file=sys.stderr)
+    else:
+        print(doc)
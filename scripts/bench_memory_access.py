@@ -0,0 +1,79 @@
+"""
+Benchmark - write amplification of reads (last-access tracking)
+---------------------------------------------------------------
+Runs the same read-heavy loop of context() calls in three modes and reports
+how many bytes each appended to the WAL, plus context() latency:
+
+  legacy     synchronous UPDATE per recall, FTS update trigger on every column
+  sync       synchronous UPDATE per recall, trigger limited to text/summary/tags
+  coalesced  touches batched by AccessTracker (the default)
+
+Auto-checkpointing is disabled so the WAL size is the total written.
+
+Usage: python scripts/bench_memory_access.py [rows] [n_calls]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from agent.memory import store as store_module
+from agent.memory.models import Memory
+from agent.memory.module import MemoryModule
+
+_WORDS = ["csv", "train", "model", "docker", "split", "encode", "scale", "xgboost",
+          "churn", "preview", "columns", "deploy", "metrics", "shap", "pipeline"]
+
+# let the WAL grow so its size measures everything written
+store_module._PRAGMAS = store_module._PRAGMAS + ("PRAGMA wal_autocheckpoint=0",)
+
+
+def build(mem: MemoryModule, n: int, rng: random.Random) -> None:
+    batch = []
+    for i in range(n):
+        text = " ".join(rng.choice(_WORDS) for _ in range(12)) + f" run {i}"
+        batch.append(Memory(id=None, kind="episodic", text=text, tags=["tool"], importance=rng.random()))
+        if len(batch) == 10000:
+            mem.store.insert_many(batch)
+            batch = []
+    mem.store.insert_many(batch)
+
+
+def run(mode: str, n: int, n_calls: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_access.db")
+        mem = MemoryModule(path, context_cache_size=0,
+                           touch_interval=0 if mode != "coalesced" else 5.0)
+        if mode == "legacy":
+            with mem.store._conn() as cx:
+                cx.executescript("""
+                    DROP TRIGGER memories_au;
+                    CREATE TRIGGER memories_au AFTER UPDATE ON memories BEGIN
+                      INSERT INTO fts_memories(fts_memories, rowid, text, summary, tags)
+                      VALUES ('delete', old.id, old.text, coalesce(old.summary,''), old.tags);
+                      INSERT INTO fts_memories(rowid, text, summary, tags)
+                      VALUES (new.id, new.text, coalesce(new.summary,''), new.tags);
+                    END;""")
+        build(mem, n, random.Random(7))
+        with mem.store._conn() as cx:
+            cx.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        rng = random.Random(11)
+        start = time.perf_counter()
+        for _ in range(n_calls):
+            mem.context(" ".join(rng.sample(_WORDS, 3)))
+        elapsed = time.perf_counter() - start
+        mem.flush_access()
+        wal = os.path.getsize(path + "-wal")
+        mem.close()
+    print(f"{mode:<10} context(): {elapsed / n_calls * 1000:6.2f} ms/call  "
+          f"WAL written: {wal / 1024:9.1f} KiB ({wal / n_calls:8.0f} B/call)")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_calls = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    for mode in ("legacy", "sync", "coalesced"):
+        run(mode, n, n_calls)
@@ -0,0 +1,77 @@
+"""
+Benchmark - async memory API under concurrent queries
+-----------------------------------------------------
+Fires n_queries recall()s from one event loop, as FastAPI handlers would:
+
+  blocking   recall() called directly inside the coroutines
+  async xN   arecall() on N reader threads (N = 1 serializes reads)
+
+Reports queries/s and event-loop lag (worst delay of a 1 ms ticker while the
+queries run); the blocking variant stalls every other request on the loop.
+Parallel speed-up needs more than one core; the lag difference does not.
+
+Usage: python scripts/bench_memory_async.py [n_memories] [n_queries]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from agent.memory.models import Memory
+from agent.memory.module import MemoryModule
+
+_WORDS = [f"w{i}" for i in range(5000)]
+
+
+def build(path: str, n: int) -> None:
+    rng = random.Random(7)
+    mem = MemoryModule(path)
+    batch = [Memory(id=None, kind="episodic", text=" ".join(rng.choice(_WORDS) for _ in range(8)) + f" r{i}")
+             for i in range(n)]
+    mem.store.insert_many(batch)
+    mem.close()
+
+
+async def ticker(stop: asyncio.Event, lag: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lag.append(time.perf_counter() - start - 0.001)
+
+
+async def run(mem: MemoryModule, queries, use_async: bool):
+    stop, lag = asyncio.Event(), []
+    tick = asyncio.create_task(ticker(stop, lag))
+    await asyncio.sleep(0)
+
+    async def one(q):
+        if use_async:
+            return await mem.arecall(q, k=6)
+        return mem.recall(q, k=6)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return elapsed, max(lag) if lag else elapsed
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(11)
+    queries = [" ".join(rng.sample(_WORDS, 2)) for _ in range(n_queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_async.db")
+        build(path, n)
+        for name, readers, use_async in (("blocking", 1, False), ("async x1", 1, True),
+                                          ("async x4", 4, True), ("async x8", 8, True)):
+            mem = MemoryModule(path, context_cache_size=0, async_readers=readers)
+            elapsed, lag = asyncio.run(run(mem, queries, use_async))
+            mem.close()
+            print(f"{name:<9} {n_queries / elapsed:8.1f} queries/s   worst loop lag {lag * 1000:8.2f} ms")
@@ -0,0 +1,70 @@
+"""
+Benchmark - Near-duplicate consolidation
+----------------------------------------
+Fills a store with executor-style episodic rows (the same few tool calls
+repeated with small variations), then runs MemoryModule.consolidate() and
+reports corpus shrinkage and recall latency before/after.
+
+Usage: python scripts/bench_memory_consolidate.py [n_memories] [n_queries]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from agent.memory.models import Memory
+from agent.memory.module import MemoryModule
+
+CALLS = [
+    ("load_csv", "{'path': 'data/telco.csv'}", "CSV loaded successfully. Shape: (7043, 21)"),
+    ("describe_data", "{}", "Summary Statistics: count mean std min max"),
+    ("encode_categoricals", "{}", "Categoricals encoded. New shape: (7043, 31)"),
+    ("train_model", "{'model_type': 'logistic'}", "Model trained successfully (logistic). Accuracy: 0.80"),
+    ("read_file", "{'path': 'notes.txt'}", "File not found: notes.txt"),
+]
+QUERIES = ["load csv", "train model accuracy", "describe data", "encode categoricals", "notes file"]
+
+
+def corpus(n: int, rng: random.Random):
+    out = []
+    for i in range(n):
+        if rng.random() < 0.9:  # repeated tool calls, a little noise in the result
+            tool, args, result = rng.choice(CALLS)
+            text = f"Ran tool '{tool}' with args={args}. Result: {result} run={rng.randrange(3)}"
+        else:  # genuinely distinct memories
+            tool = "note"
+            text = f"Observation {i}: feature f{rng.randrange(10**6)} drifted by {rng.random():.3f}"
+        out.append(Memory(id=None, kind="episodic", text=text, tags=["tool", tool], importance=0.4))
+    return out
+
+
+def recall_ms(mm: MemoryModule, n_queries: int) -> float:
+    start = time.perf_counter()
+    for i in range(n_queries):
+        mm.recall(QUERIES[i % len(QUERIES)], k=6)
+    return (time.perf_counter() - start) / n_queries * 1000.0
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_consolidate.db")
+        mm = MemoryModule(path, consolidate=True, context_cache_size=0)
+        # bypass insert-time merging to reproduce an existing, unconsolidated DB
+        lsh, mm.store.consolidator = mm.store.consolidator, None
+        mm.store.insert_many(corpus(n, random.Random(11)))
+        mm.store.consolidator = lsh
+
+        before_rows, before_ms = mm.store.count(), recall_ms(mm, n_queries)
+        stats = mm.consolidate()
+        after_rows, after_ms = mm.store.count(), recall_ms(mm, n_queries)
+        size_mb = os.path.getsize(path) / 1e6
+        mm.close()
+
+    print(f"rows: {before_rows} -> {after_rows} ({100.0 * (1 - after_rows / before_rows):.1f}% smaller)")
+    print(f"consolidate(): merged {stats.rows} in {stats.batches} batches, {stats.seconds:.2f}s")
+    print(f"recall: {before_ms:.3f} -> {after_ms:.3f} ms/query   db file {size_mb:.1f} MB")
@@ -0,0 +1,134 @@
+"""
+Benchmark - FTS query compilation: latency and quality
+------------------------------------------------------
+Synthetic corpus of tool-run memories: boilerplate full of stopwords plus a
+few topic words per row. Queries are natural-language commands naming two
+topic words ("load the ... and then train the ... model"); a hit is relevant
+when its text contains both.
+
+  legacy    every token OR-ed as a prefix, stopwords included, plain bm25()
+  compiled  the store's compiler (stopwords and corpus-common terms dropped,
+            capped prefixes) and per-column bm25() weights; latency
+            includes compilation
+
+Also times 2-3 char prefix queries against the prefix='2 3' table and a copy
+of the index without prefix indexes.
+
+Usage: python scripts/bench_memory_fts.py [rows] [n_queries]
+       rows defaults to 1000000
+"""
+
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+from agent.memory.fts import DEFAULT_COLUMN_WEIGHTS
+from agent.memory.models import Memory
+from agent.memory.store import SQLiteMemoryStore
+
+_TOPICS = 500
+_WORDS_PER_TOPIC = 8
+_TEMPLATES = [
+    "Ran the tool and then loaded the data for the {a} model with the {b} and {c} columns",
+    "The user asked to train a {a} model on the {b} data and it was saved to the {c} file",
+    "After that the agent described the data and there were {a} and {b} values in {c}",
+    "It was a {a} run of the pipeline that is used for {b} before the {c} step",
+]
+_QUERY_TEMPLATES = [
+    "load the {a} data and then train the {b} model",
+    "what did we do with the {a} and the {b} last time?",
+    "show me the {a} results for {b}",
+]
+
+
+def word(topic: int, j: int) -> str:
+    return f"tp{topic}w{j}"
+
+
+def build(store: SQLiteMemoryStore, n: int, rng: random.Random) -> None:
+    batch = []
+    for i in range(n):
+        t = rng.randrange(_TOPICS)
+        a, b, c = (word(t, rng.randrange(_WORDS_PER_TOPIC)) for _ in range(3))
+        batch.append(Memory(id=None, kind="episodic", text=rng.choice(_TEMPLATES).format(a=a, b=b, c=c),
+                            tags=["tool", f"topic{t}"], importance=rng.random()))
+        if len(batch) == 10000:
+            store.insert_many(batch)
+            batch = []
+    store.insert_many(batch)
+
+
+def legacy_query(q: str) -> str:
+    # the pre-compiler sanitizer
+    tokens = re.findall(r"[A-Za-z0-9_]+", q)
+    return " OR ".join([t if len(t) < 3 else f"{t}*" for t in tokens])
+
+
+def run(cx, queries, compile_fn, rank_sql, k=8):
+    lat, prec, matched = [], [], []
+    for q, a, b in queries:
+        start = time.perf_counter()
+        expr = compile_fn(q)
+        rows = cx.execute(
+            f"SELECT m.text FROM fts_memories JOIN memories m ON m.id = fts_memories.rowid "
+            f"WHERE fts_memories MATCH ? ORDER BY {rank_sql} LIMIT ?", (expr, k)).fetchall()
+        lat.append((time.perf_counter() - start) * 1000)
+        words = [set(r[0].split()) for r in rows]
+        prec.append(sum(1 for w in words if a in w and b in w) / k)
+        matched.append(cx.execute("SELECT count(*) FROM fts_memories WHERE fts_memories MATCH ?",
+                                  (expr,)).fetchone()[0])
+    return lat, prec, matched
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def timed(cx, table, exprs):
+    lat = []
+    for expr in exprs:
+        start = time.perf_counter()
+        cx.execute(f"SELECT count(*) FROM {table} WHERE {table} MATCH ?", (expr,)).fetchone()
+        lat.append((time.perf_counter() - start) * 1000)
+    return statistics.mean(lat)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteMemoryStore(os.path.join(tmp, "bench_fts.db"))
+        start = time.perf_counter()
+        build(store, n, rng)
+        print(f"rows={n}  build {time.perf_counter() - start:.1f}s")
+
+        queries = []
+        for _ in range(n_queries):
+            t = rng.randrange(_TOPICS)
+            a, b = word(t, rng.randrange(_WORDS_PER_TOPIC)), word(t, rng.randrange(_WORDS_PER_TOPIC))
+            queries.append((rng.choice(_QUERY_TEMPLATES).format(a=a, b=b), a, b))
+
+        cx = store._conn()
+        weighted = "bm25(fts_memories, {}, {}, {})".format(*DEFAULT_COLUMN_WEIGHTS.sql_args())
+        for name, fn, rank in (("legacy", legacy_query, "bm25(fts_memories)"),
+                               ("compiled", lambda q: store._compile(q, None), weighted)):
+            lat, prec, matched = run(cx, queries, fn, rank)
+            print(f"{name:<9} p50 {pct(lat, 50):8.2f} ms  p95 {pct(lat, 95):8.2f} ms  "
+                  f"precision@8 {statistics.mean(prec):.2f}  rows matched {statistics.mean(matched):,.0f}")
+
+        # prefix index: same content, with and without prefix='2 3'
+        cx.executescript("""
+            CREATE VIRTUAL TABLE fts_noprefix USING fts5(
+                text, summary, tags, content='memories', content_rowid='id');
+            INSERT INTO fts_noprefix(fts_noprefix) VALUES ('rebuild');""")
+        short = [f'"{p}"*' for p in ("tp", "tp1", "tp2", "da", "mo", "to")]
+        print(f"short prefix count(*): prefix='2 3' {timed(cx, 'fts_memories', short):.2f} ms  "
+              f"no prefix index {timed(cx, 'fts_noprefix', short):.2f} ms")
+        store.close()
@@ -0,0 +1,93 @@
+"""
+Benchmark - row hydration cost
+------------------------------
+Compares three ways of turning a large recent() result into Python objects:
+
+  eager       sqlite3.Row -> Memory dataclass, JSON + timestamps decoded up front
+  lazy        MemoryRecord over plain tuples, decoding deferred (store default)
+  projection  MemoryRecord with columns=("id", "kind", "text", "importance")
+
+Reports time per row and the retained heap per row (tracemalloc).
+
+Usage: python scripts/bench_memory_hydration.py [rows] [repeats]
+"""
+
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from agent.memory.models import Memory, from_micros
+from agent.memory.store import SQLiteMemoryStore
+
+_PROJECTION = ("id", "kind", "text", "importance")
+
+
+def build(store: SQLiteMemoryStore, n: int, rng: random.Random) -> None:
+    now = datetime.utcnow()
+    batch = []
+    for i in range(n):
+        ts = now - timedelta(seconds=rng.randrange(30 * 24 * 3600))
+        batch.append(Memory(id=None, kind="episodic",
+                            text=f"Ran tool 'load_csv' with args={{'path': 'data/file{i}.csv'}}",
+                            tags=["tool", "load_csv", f"run{i % 50}"], importance=rng.random(),
+                            created_at=ts, last_accessed_at=ts, meta={"source": "bench", "step": str(i)}))
+        if len(batch) == 10000:
+            store.insert_many(batch)
+            batch = []
+    store.insert_many(batch)
+
+
+def eager(path: str, limit: int):
+    # the pre-MemoryRecord read path
+    cx = sqlite3.connect(path)
+    cx.row_factory = sqlite3.Row
+    rows = cx.execute("SELECT * FROM memories ORDER BY last_accessed_at DESC LIMIT ?",
+                      (limit,)).fetchall()
+    out = [Memory(id=r["id"], kind=r["kind"], text=r["text"], summary=r["summary"],
+                  tags=json.loads(r["tags"] or "[]"), importance=r["importance"],
+                  created_at=from_micros(r["created_at"]),
+                  last_accessed_at=from_micros(r["last_accessed_at"]),
+                  meta=json.loads(r["meta"] or "{}"), hits=r["hits"]) for r in rows]
+    cx.close()
+    return out
+
+
+def measure(fn, repeats: int):
+    fn()  # warm page cache / statement cache
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeats
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    kept = fn()
+    retained = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return elapsed, retained, len(kept)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_hydration.db")
+        store = SQLiteMemoryStore(path)
+        build(store, n, random.Random(7))
+
+        cases = [
+            ("eager", lambda: eager(path, n)),
+            ("lazy", lambda: store.recent(limit=n)),
+            ("projection", lambda: store.recent(limit=n, columns=_PROJECTION)),
+        ]
+        for name, fn in cases:
+            elapsed, retained, rows = measure(fn, repeats)
+            print(f"{name:<11} rows={rows:>7}  {elapsed / rows * 1e6:6.2f} us/row  "
+                  f"{retained / rows:7.1f} B/row")
+        store.close()
@@ -0,0 +1,68 @@
+"""
+Benchmark - Memory recall latency
+---------------------------------
+Compares recall latency with a fresh sqlite3 connection per call (the old
+behaviour) against the pooled per-thread connections in SQLiteMemoryStore.
+
+Usage: python scripts/bench_memory_recall.py [n_memories] [n_queries]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from agent.memory.module import MemoryModule
+from agent.memory.store import SQLiteMemoryStore
+
+
+class PerCallConnectionStore(SQLiteMemoryStore):
+    """Baseline: open a new connection for every operation."""
+
+    def _conn(self):
+        cx = sqlite3.connect(self.path, check_same_thread=False)
+        cx.row_factory = sqlite3.Row
+        return cx
+
+
+TOOLS = ["load_csv", "describe_data", "train_model", "split_data", "run_python"]
+QUERIES = ["load the csv", "train model", "describe data", "docker push", "split"]
+
+
+def seed(mm: MemoryModule, n: int) -> None:
+    for i in range(n):
+        tool = TOOLS[i % len(TOOLS)]
+        mm.remember(f"Ran tool '{tool}' with args={{'i': {i}}}. Result: ok",
+                    tags=["tool", tool], importance=0.4)
+
+
+def bench(store_cls, path: str, n_queries: int) -> float:
+    mm = MemoryModule(path)
+    mm.store.close()
+    mm.store = store_cls(path)
+    start = time.perf_counter()
+    for i in range(n_queries):
+        mm.recall(QUERIES[i % len(QUERIES)], k=6)
+    elapsed = time.perf_counter() - start
+    mm.close()
+    return elapsed / n_queries * 1000.0
+
+
+if __name__ == "__main__":
+    n_memories = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_memory.db")
+        mm = MemoryModule(path)
+        seed(mm, n_memories)
+        mm.close()
+
+        before = bench(PerCallConnectionStore, path, n_queries)
+        after = bench(SQLiteMemoryStore, path, n_queries)
+
+    print(f"memories={n_memories} queries={n_queries}")
+    print(f"per-call connections: {before:.3f} ms/recall")
+    print(f"pooled connections:   {after:.3f} ms/recall")
+    print(f"speedup:              {before / after:.2f}x")
@@ -0,0 +1,48 @@
+"""
+Benchmark - recent() latency vs corpus size
+-------------------------------------------
+recent() walks idx_memories_last_access backwards, so its latency should stay
+flat as the table grows.
+
+Usage: python scripts/bench_memory_recent.py [sizes] [n_calls]
+       sizes defaults to 1000,10000,100000,1000000
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from agent.memory.models import Memory
+from agent.memory.store import SQLiteMemoryStore
+
+
+def build(store: SQLiteMemoryStore, n: int, rng: random.Random) -> None:
+    now = datetime.utcnow()
+    batch = []
+    for i in range(n):
+        ts = now - timedelta(seconds=rng.randrange(90 * 24 * 3600))
+        batch.append(Memory(id=None, kind="episodic", text=f"memory {i}",
+                            importance=rng.random(), created_at=ts, last_accessed_at=ts))
+        if len(batch) == 10000:
+            store.insert_many(batch)
+            batch = []
+    store.insert_many(batch)
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in (sys.argv[1] if len(sys.argv) > 1 else "1000,10000,100000,1000000").split(",")]
+    n_calls = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteMemoryStore(os.path.join(tmp, "bench_recent.db"))
+            build(store, n, random.Random(7))
+            start = time.perf_counter()
+            for _ in range(n_calls):
+                store.recent(limit=8)
+            elapsed = time.perf_counter() - start
+            store.close()
+        print(f"rows={n:>8}  recent(8): {elapsed / n_calls * 1000:.3f} ms/call")
@@ -0,0 +1,63 @@
+"""
+Benchmark - Recall ranking CPU time
+-----------------------------------
+Compares per-recall CPU time of:
+  python : search(k*2) -> hydrate every row -> per-row score() loop -> top k
+  sql    : search_ranked(k), scored in SQLite, only k rows hydrated
+and the scalar score() loop against the NumPy rerank() on a larger pool.
+
+Usage: python scripts/bench_memory_rerank.py [n_memories] [n_queries] [k]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from agent.memory import ranking
+from agent.memory.models import Memory
+from agent.memory.store import SQLiteMemoryStore
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "tu", "sa", "vek", "dor", "pi", "qua", "zel", "nor"]
+
+
+def scalar_rerank(ms):
+    scored = sorted(((ranking.score(m, i + 1), i) for i, m in enumerate(ms)))
+    return [ms[i] for _, i in scored]
+
+
+def cpu_ms(fn, reps: int) -> float:
+    start = time.process_time()
+    for i in range(reps):
+        fn(i)
+    return (time.process_time() - start) / reps * 1000.0
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 6
+    rng = random.Random(3)
+    words = sorted({"".join(rng.choice(SYLLABLES) for _ in range(3)) for _ in range(2000)})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteMemoryStore(os.path.join(tmp, "bench_rerank.db"))
+        store.insert_many([
+            Memory(id=None, kind="episodic", importance=rng.random(),
+                   text=" ".join(rng.choice(words) for _ in range(8)))
+            for _ in range(n)
+        ])
+        queries = [" ".join(rng.sample(words, 2)) for _ in range(n_queries)]
+
+        for pool in (k * 2, 200):
+            py = cpu_ms(lambda i: scalar_rerank(store.search(queries[i], limit=pool))[:k], n_queries)
+            sql = cpu_ms(lambda i: store.search_ranked(queries[i], k, pool=pool), n_queries)
+            print(f"pool={pool:<4} python rerank: {py:.3f} ms CPU/recall   sql rerank: {sql:.3f} ms CPU/recall")
+
+        cands = store.search(" ".join(words[:40]), limit=1000)
+        store.close()
+
+    loop = cpu_ms(lambda i: scalar_rerank(cands), 200)
+    vec = cpu_ms(lambda i: ranking.rerank(cands), 200)
+    print(f"rerank {len(cands)} candidates: scalar {loop:.3f} ms   numpy {vec:.3f} ms")
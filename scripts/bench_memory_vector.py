@@ -0,0 +1,106 @@
+"""
+Benchmark - Hybrid (BM25 + vector) recall
+-----------------------------------------
+Builds a synthetic corpus, then queries with perturbed copies of known
+target memories (one word dropped, one word misspelled) and reports
+hit-rate@k and latency for lexical, vector and hybrid recall.
+
+Usage: python scripts/bench_memory_vector.py [sizes] [n_queries] [k]
+       sizes defaults to 10000,100000,1000000
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from agent.memory import ranking
+from agent.memory.models import Memory
+from agent.memory.module import MemoryModule
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "tu", "sa", "vek", "dor", "pi", "qua", "zel", "nor"]
+TEMPLATES = [
+    "Ran tool '{a}' on dataset {b} and the {c} step finished",
+    "User prefers {a} plots for {b} with {c} colours",
+    "Training {a} model on {b} failed because of {c}",
+    "Remember that {a} depends on {b} and {c}",
+]
+
+
+def word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(3))
+
+
+def make_text(rng: random.Random) -> str:
+    return rng.choice(TEMPLATES).format(a=word(rng), b=word(rng), c=word(rng))
+
+
+def perturb(text: str, rng: random.Random) -> str:
+    words = text.split()
+    words.pop(rng.randrange(len(words)))
+    i = rng.randrange(len(words))
+    if len(words[i]) > 4:
+        j = rng.randrange(1, len(words[i]) - 1)
+        words[i] = words[i][:j] + words[i][j + 1:]  # drop a letter
+    return " ".join(words)
+
+
+def build(path: str, n: int, rng: random.Random):
+    mm = MemoryModule(path)
+    texts = []
+    batch = []
+    for _ in range(n):
+        t = make_text(rng)
+        texts.append(t)
+        batch.append(Memory(id=None, kind="episodic", text=t))
+        if len(batch) == 10000:
+            mm.store.insert_many(batch)
+            batch = []
+    mm.store.insert_many(batch)
+    mm.close()
+    return texts
+
+
+def run(path: str, texts, n_queries: int, k: int, rng: random.Random):
+    mm = MemoryModule(path, vector_search=True)  # builds <db>.vec from the table
+    targets = [rng.randrange(len(texts)) for _ in range(n_queries)]
+    queries = [(perturb(texts[t], rng), t + 1) for t in targets]  # ids are 1-based
+
+    def lexical(q):
+        return [m.id for m in ranking.rerank(mm.store.search(q, limit=k * 2))[:k]]
+
+    def vector(q):
+        return [mid for mid, _ in mm.store.vectors.search(q, k=k)]
+
+    def hybrid(q):
+        lex = mm.store.search(q, limit=k * 2)
+        return [m.id for m in ranking.rerank(mm._hybrid(q, lex, k * 2))[:k]]
+
+    out = {}
+    for name, fn in (("lexical", lexical), ("vector", vector), ("hybrid", hybrid)):
+        hits, start = 0, time.perf_counter()
+        for q, target in queries:
+            hits += target in fn(q)
+        elapsed = time.perf_counter() - start
+        out[name] = (hits / n_queries, elapsed / n_queries * 1000.0)
+    mm.close()
+    return out
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in (sys.argv[1] if len(sys.argv) > 1 else "10000,100000,1000000").split(",")]
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 6
+
+    for n in sizes:
+        rng = random.Random(42)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench_vector.db")
+            t0 = time.perf_counter()
+            texts = build(path, n, rng)
+            build_s = time.perf_counter() - t0
+            results = run(path, texts, n_queries, k, rng)
+        print(f"\nmemories={n} (build {build_s:.1f}s) queries={n_queries} k={k}")
+        for name, (hit_rate, ms) in results.items():
+            print(f"  {name:<8} recall@{k}={hit_rate:.3f}  latency={ms:.2f} ms/query")
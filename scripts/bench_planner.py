@@ -0,0 +1,77 @@
+"""
+Benchmark - Planner intent matching throughput
+----------------------------------------------
+Clauses/sec for Planner._detect_single_intent (precompiled intent table with
+a keyword prefilter) against the previous approach: every intent's patterns
+tried in order with re.search() on pattern strings. Then create_plan()
+plans/sec on a handful of canonical multi-step commands, with and without
+the plan cache.
+
+Usage: python scripts/bench_planner.py [n_clauses] [repeats]
+"""
+
+import random
+import re
+import sys
+import time
+
+from agent import planner as planner_module
+from agent.planner import Planner
+
+SAMPLES = [
+    "Read file test-output.txt", "Write this to file demo.txt: Hello from the planner!",
+    "Run python: print(3*7)", "Create a new project called churn_model in .",
+    "load data/train.csv", "show first 10 rows", "describe the data", "list the columns",
+    "split the data", "encode categoricals", "scale numerical", "save the dataframe to out.csv",
+    "What is cross validation?", "explain the difference between precision and recall",
+    "why did the model overfit on the validation set", "summarize our results for the report",
+]
+
+COMMANDS = [
+    "load data/telco.csv and then describe the data",
+    "load data/telco.csv and then show first 10 rows, then list the columns",
+    "load data/churn.csv, then split the data, next encode categoricals and then scale numerical",
+    "read file README.md",
+]
+
+
+def legacy_detect(clause: str):
+    clause_lower = clause.lower()
+    for _, _, patterns, build in planner_module._INTENT_SPECS:
+        for pat, flags in patterns:
+            m = re.search(pat, clause_lower, flags)
+            if m:
+                return build(m, clause)
+    return {"type": "llm", "input": clause}
+
+
+def throughput(fn, clauses, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for c in clauses:
+            fn(c)
+    return len(clauses) * repeats / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rng = random.Random(7)
+    clauses = [rng.choice(SAMPLES) for _ in range(n)]
+
+    planner = Planner()
+    assert all(planner._detect_single_intent(c) == legacy_detect(c) for c in SAMPLES)
+    old = throughput(legacy_detect, clauses, repeats)
+    new = throughput(planner._detect_single_intent, clauses, repeats)
+    print(f"legacy   {old:10.0f} clauses/s")
+    print(f"compiled {new:10.0f} clauses/s  ({new / old:.1f}x)")
+
+    plans = [rng.choice(COMMANDS) for _ in range(n)]
+    uncached = Planner(cache_size=0)
+    cached = Planner()
+    assert all(uncached.create_plan(c) == cached.create_plan(c) for c in COMMANDS * 2)
+    cold = throughput(uncached.create_plan, plans, repeats)
+    warm = throughput(cached.create_plan, plans, repeats)
+    stats = cached.plan_cache_stats()
+    print(f"create_plan uncached {cold:10.0f} plans/s")
+    print(f"create_plan cached   {warm:10.0f} plans/s  ({warm / cold:.1f}x, hit rate {stats['hit_rate']})")
@@ -0,0 +1,87 @@
+"""
+Migrate - single agent_memory.db -> per-tenant shards
+-----------------------------------------------------
+Copies every memory from the old shared file into MemoryRouter shards,
+keeping timestamps, importance, tags and hit counts. Rows go to --tenant,
+or to the tenant named by meta[--tenant-meta-key] when the row has one.
+Optionally moves memories idle longer than --archive-older-than-hours into
+each shard's archive afterwards. The source file is only read: it is
+copied (read-only SQLite backup) to a scratch file, and that copy is
+brought up to the current schema and read.
+
+Usage: python scripts/migrate_memory_to_shards.py [source.db] [--root memory]
+           [--tenant default] [--tenant-meta-key tenant]
+           [--archive-older-than-hours 720]
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from collections import defaultdict
+from dataclasses import replace
+
+from agent.memory.router import DEFAULT_TENANT, MemoryRouter
+from agent.memory.store import SQLiteMemoryStore
+
+_BATCH = 5000
+
+
+def _snapshot(source: str, dest: str) -> None:
+    # opening the source with SQLiteMemoryStore would migrate it in place
+    src = sqlite3.connect(f"file:{os.path.abspath(source)}?mode=ro", uri=True)
+    dst = sqlite3.connect(dest)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def migrate(source: str, router: MemoryRouter, tenant: str, meta_key: str = None) -> dict:
+    scratch = tempfile.mkdtemp(prefix="migrate_memory_")
+    copy = os.path.join(scratch, "source.db")
+    _snapshot(source, copy)
+    src = SQLiteMemoryStore(copy)  # brings the copy up to the current schema first
+    counts: dict = defaultdict(int)
+    try:
+        ids = sorted(r[0] for r in src.all_ids_with_scores())
+        for lo in range(0, len(ids), _BATCH):
+            by_tenant = defaultdict(list)
+            for rec in src.get_many(ids[lo:lo + _BATCH]):
+                owner = rec.meta.get(meta_key, tenant) if meta_key else tenant
+                by_tenant[owner].append(replace(rec.to_memory(), id=None))
+            for owner, memories in by_tenant.items():
+                router.get(owner).store.insert_many(memories)
+                counts[owner] += len(memories)
+    finally:
+        src.close()
+        shutil.rmtree(scratch, ignore_errors=True)
+    return dict(counts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("source", nargs="?", default="agent_memory.db")
+    parser.add_argument("--root", default="memory")
+    parser.add_argument("--tenant", default=DEFAULT_TENANT)
+    parser.add_argument("--tenant-meta-key", default=None)
+    parser.add_argument("--archive-older-than-hours", type=float, default=None)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        sys.exit(f"source not found: {args.source}")
+
+    router = MemoryRouter(args.root, archive=args.archive_older_than_hours is not None)
+    try:
+        counts = migrate(args.source, router, args.tenant, args.tenant_meta_key)
+        for (owner, session), module in sorted(router.open_shards().items()):
+            line = f"{owner:<24} {counts.get(owner, 0):>8} rows -> {router.path_for(owner, session)}"
+            if args.archive_older_than_hours is not None:
+                moved = module.archive_old(older_than_hours=args.archive_older_than_hours)
+                line += f"  ({moved.rows} archived)"
+            print(line)
+    finally:
+        router.close()
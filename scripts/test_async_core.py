@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")  # only the mock server below is called
+
+from agent.agent import Agent
+from agent.core import AgentCore, AsyncLLMPool, RetryPolicy
+from agent.llm_cache import ResponseCache
+from agent.memory.router import MemoryRouter
+
+
+class MockResponses(BaseHTTPRequestHandler):
+    """
+    POST /v1/responses: sleeps LATENCY, then echoes the input.
+    "flaky" prompts get a 500 on their first two attempts, "busy" ones a
+    429 on the first; "slow" prompts take SLOW seconds.
+    """
+    LATENCY, SLOW = 0.2, 2.0
+    lock = threading.Lock()
+    active = peak = requests = 0
+    attempts = {}
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["input"]
+        cls = MockResponses
+        with cls.lock:
+            cls.requests += 1
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+            attempt = cls.attempts[prompt] = cls.attempts.get(prompt, 0) + 1
+        try:
+            time.sleep(cls.SLOW if "slow" in prompt else cls.LATENCY)
+            if ("flaky" in prompt and attempt <= 2) or ("busy" in prompt and attempt == 1):
+                status = 500 if "flaky" in prompt else 429
+                return self._json(status, {"error": {"message": "injected", "type": "server_error"}})
+            self._json(200, {
+                "id": "resp_mock", "object": "response", "created_at": 0, "model": body["model"],
+                "status": "completed", "parallel_tool_calls": True, "tool_choice": "auto", "tools": [],
+                "output": [{"type": "message", "id": "msg_mock", "role": "assistant", "status": "completed",
+                            "content": [{"type": "output_text", "text": f"echo: {prompt[:40]}", "annotations": []}]}],
+            })
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _json(self, status, doc):
+        data = json.dumps(doc).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):  # the client gave up (deadline test)
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def reset():
+    MockResponses.active = MockResponses.peak = MockResponses.requests = 0
+    MockResponses.attempts = {}
+
+
+async def main(base_url):
+    pool = AsyncLLMPool(max_concurrency=8, base_url=base_url, api_key="sk-fake")
+    core = AgentCore(async_pool=pool, retry=RetryPolicy(retries=3, base_delay=0.05, deadline=5.0))
+
+    # concurrency cap: 40 calls, never more than 8 at the server
+    start = time.perf_counter()
+    answers = await asyncio.gather(*(core.agenerate(f"question {i}") for i in range(40)))
+    elapsed = time.perf_counter() - start
+    assert answers[7] == "echo: question 7" and MockResponses.peak <= 8
+    print(f"40 calls, limit 8: {elapsed:.2f}s, peak in flight at server {MockResponses.peak}")
+
+    # retries with jittered backoff: 500, 500, ok / 429, ok
+    reset()
+    assert await core.agenerate("flaky prompt") == "echo: flaky prompt"
+    assert await core.agenerate("busy prompt") == "echo: busy prompt"
+    print(f"retries: {pool.retries} ({MockResponses.requests} requests for 2 answers)")
+
+    # per-call deadline
+    start = time.perf_counter()
+    try:
+        await core.agenerate("slow prompt", deadline=0.5)
+        raise AssertionError("deadline not enforced")
+    except TimeoutError as e:
+        print(f"deadline: {e} after {time.perf_counter() - start:.2f}s")
+
+    # the deadline covers time queued behind the concurrency cap
+    reset()
+    narrow = AgentCore(async_pool=AsyncLLMPool(max_concurrency=1, base_url=base_url, api_key="sk-fake"),
+                       retry=RetryPolicy(retries=0, deadline=5.0))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(narrow.agenerate(f"queued {i}", deadline=0.3) for i in range(3)),
+                                   return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    assert results[0] == "echo: queued 0", results
+    assert all(isinstance(r, TimeoutError) for r in results[1:]), results
+    assert elapsed < 0.45, elapsed  # not 0.6s: three 0.2s calls in a row
+    print(f"queued past the deadline: {sum(isinstance(r, TimeoutError) for r in results)} of 3 "
+          f"timed out after {elapsed:.2f}s")
+    await narrow.async_pool.aclose()
+
+    # single-flight: a cancelled leader (client went away) doesn't cancel its followers
+    reset()
+    cached = AgentCore(async_pool=pool, cache=ResponseCache(os.path.join(tempfile.mkdtemp(), "llm_cache.db")))
+    leader = asyncio.create_task(cached.agenerate("shared question"))
+    await asyncio.sleep(0.05)
+    followers = [asyncio.create_task(cached.agenerate("shared question")) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    leader.cancel()
+    answers = await asyncio.gather(*followers)
+    assert answers == ["echo: shared question"] * 3 and MockResponses.requests == 2, (answers, MockResponses.requests)
+    print(f"leader cancelled: 3 followers answered by one new call ({MockResponses.requests} requests)")
+
+    # Agent.arun: many concurrent queries on one loop
+    reset()
+    router = MemoryRouter(tempfile.mkdtemp())
+    agent = Agent(router=router, refine="off")
+    agent.core = agent.executor.core = core
+    threads_before = threading.active_count()
+    start = time.perf_counter()
+    outputs = await asyncio.gather(*(agent.arun(f"What is topic {i}?") for i in range(32)))
+    elapsed = time.perf_counter() - start
+    assert all(o.startswith("echo: What is topic") for o in outputs)
+    print(f"32 concurrent Agent.arun(): {elapsed:.2f}s (serial would be ~{32 * MockResponses.LATENCY:.1f}s), "
+          f"peak in flight {MockResponses.peak}, threads {threads_before} -> {threading.active_count()}")
+    await pool.aclose()
+    router.close()
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockResponses)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        asyncio.run(main(f"http://127.0.0.1:{server.server_port}/v1"))
+    finally:
+        server.shutdown()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+from agent.core import AgentCore
+from agent.llm_cache import ResponseCache
+
+
+class StubClient:
+    """Stands in for OpenAI(): responses.create() sleeps, then echoes the prompt."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self.responses = self
+
+    def create(self, model, input, **params):
+        self.calls += 1
+        time.sleep(self.delay)
+        return SimpleNamespace(output_text=f"[{model} {params}] {input[::-1]}")
+
+
+tmp = tempfile.mkdtemp()
+cache = ResponseCache(os.path.join(tmp, "llm_cache.db"), ttl=60, max_bytes=4096)
+stub = StubClient()
+core = AgentCore(cache=cache, client=stub)
+
+# miss, then hit
+first = core.generate("What is cross validation?")
+second = core.generate("What is cross validation?")
+assert first == second and stub.calls == 1
+# params are part of the key
+core.generate("What is cross validation?", temperature=0)
+assert stub.calls == 2
+
+# 8 concurrent identical prompts -> one call
+threads = [threading.Thread(target=core.generate, args=("Explain overfitting",)) for _ in range(8)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+assert stub.calls == 3 and cache.stats()["coalesced"] == 7
+print("Stats:", cache.stats())
+
+# survives a reopen (on disk)
+cache.close()
+cache = ResponseCache(os.path.join(tmp, "llm_cache.db"), ttl=60, max_bytes=4096)
+core = AgentCore(cache=cache, client=stub)
+core.generate("Explain overfitting")
+assert stub.calls == 3
+
+# size bound: LRU entries make room
+stub.delay = 0
+for i in range(100):
+    core.generate(f"prompt {i} " + "x" * 100)
+assert cache.stats()["bytes"] <= 4096 and cache.stats()["evictions"] > 0
+
+# TTL
+cache.ttl = 0
+time.sleep(0.01)
+core.generate("Explain overfitting")
+assert stub.calls == 104 and cache.stats()["expired"] >= 1
+
+print("API calls:", stub.calls)
+print("Stats after reopen:", cache.stats())
+cache.close()
@@ -0,0 +1,74 @@
+"""
+Smoke test - agent.memory coalesced access times
+------------------------------------------------
+  coalescing       recall() only records touches; nothing is written until
+                   flush_access() (or the timer), and repeated touches of a
+                   memory cost one UPDATE
+  monotonic        a flush never moves last_accessed_at backwards
+  fts untouched    writing access times leaves the full-text index as it was
+  close            close() writes whatever is still pending
+
+Usage: python scripts/test_memory_access.py
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+
+from agent.memory.module import MemoryModule
+
+tmp = tempfile.mkdtemp()
+path = os.path.join(tmp, "access.db")
+
+
+def last_access(mem, memory_id):
+    with mem.store._conn() as cx:
+        return cx.execute("SELECT last_accessed_at FROM memories WHERE id = ?", (memory_id,)).fetchone()[0]
+
+
+def fts_segments(mem):
+    with mem.store._conn() as cx:
+        return cx.execute("SELECT id, block FROM fts_memories_data ORDER BY id").fetchall()
+
+
+# ---------- coalescing ----------
+mem = MemoryModule(path, touch_interval=3600)  # the timer never fires here
+a = mem.remember("Calibrated the churn classifier with isotonic regression")
+b = mem.remember("Calibration curve flattened after isotonic fit")
+before = {a: last_access(mem, a), b: last_access(mem, b)}
+segments = fts_segments(mem)
+time.sleep(0.01)
+for _ in range(5):
+    assert {r.id for r in mem.recall("isotonic calibration")} == {a, b}
+assert {a: last_access(mem, a), b: last_access(mem, b)} == before  # nothing written yet
+assert mem.access_stats() == {"touches": 10, "pending": 2, "flushes": 0, "rows_written": 0}
+mem.flush_access()
+assert mem.access_stats()["rows_written"] == 2 and mem.access_stats()["pending"] == 0
+assert last_access(mem, a) > before[a] and last_access(mem, b) > before[b]
+print("ok: 10 touches, 2 rows written, only on flush")
+
+# ---------- never backwards ----------
+newest = last_access(mem, a)
+assert mem.store.update_last_access({a: newest - 1_000_000}) == 0
+assert last_access(mem, a) == newest
+assert mem.store.update_last_access({a: newest + 1}) == 1 and last_access(mem, a) == newest + 1
+print("ok: last_accessed_at only moves forward")
+
+# ---------- the FTS index is left alone ----------
+assert fts_segments(mem) == segments
+with mem.store._lock, mem.store._conn() as cx:  # a text edit does rewrite it
+    cx.execute("UPDATE memories SET text = text || ' (v2)' WHERE id = ?", (b,))
+assert fts_segments(mem) != segments
+print("ok: access-time updates don't rewrite fts_memories")
+
+# ---------- close flushes ----------
+mem.recall("isotonic")
+pending = mem.access_stats()["pending"]
+stamp = last_access(mem, a)
+mem.close()
+assert pending == 2
+cx = sqlite3.connect(path)
+assert cx.execute("SELECT last_accessed_at FROM memories WHERE id = ?", (a,)).fetchone()[0] > stamp
+cx.close()
+print("ok: close() writes pending touches")
@@ -0,0 +1,87 @@
+"""
+Smoke test - agent.memory async API
+-----------------------------------
+  same results     aremember / arecall / acontext return what remember /
+                   recall / context return for the same calls
+  read-your-writes a recall awaited after aremember sees the new memory,
+                   with or without write-behind
+  concurrency      many concurrent aremember calls all land, with distinct
+                   ids; concurrent readers agree with each other
+  close            close() shuts the reader / writer pools down
+
+Usage: python scripts/test_memory_async.py
+"""
+
+import asyncio
+import os
+import tempfile
+
+from agent.memory.module import MemoryModule
+
+tmp = tempfile.mkdtemp()
+
+NOTES = [
+    ("Target leakage: drop churn_date before training", ["lesson"]),
+    ("Class imbalance handled with class_weight=balanced", ["lesson"]),
+    ("Always report recall alongside precision", ["pinned"]),
+]
+
+
+def ids_and_texts(records):
+    return [(r.id, r.text) for r in records]
+
+
+async def check_same_results(sync, other):
+    for text, tags in NOTES:
+        sync.remember(text, tags=tags)
+        await other.aremember(text, tags=tags)
+    for query in ("leakage churn", "class imbalance", "recall precision"):
+        want, got = sync.recall(query), await other.arecall(query)
+        assert ids_and_texts(got) == ids_and_texts(want), (query, got, want)
+        assert ids_and_texts(await other.arecall(query, tags=["lesson"])) == \
+            ids_and_texts(sync.recall(query, tags=["lesson"]))
+    task = "why did the churn model look too good?"
+    assert await other.acontext(task) == sync.context(task)
+
+
+async def check_read_your_writes(mem):
+    for i in range(20):
+        mid = await mem.aremember(f"experiment {i}: tuned max_depth to {i + 2}", tags=["exp"])
+        found = await mem.arecall(f"experiment max_depth {i + 2}", k=20)
+        assert mid is None or mid in [r.id for r in found], (i, mid)
+        assert f"experiment {i}: tuned max_depth to {i + 2}" in [r.text for r in found]
+        assert f"tuned max_depth to {i + 2}" in await mem.acontext(f"experiment {i} max_depth {i + 2}")
+
+
+async def check_concurrency(mem):
+    ids = await asyncio.gather(*(mem.aremember(f"parallel note {i} about feature drift") for i in range(40)))
+    assert len(set(ids)) == 40 and None not in ids
+    results = await asyncio.gather(*(mem.arecall("feature drift", k=50) for _ in range(16)))
+    assert all(ids_and_texts(r) == ids_and_texts(results[0]) for r in results)
+    assert set(ids) <= {r.id for r in results[0]}
+
+
+sync = MemoryModule(os.path.join(tmp, "sync.db"))
+other = MemoryModule(os.path.join(tmp, "async.db"))
+asyncio.run(check_same_results(sync, other))
+sync.close()
+other.close()
+print("ok: aremember / arecall / acontext match the sync calls")
+
+for write_behind in (False, True):
+    mem = MemoryModule(os.path.join(tmp, f"ryw_{write_behind}.db"), write_behind=write_behind)
+    asyncio.run(check_read_your_writes(mem))
+    mem.close()
+print("ok: read-your-writes, with and without write-behind")
+
+mem = MemoryModule(os.path.join(tmp, "concurrent.db"))
+asyncio.run(check_concurrency(mem))
+reader, writer = mem._pools()
+mem.close()
+assert mem._read_pool is None and mem._write_pool is None
+try:
+    reader.submit(lambda: None)
+    raise AssertionError("reader pool still running after close()")
+except RuntimeError:
+    pass
+print("ok: concurrent writes land, readers agree, pools shut down")
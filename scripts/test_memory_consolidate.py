@@ -0,0 +1,73 @@
+"""
+Smoke test - agent.memory consolidation
+---------------------------------------
+  hit counts       near-duplicate episodic memories fold into one row with
+                   a hit count
+  distinct calls   tool memories that differ in their arguments (another
+                   file, another n) or in their tags stay separate rows,
+                   however alike their results read
+  batch pass       consolidate() over rows written before consolidation was
+                   enabled follows the same rules
+
+Usage: python scripts/test_memory_consolidate.py
+"""
+
+import os
+import tempfile
+
+from agent.memory.module import MemoryModule
+
+tmp = tempfile.mkdtemp()
+
+
+def tool_memory(tool, args, result):
+    # what Executor._call_tool remembers
+    return dict(text=f"Ran tool '{tool}' with args={args}. Result: {result}", tags=["tool", tool])
+
+
+# ---------- hit counts ----------
+mem = MemoryModule(os.path.join(tmp, "consolidate.db"), consolidate=True)
+text = "Ran tool 'describe_data' with args={}. Result: 7043 rows, 21 columns"
+first = mem.remember(text, tags=["tool", "describe_data"])
+assert mem.remember(text, tags=["tool", "describe_data"]) == first
+assert mem.remember(text + ".", tags=["tool", "describe_data"]) == first  # near-duplicate
+assert mem.remember("Ran tool 'train_model' with args={}. Result: accuracy 0.81") != first
+assert mem.store.count() == 2
+assert mem.recall("describe_data")[0].hits == 3
+mem.close()
+print("ok: consolidation hit counts")
+
+# ---------- different arguments or tags never merge ----------
+mem = MemoryModule(os.path.join(tmp, "calls.db"), consolidate=True)
+loaded = ("Loaded dataframe with 7043 rows and 21 columns: customerID, gender, SeniorCitizen, Partner, "
+          "Dependents, tenure, PhoneService, MultipleLines, InternetService, OnlineSecurity, Churn")
+paths = ["data/train.csv", "data/test.csv", "data/holdout.csv"]
+ids = {mem.remember(**tool_memory("load_csv", {"path": p}, loaded)) for p in paths}
+assert len(ids) == 3 and mem.store.count() == 3
+assert [r.text for r in mem.recall("holdout.csv load_csv")][0].startswith(
+    "Ran tool 'load_csv' with args={'path': 'data/holdout.csv'}")
+assert all(r.hits == 1 for r in mem.recall("load_csv", k=5))
+
+preview = "first rows of the dataframe: age income plan region tenure churn"
+assert (mem.remember(**tool_memory("preview_data", {"n": 5}, preview))
+        != mem.remember(**tool_memory("preview_data", {"n": 50}, preview)))
+assert mem.remember(**tool_memory("preview_data", {"n": 5}, preview + ".")) is not None
+assert mem.store.count() == 5  # the repeated n=5 call merged, n=50 did not
+
+note = "Scaler must be fitted on the train split only"
+assert mem.remember(note, tags=["lesson"]) != mem.remember(note, tags=["preprocessing"])
+assert mem.store.count() == 7
+mem.close()
+print("ok: calls with other arguments or tags stay separate")
+
+# ---------- batch pass over pre-existing rows ----------
+path = os.path.join(tmp, "later.db")
+mem = MemoryModule(path)
+for p in paths + paths[:1]:
+    mem.remember(**tool_memory("load_csv", {"path": p}, loaded))
+mem.close()
+mem = MemoryModule(path, consolidate=True)
+assert mem.consolidate().rows == 1  # only the second train.csv load
+assert mem.store.count() == 3
+mem.close()
+print("ok: batch consolidation")
@@ -0,0 +1,68 @@
+"""
+Smoke test - agent.memory context() cache
+-----------------------------------------
+context() blocks are cached per task and dropped when the store's write
+generation moves. Every write that changes what the block renders must
+move it: inserts, deletes, decay (imp=...), consolidation merges (xN) and
+access-time updates (the Recent Session order).
+
+Usage: python scripts/test_memory_context_cache.py
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from agent.memory.models import Memory
+from agent.memory.module import MemoryModule
+
+tmp = tempfile.mkdtemp()
+old = datetime.utcnow() - timedelta(days=60)
+TASK = "tune the xgboost model"
+
+mem = MemoryModule(os.path.join(tmp, "ctx.db"), consolidate=True, touch_interval=0)
+mem.store.insert(Memory(id=None, kind="episodic", text="xgboost overfit with depth 10", importance=0.8,
+                        created_at=old, last_accessed_at=old))
+
+
+def fresh_context():
+    misses = mem.context_cache_stats()["misses"]
+    ctx = mem.context(TASK)
+    assert mem.context_cache_stats()["misses"] == misses + 1, "served a cached block"
+    return ctx
+
+
+# ---------- hits while nothing changes ----------
+first = mem.context(TASK)
+hits = mem.context_cache_stats()["hits"]
+generation = mem.store.generation
+assert mem.context(TASK) == first and mem.context_cache_stats()["hits"] == hits + 1
+print("ok: unchanged store serves the cached block")
+
+# ---------- access-time updates ----------
+mem.store.update_last_access({1: 0})  # never moves backwards: no change, no new generation
+assert mem.store.generation == generation
+mem.store.update_last_access([1])
+assert mem.store.generation > generation
+fresh_context()
+print("ok: access updates invalidate")
+
+# ---------- decay ----------
+# not a recall hit for TASK (that would touch it); shown under Recent Session
+mem.store.insert(Memory(id=None, kind="episodic", text="idle note on learning rate schedules",
+                        importance=0.8, created_at=old, last_accessed_at=old))
+assert "imp=0.80) idle note" in fresh_context()
+assert mem.decay().rows == 1
+ctx = fresh_context()
+assert "imp=0.15) idle note" in ctx, ctx
+print("ok: decay invalidates")
+
+# ---------- consolidation merge ----------
+text = "Ran tool 'train_model' with args={'model': 'xgboost'}. Result: accuracy 0.84"
+mem.remember(text, tags=["tool", "train_model"])
+assert "x2)" not in fresh_context()
+mem.remember(text, tags=["tool", "train_model"])
+ctx = fresh_context()
+assert "x2) Ran tool 'train_model'" in ctx, ctx
+print("ok: merges invalidate")
+mem.close()
@@ -0,0 +1,76 @@
+"""
+Smoke test - agent.memory FTS query compiler
+--------------------------------------------
+  compile          stopwords dropped, terms de-duplicated, only the first
+                   max_prefix word terms get a `*`, common terms dropped
+                   unless nothing else is left
+  quoting          punctuation, FTS operators and quotes in user text never
+                   reach MATCH unquoted (no syntax errors)
+  weights          a tag hit outranks the same word in the text under the
+                   default column weights, and the order follows the weights
+  hints            a phrase / NEAR hint lifts the row that has the words
+                   together without filtering the others out
+
+Usage: python scripts/test_memory_fts.py
+"""
+
+import os
+import tempfile
+
+from agent.memory.fts import ColumnWeights, QueryHints, compile_query, terms
+from agent.memory.models import Memory
+from agent.memory.module import MemoryModule
+
+tmp = tempfile.mkdtemp()
+
+# ---------- compile ----------
+assert terms("What is the AUC of the model on the test set?") == ["auc", "model", "test", "set"]
+assert terms("what is it") == ["what", "is", "it"]  # all stopwords: keep them rather than nothing
+assert compile_query("the model and the MODEL") == '"model"*'
+assert compile_query("train xgboost model on churn data", max_prefix=2) == \
+    '"train"* OR "xgboost"* OR "model" OR "churn" OR "data"'
+assert compile_query("top 10 features") == '"top"* OR "10" OR "features"*'  # no prefix on numbers
+assert compile_query("model churn", common=frozenset({"model"})) == '"churn"*'
+assert compile_query("model", common=frozenset({"model"})) == '"model"*'
+assert compile_query("?!", QueryHints()) == ""
+assert compile_query("churn", QueryHints(phrases=("feature importance",), near=(("shap", "values"),),
+                                         near_distance=5)) == \
+    '"churn"* OR "feature importance" OR NEAR("shap" "values", 5)'
+print("ok: stopwords, de-dup, capped prefixes, common terms, hints")
+
+# ---------- quoting ----------
+mem = MemoryModule(os.path.join(tmp, "fts.db"))
+mem.remember("Churn model NEAR the threshold: AND/OR logic in feature (v2)")
+for hostile in ('churn" OR 1', "NEAR(churn", "feature AND", "(v2)", "col:churn", "*", '"', "- churn ^"):
+    mem.recall(hostile)  # sqlite3.OperationalError on a bad MATCH expression
+assert mem.recall('threshold" OR "x')[0].text.startswith("Churn model")
+print("ok: user text is always quoted")
+
+# ---------- column weights ----------
+store = mem.store
+tagged = store.insert(Memory(id=None, kind="episodic", text="Ran the weekly report", tags=["calibration"]))
+texted = store.insert(Memory(id=None, kind="episodic", text="Ran the weekly report after calibration"))
+assert [r.id for r in store.search("calibration")] == [tagged, texted]
+store.column_weights = ColumnWeights(text=2.0, summary=0.5, tags=0.1)
+assert [r.id for r in store.search("calibration")] == [texted, tagged]
+store.column_weights = ColumnWeights()
+print("ok: bm25 column weights order tag and text hits")
+
+# ---------- phrase / NEAR hints ----------
+apart = store.insert(Memory(id=None, kind="episodic",
+                            text="Feature scaling helped; the importance of early stopping was clear too"))
+together = store.insert(Memory(id=None, kind="episodic",
+                               text="Plotted feature importance for the gradient boosting model"))
+unrelated = store.insert(Memory(id=None, kind="episodic", text="Importance sampling for the rare class"))
+plain = [r.id for r in store.search("importance feature stopping")]
+hinted = [r.id for r in store.search("importance feature stopping",
+                                     hints=QueryHints(phrases=("feature importance",)))]
+assert plain[0] == apart and hinted[0] == together, (plain, hinted)
+assert set(hinted) == set(plain) >= {apart, together, unrelated}  # boosts, never filters
+assert [r.id for r in store.search("stopping")] == [apart]
+near = QueryHints(near=(("feature", "boosting"),), near_distance=5)
+assert {r.id for r in store.search("stopping", hints=near)} == {apart, together}
+assert [r.id for r in store.search("stopping", hints=QueryHints(near=(("feature", "boosting"),),
+                                                                near_distance=2))] == [apart]
+mem.close()
+print("ok: phrase / NEAR hints boost without filtering")
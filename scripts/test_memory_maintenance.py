@@ -0,0 +1,85 @@
+"""
+Smoke test - agent.memory decay / prune
+---------------------------------------
+  decay            idle memories fade to the floor, recently used ones keep
+                   their importance
+  prune            drops the least important first, keeps max_items, and
+                   only touches rows at or below its threshold
+  decay -> prune   with the defaults (what start_maintenance() runs), the
+                   memories decay faded are evicted once the store is full
+  last pass        decay() books its last pass as epoch micros; an ISO text
+                   value from an older release is migrated
+
+Usage: python scripts/test_memory_maintenance.py
+"""
+
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+from agent.memory.models import Memory, from_micros
+from agent.memory.module import MemoryModule
+
+tmp = tempfile.mkdtemp()
+old = datetime.utcnow() - timedelta(days=60)
+
+
+def texts(records):
+    return sorted(r.text for r in records)
+
+
+def idle_memory(text, importance=0.8):
+    return Memory(id=None, kind="episodic", text=text, importance=importance,
+                  created_at=old, last_accessed_at=old)
+
+
+# ---------- decay / prune with explicit thresholds ----------
+mem = MemoryModule(os.path.join(tmp, "decay.db"), touch_interval=0)
+idle = mem.store.insert(idle_memory("idle note about xgboost"))
+fresh = mem.store.insert(Memory(id=None, kind="episodic", text="fresh note about xgboost", importance=0.8))
+assert mem.decay(min_importance=0.15, hours_threshold=72, half_life_hours=168).rows == 1
+by_id = {r.id: r.importance for r in mem.store.get_many([idle, fresh])}
+assert abs(by_id[idle] - 0.15) < 1e-9 and by_id[fresh] == 0.8, by_id  # 60 days idle: at the floor
+for i in range(6):
+    mem.remember(f"throwaway scratch note {i}", importance=0.05)
+assert mem.prune(max_items=4, drop_below=0.1).rows == 4
+assert mem.store.count() == 4 and texts(mem.recall("xgboost")) == ["fresh note about xgboost",
+                                                                   "idle note about xgboost"]
+assert mem.prune(max_items=1, drop_below=0.1).rows == 2  # only rows at or below drop_below go
+mem.close()
+print("ok: decay and prune")
+
+# ---------- the scheduled pass: decay(), then prune() with defaults ----------
+mem = MemoryModule(os.path.join(tmp, "scheduled.db"), touch_interval=0)
+for i in range(5):
+    mem.store.insert(idle_memory(f"stale lesson {i} about feature scaling", importance=0.4 + 0.1 * i))
+for i in range(3):
+    mem.remember(f"current note {i} about calibration", importance=0.5)
+assert mem.decay().rows == 5
+assert mem.prune(max_items=4).rows == 4  # faded rows are evictable
+assert mem.store.count() == 4
+assert len(mem.recall("calibration", k=5)) == 3 and len(mem.recall("feature scaling", k=5)) == 1
+assert mem.prune(max_items=1).rows == 1  # what decay never faded is kept
+assert texts(mem.recall("calibration", k=5)) == [f"current note {i} about calibration" for i in range(3)]
+mem.close()
+print("ok: decayed memories get pruned")
+
+# ---------- last decay pass ----------
+path = os.path.join(tmp, "meta.db")
+mem = MemoryModule(path)
+mem.decay()
+last = mem.store.get_meta("last_decay_at")
+assert isinstance(last, int) and abs(from_micros(last) - datetime.utcnow()) < timedelta(minutes=1), last
+mem.close()
+
+cx = sqlite3.connect(path)
+cx.execute("UPDATE memory_meta SET value = ? WHERE key = 'last_decay_at'", (old.isoformat(),))
+cx.execute("PRAGMA user_version = 5")  # as the release before the migration left it
+cx.commit()
+cx.close()
+mem = MemoryModule(path)
+assert from_micros(mem.store.get_meta("last_decay_at")) == old
+assert mem.decay().rows == 0
+mem.close()
+print("ok: last decay pass stored as epoch micros")
@@ -0,0 +1,123 @@
+"""
+Smoke test - agent.memory migrations
+------------------------------------
+  baseline db      a file written by the original single-table schema opens,
+                   migrates, and recall / context / prune return its rows
+  round trip       every migration runs exactly once: user_version ends at
+                   len(_MIGRATIONS), timestamps are INTEGER epoch micros,
+                   and reopening changes nothing
+  decay marker     an ISO-8601 last_decay_at from an older release is
+                   converted to epoch micros
+
+Usage: python scripts/test_memory_migrations.py
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+from agent.memory.models import from_micros
+from agent.memory.module import MemoryModule
+from agent.memory.store import _MIGRATIONS
+
+# the memories table + FTS index as the first release created them
+_BASELINE_SCHEMA = """
+CREATE TABLE memories (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    text TEXT NOT NULL,
+    summary TEXT,
+    tags TEXT NOT NULL,
+    importance REAL NOT NULL,
+    created_at TEXT NOT NULL,
+    last_accessed_at TEXT NOT NULL,
+    meta TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE fts_memories USING fts5(
+    text, summary, tags, content='memories', content_rowid='id'
+);
+CREATE TRIGGER memories_ai AFTER INSERT ON memories BEGIN
+  INSERT INTO fts_memories(rowid, text, summary, tags)
+  VALUES (new.id, new.text, coalesce(new.summary,''), new.tags);
+END;
+"""
+
+tmp = tempfile.mkdtemp()
+old = datetime.utcnow() - timedelta(days=60)
+
+
+def texts(records):
+    return sorted(r.text for r in records)
+
+
+# ---------- baseline db ----------
+path = os.path.join(tmp, "baseline.db")
+cx = sqlite3.connect(path)
+cx.executescript(_BASELINE_SCHEMA)
+rows = [
+    ("semantic", "User prefers step-by-step, code-heavy answers.", ["user_pref", "pinned"], 0.9),
+    ("episodic", "Docker push failed with large layers; fixed with multi-stage.", ["docker", "lesson"], 0.7),
+    ("episodic", "Ran tool 'load_csv' on telco.csv", ["tool", "load_csv"], 0.05),
+]
+for kind, text, tags, importance in rows:
+    cx.execute("INSERT INTO memories(kind,text,summary,tags,importance,created_at,last_accessed_at,meta) "
+               "VALUES(?,?,?,?,?,?,?,?)",
+               (kind, text, None, json.dumps(tags), importance, old.isoformat(), old.isoformat(), "{}"))
+cx.commit()
+cx.close()
+
+mem = MemoryModule(path)
+assert texts(mem.recall("docker layers")) == [rows[1][1]]
+assert rows[0][1] in mem.context("how should answers look?")
+assert [r.text for r in mem.pinned()] == [rows[0][1]]
+assert mem.recall("docker")[0].created_at.date() == old.date()  # ISO text -> epoch micros
+assert mem.prune(max_items=2, drop_below=0.1).rows == 1
+assert mem.store.count() == 2 and not mem.recall("telco")
+mem.close()
+print("ok: baseline schema migrates; recall / context / pinned / prune")
+
+# ---------- round trip ----------
+def snapshot(path):
+    cx = sqlite3.connect(path)
+    try:
+        return (cx.execute("PRAGMA user_version").fetchone()[0],
+                cx.execute("SELECT id, kind, text, tags, importance, created_at, last_accessed_at, hits, "
+                           "typeof(created_at), typeof(last_accessed_at) FROM memories ORDER BY id").fetchall(),
+                cx.execute("SELECT memory_id, tag FROM memory_tags ORDER BY memory_id, tag").fetchall(),
+                cx.execute("SELECT rowid FROM fts_memories WHERE fts_memories MATCH 'docker'").fetchall())
+    finally:
+        cx.close()
+
+
+migrated = snapshot(path)
+version, memories, tags, fts = migrated
+assert version == len(_MIGRATIONS)
+assert {(r[8], r[9]) for r in memories} == {("integer", "integer")}
+assert all(from_micros(r[5]).date() == old.date() for r in memories)
+assert ("docker" in [t for _, t in tags]) and len(fts) == 1
+mem = MemoryModule(path)
+assert mem.recall("docker")[0].text == rows[1][1]
+mem.close()
+again = snapshot(path)
+assert again[0] == version and again[2:] == migrated[2:]  # nothing re-ran
+assert [r[:6] + r[7:] for r in again[1]] == [r[:6] + r[7:] for r in memories]  # recall only moves last_accessed_at
+print(f"ok: migrated to user_version {version}; reopening is a no-op")
+
+# ---------- decay marker ----------
+path = os.path.join(tmp, "decay_marker.db")
+MemoryModule(path).close()
+marked = datetime(2024, 5, 1, 12, 30)
+cx = sqlite3.connect(path)
+cx.execute("INSERT OR REPLACE INTO memory_meta(key, value) VALUES ('last_decay_at', ?)", (marked.isoformat(),))
+cx.execute(f"PRAGMA user_version={len(_MIGRATIONS) - 1}")
+cx.commit()
+cx.close()
+MemoryModule(path).close()
+cx = sqlite3.connect(path)
+value, = cx.execute("SELECT value FROM memory_meta WHERE key = 'last_decay_at'").fetchone()
+assert cx.execute("PRAGMA user_version").fetchone()[0] == len(_MIGRATIONS)
+cx.close()
+assert isinstance(value, int) and from_micros(value) == marked, value
+print("ok: last_decay_at migrated to epoch micros")
@@ -0,0 +1,92 @@
+"""
+Smoke test - agent.memory context packing
+-----------------------------------------
+  dedup            a memory listed by several sections appears once, in the
+                   first (highest-priority) one
+  whole lines      the block never exceeds the budget and every line in it
+                   is a complete memory line
+  pinned           under a tight budget pinned facts are kept and recent
+                   noise is dropped; sections keep their order
+  context()        the same guarantees through MemoryModule.context()
+
+Usage: python scripts/test_memory_packing.py
+"""
+
+import os
+import tempfile
+
+from agent.memory import packing
+from agent.memory.models import Memory
+from agent.memory.module import MemoryModule
+
+tmp = tempfile.mkdtemp()
+
+
+def mem(id, text, importance=0.5, tags=()):
+    return Memory(id=id, kind="episodic", text=text, importance=importance, tags=list(tags))
+
+
+def body_lines(block):
+    return [line for line in block.splitlines() if line.startswith("- ")]
+
+
+def cost(block):
+    # what pack() charged: each line, plus one per section header
+    return sum(packing.estimate_tokens(l) + l.startswith("### ") for l in block.splitlines() if l)
+
+
+pin = mem(1, "Always report recall alongside precision", 0.9, ["pinned"])
+lesson = mem(2, "Scaling before the split leaked test statistics into training", 0.7, ["lesson"])
+noise = [mem(10 + i, f"Recent run {i}: printed the head of the dataframe and its dtypes", 0.2) for i in range(8)]
+sections = [
+    packing.Section("Pinned Facts", [pin], weight=3.0),
+    packing.Section("Task-Relevant Memories", [lesson, pin], weight=2.0),
+    packing.Section("Recent Session", [lesson] + noise, weight=1.0),
+]
+
+# ---------- dedup across sections ----------
+block = packing.pack(sections, budget_tokens=10_000)
+lines = body_lines(block)
+assert len(lines) == len(set(lines)) == 2 + len(noise)
+assert [l for l in lines if pin.text in l] == [packing.format_line(pin)]
+pinned_part, relevant_part, recent_part = block.split("\n\n")
+assert pin.text in pinned_part and pin.text not in relevant_part
+assert lesson.text in relevant_part and lesson.text not in recent_part
+print("ok: each memory listed once, in its first section")
+
+# ---------- whole lines within the budget ----------
+every_line = {packing.format_line(m) for m in [pin, lesson] + noise}
+for budget in range(0, 200, 7):
+    block = packing.pack(sections, budget)
+    assert cost(block) <= budget, budget
+    assert set(body_lines(block)) <= every_line, budget  # nothing cut mid-line
+    assert all(l in every_line or l.startswith("### ") for l in block.splitlines() if l)
+print("ok: whole lines only, never over budget")
+
+# ---------- pinned wins a tight budget ----------
+tight = packing.estimate_tokens("### Pinned Facts") + 1 + packing.estimate_tokens(packing.format_line(pin))
+block = packing.pack(sections, tight)
+assert block == "### Pinned Facts\n" + packing.format_line(pin)
+block = packing.pack(sections, tight * 3)
+assert block.startswith("### Pinned Facts") and lesson.text in block
+assert not any(m.text in block for m in noise)
+titles = [l for l in packing.pack(sections, 10_000).splitlines() if l.startswith("### ")]
+assert titles == ["### Pinned Facts", "### Task-Relevant Memories", "### Recent Session"]
+print("ok: pinned kept under a tight budget, noise dropped first")
+
+# ---------- through MemoryModule.context() ----------
+store = MemoryModule(os.path.join(tmp, "packing.db"))
+store.remember(pin.text, tags=["pinned"], kind="semantic", importance=0.9)
+store.remember(lesson.text, tags=["lesson"], importance=0.7)
+for m in noise:
+    store.remember(m.text, importance=0.2)
+for budget_chars in (120, 400, 4000):
+    ctx = store.context("how did scaling leak test statistics?", token_budget_chars=budget_chars)
+    assert cost(ctx) <= packing.budget_from_chars(budget_chars), (budget_chars, ctx)
+    assert all(l.endswith(("precision", "training", "dtypes")) for l in body_lines(ctx)), ctx
+    assert sum(pin.text in l for l in body_lines(ctx)) <= 1 and sum(lesson.text in l for l in body_lines(ctx)) <= 1
+    assert ctx.startswith("### Pinned Facts") and pin.text in ctx
+ctx = store.context("how did scaling leak test statistics?", token_budget_chars=4000)
+assert lesson.text in ctx.split("\n\n")[1]  # task-relevant, not repeated under Recent
+store.close()
+print("ok: context() packs pinned first, deduplicated, whole lines")
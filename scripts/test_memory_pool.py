@@ -0,0 +1,59 @@
+"""
+Smoke test - agent.memory connection pool
+-----------------------------------------
+  per thread       a thread reuses one connection, opened with WAL and the
+                   other pragmas; other threads get their own
+  dead threads     threads that exit don't leave pooled connections behind
+  close            close() closes every pooled connection; later use fails
+
+Usage: python scripts/test_memory_pool.py
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+
+from agent.memory.module import MemoryModule
+
+tmp = tempfile.mkdtemp()
+
+# ---------- one connection per thread ----------
+mem = MemoryModule(os.path.join(tmp, "pool.db"))
+pool = mem.store._pool
+cx = pool.get()
+assert pool.get() is cx
+assert cx.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+assert cx.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+mem.remember("pool check: reused connection")
+assert pool.get() is cx and pool.size() == 1
+
+other = []
+t = threading.Thread(target=lambda: other.append(pool.get()))
+t.start()
+t.join()
+assert other[0] is not cx
+print("ok: one pooled connection per thread")
+
+# ---------- connections of exited threads ----------
+for _ in range(50):
+    t = threading.Thread(target=mem.recall, args=("pool",))
+    t.start()
+    t.join()
+assert pool.size() <= 2, pool.size()
+print("ok: pooled connections released with their threads")
+
+# ---------- close ----------
+mem.close()
+assert pool.size() == 0
+try:
+    cx.execute("SELECT 1")
+    raise AssertionError("pooled connection still open")
+except sqlite3.ProgrammingError:
+    pass
+try:
+    pool.get()
+    raise AssertionError("closed pool handed out a connection")
+except sqlite3.ProgrammingError:
+    pass
+print("ok: close() closes every connection")
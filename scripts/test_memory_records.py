@@ -0,0 +1,73 @@
+"""
+Smoke test - agent.memory read-side records
+-------------------------------------------
+  decoding         MemoryRecord decodes tags / meta (JSON) and timestamps
+                   (epoch micros) on first access, to the values written
+  projection       search / recent / by_tags with columns= return only those
+                   columns (plus id); other fields raise AttributeError;
+                   unknown columns are rejected
+  round trip       to_memory() gives back an independent Memory equal to
+                   the one inserted
+
+Usage: python scripts/test_memory_records.py
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from agent.memory.models import MEMORY_COLUMNS, Memory, MemoryRecord
+from agent.memory.module import MemoryModule
+
+tmp = tempfile.mkdtemp()
+when = datetime(2024, 3, 5, 14, 7, 9, 123456)
+
+mem = MemoryModule(os.path.join(tmp, "records.db"))
+original = Memory(id=None, kind="semantic", text="Gradient boosting overfit the small churn sample",
+                  summary="boosting overfit", tags=["lesson", "xgboost"], importance=0.65,
+                  created_at=when, last_accessed_at=when + timedelta(seconds=1),
+                  meta={"tool": "train_model", "task_id": "t-7"}, hits=3)
+mid = mem.store.insert(original)
+mem.store.insert(Memory(id=None, kind="episodic", text="Logistic regression baseline on churn"))
+
+# ---------- lazy decoding ----------
+rec = mem.store.search("boosting overfit")[0]
+assert isinstance(rec, MemoryRecord) and not hasattr(rec, "__dict__")
+assert isinstance(rec._tags, str) and isinstance(rec._created_at, int)  # still raw
+assert rec.tags == ["lesson", "xgboost"] and rec.meta == {"tool": "train_model", "task_id": "t-7"}
+assert rec.created_at == when and rec.last_accessed_at == when + timedelta(seconds=1)
+assert rec.tags is rec.tags  # decoded once
+assert (rec.id, rec.kind, rec.summary, rec.importance, rec.hits) == (mid, "semantic", "boosting overfit", 0.65, 3)
+print("ok: tags / meta / timestamps decode to what was written")
+
+# ---------- projection ----------
+for rows in (mem.store.search("churn", columns=("text", "importance")),
+             mem.store.recent(columns=("text", "importance")),
+             mem.store.by_tags(["lesson"], columns=("importance", "text"))):
+    assert rows and all(r.id is not None and r.text for r in rows)
+    for field in ("kind", "summary", "tags", "meta", "created_at", "hits"):
+        try:
+            getattr(rows[0], field)
+            raise AssertionError(f"{field} was not projected but is set")
+        except AttributeError:
+            pass
+by_id = {r.id: r.text for r in mem.store.search("churn", columns=("text",))}
+assert by_id[mid] == original.text
+assert [r.id for r in mem.store.recent(columns=("id",))] == [r.id for r in mem.store.recent()]
+try:
+    mem.store.recent(columns=("text", "password"))
+    raise AssertionError("unknown column accepted")
+except ValueError:
+    pass
+print("ok: columns= projects, unknown columns rejected")
+
+# ---------- to_memory round trip ----------
+back = rec.to_memory()
+assert back == Memory(**{**original.__dict__, "id": mid})
+back.tags.append("edited")
+back.meta["tool"] = "edited"
+assert rec.tags == ["lesson", "xgboost"] and rec.meta["tool"] == "train_model"
+projected = mem.store.search("boosting overfit", columns=list(MEMORY_COLUMNS))[0]  # the from_row path
+assert projected.to_memory() == rec.to_memory()
+mem.close()
+print("ok: to_memory() round trip")
@@ -0,0 +1,114 @@
+"""
+Smoke test - agent.memory shards and archive
+--------------------------------------------
+  shard paths      <root>/<tenant>.db, <root>/<tenant>/<session>.db; names
+                   that could reach another shard (or its archive) are hashed
+  archive          archive_old() moves idle rows out of the hot shard and
+                   recall() still finds them, but only when the hot shard
+                   comes back short
+  isolation        tenants and sessions never see each other's memories
+  migration        migrate_memory_to_shards copies a single-file install into
+                   tenant shards with timestamps, tags and hits intact, and
+                   leaves the source file as it was
+
+Usage: python scripts/test_memory_router.py
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from agent.memory.models import Memory
+from agent.memory.module import MemoryModule
+from agent.memory.router import MemoryRouter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from migrate_memory_to_shards import migrate  # noqa: E402
+
+tmp = tempfile.mkdtemp()
+old = datetime.utcnow() - timedelta(days=60)
+
+
+def texts(records):
+    return sorted(r.text for r in records)
+
+
+def idle(text, **kwargs):
+    return Memory(id=None, kind=kwargs.pop("kind", "episodic"), text=text, importance=kwargs.pop("importance", 0.5),
+                  created_at=old, last_accessed_at=old, **kwargs)
+
+
+# ---------- shard paths ----------
+root = os.path.join(tmp, "shards")
+router = MemoryRouter(root)
+assert router.path_for("acme") == os.path.join(root, "acme.db")
+assert router.path_for("acme", "s1") == os.path.join(root, "acme", "s1.db")
+for unsafe in ("acme.archive", "../acme", "h-acme", "a" * 65):
+    name = os.path.basename(router.path_for(unsafe))
+    assert name.startswith("h-") and name.endswith(".db") and "/" not in name[:-3], name
+assert router.path_for("acme.archive") != router.path_for("acme_archive")
+router.get("acme", "s1").remember("opened on first use")
+assert os.path.exists(router.path_for("acme", "s1")) and list(router.open_shards()) == [("acme", "s1")]
+router.close()
+print("ok: shard paths")
+
+# ---------- archive round trip ----------
+mem = MemoryModule(os.path.join(tmp, "hot.db"), archive_path=os.path.join(tmp, "hot.archive.db"))
+mem.store.insert(idle("Old churn baseline was logistic regression", tags=["lesson"]))
+mem.store.insert(idle("Pinned churn preference", kind="semantic", tags=["pinned"]))
+mem.remember("Recent churn run used xgboost")
+assert mem.archive_old(older_than_hours=24).rows == 1  # pinned rows stay hot
+assert mem.store.count() == 2 and mem.archive.count() == 1
+found = mem.recall("churn baseline logistic", k=3)
+assert "Old churn baseline was logistic regression" in texts(found)
+archived = next(r for r in found if r.text.startswith("Old churn"))
+assert archived.tags == ["lesson"] and archived.created_at.date() == old.date()
+assert mem.recall("churn baseline logistic", k=3, tags=["lesson"])[0].text == archived.text
+assert all(r.text != archived.text for r in mem.recall("churn", k=2))  # hot shard had enough
+assert mem.archive_old(older_than_hours=24).rows == 0 and mem.archive.count() == 1
+mem.close()
+print("ok: archive round trip")
+
+# ---------- router isolation ----------
+router = MemoryRouter(root)
+router.get("acme").remember("acme secret: churn threshold 0.42")
+router.get("acme", "s1").remember("acme session note: try calibration")
+router.get("globex").remember("globex note about churn")
+router.get("acme").archive_old(older_than_hours=0, max_importance=1.0)
+assert texts(router.get("acme").recall("churn threshold")) == ["acme secret: churn threshold 0.42"]
+assert router.get("globex").recall("threshold") == []
+assert router.get("acme", "s1").recall("threshold") == []
+assert router.get("acme", "s2").recall("calibration") == []
+acme_archive = router.path_for("acme")[:-len(".db")] + ".archive.db"
+assert os.path.exists(acme_archive) and router.path_for("acme.archive") != acme_archive
+assert router.path_for("acme", "s1.archive") != router.path_for("acme", "s1")[:-len(".db")] + ".archive.db"
+assert router.get("acme.archive").recall("threshold") == []
+assert len({router.path_for(*key) for key in router.open_shards()}) == len(router.open_shards())
+router.close()
+print("ok: router isolation")
+
+# ---------- migration from a single file ----------
+source = os.path.join(tmp, "agent_memory.db")
+mem = MemoryModule(source)
+mem.store.insert_many([
+    idle("acme: churn model uses xgboost", tags=["lesson"], meta={"tenant": "acme"}, hits=3),
+    idle("globex: churn model uses logistic regression", meta={"tenant": "globex"}),
+    idle("shared: scale numeric columns", tags=["pinned"], kind="semantic"),
+])
+mem.close()
+with open(source, "rb") as f:
+    before = hashlib.sha256(f.read()).hexdigest()
+
+router = MemoryRouter(os.path.join(tmp, "migrated"))
+assert migrate(source, router, "default", meta_key="tenant") == {"acme": 1, "globex": 1, "default": 1}
+moved = router.get("acme").recall("churn xgboost")[0]
+assert (moved.text, moved.tags, moved.hits) == ("acme: churn model uses xgboost", ["lesson"], 3)
+assert moved.created_at.date() == old.date()
+assert router.get("globex").recall("xgboost") == []
+assert texts(router.get("default").pinned()) == ["shared: scale numeric columns"]
+router.close()
+with open(source, "rb") as f:
+    assert hashlib.sha256(f.read()).hexdigest() == before
+print("ok: migration to shards")
@@ -0,0 +1,61 @@
+"""
+Smoke test - agent.memory tag index
+-----------------------------------
+  filters          recall(tags=..., kind=...) keeps only memories carrying
+                   every tag (and of that kind)
+  pinned           pinned() comes from the tag index, most important first,
+                   not from text that happens to say "pinned"
+  triggers         memory_tags follows inserts, tag updates and deletes
+
+Usage: python scripts/test_memory_tags.py
+"""
+
+import json
+import os
+import tempfile
+
+from agent.memory.module import MemoryModule
+
+tmp = tempfile.mkdtemp()
+
+
+def texts(records):
+    return sorted(r.text for r in records)
+
+
+def tag_rows(mem, memory_id):
+    with mem.store._conn() as cx:
+        return sorted(r[0] for r in cx.execute("SELECT tag FROM memory_tags WHERE memory_id = ?", (memory_id,)))
+
+
+# ---------- filters ----------
+mem = MemoryModule(os.path.join(tmp, "tags.db"))
+mem.remember("Scaler fitted on train split only", tags=["lesson", "preprocessing"])
+mem.remember("Scaler choice: StandardScaler for linear models", tags=["preference"])
+mem.remember("Scaler notes for the semantic store", tags=["lesson"], kind="semantic")
+assert texts(mem.recall("scaler", tags=["lesson"])) == ["Scaler fitted on train split only",
+                                                       "Scaler notes for the semantic store"]
+assert texts(mem.recall("scaler", tags=["lesson", "preference"])) == []  # all tags must match
+assert texts(mem.recall("scaler", tags=["lesson"], kind="episodic")) == ["Scaler fitted on train split only"]
+assert len(mem.recall("scaler")) == 3
+print("ok: tag and kind filters")
+
+# ---------- pinned ----------
+mem.remember("Always answer with code", tags=["pinned"], kind="semantic", importance=0.6)
+mem.remember("Prefers metric: recall over precision", tags=["pinned", "user_pref"], importance=0.9)
+mem.remember("The word pinned in a note is not a pin", tags=["lesson"])
+assert [r.text for r in mem.pinned()] == ["Prefers metric: recall over precision", "Always answer with code"]
+assert [r.text for r in mem.pinned(k=1)] == ["Prefers metric: recall over precision"]
+print("ok: pinned via the tag index")
+
+# ---------- triggers keep memory_tags in sync ----------
+mid = mem.remember("Retagged memory", tags=["draft"])
+assert tag_rows(mem, mid) == ["draft"]
+with mem.store._lock, mem.store._conn() as cx:
+    cx.execute("UPDATE memories SET tags = ? WHERE id = ?", (json.dumps(["pinned", "final"]), mid))
+assert tag_rows(mem, mid) == ["final", "pinned"]
+assert "Retagged memory" in texts(mem.pinned(k=5))
+mem.store.delete([mid])
+assert tag_rows(mem, mid) == [] and "Retagged memory" not in texts(mem.pinned(k=5))
+mem.close()
+print("ok: tag index follows inserts, updates and deletes")
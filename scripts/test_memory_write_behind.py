@@ -0,0 +1,66 @@
+"""
+Smoke test - agent.memory write-behind queue
+--------------------------------------------
+  read your writes   remember() queued in the background is visible to the
+                     next recall() / context() in the same process
+  busy writers       a flush waits for what was queued before it, not for
+                     what other threads keep queueing after it, so reads
+                     stay fast while remember() traffic never lets up
+
+Usage: python scripts/test_memory_write_behind.py
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from agent.memory.module import MemoryModule
+
+tmp = tempfile.mkdtemp()
+
+
+def texts(records):
+    return sorted(r.text for r in records)
+
+
+# ---------- read your writes ----------
+mem = MemoryModule(os.path.join(tmp, "wb.db"), write_behind=True, flush_interval=10.0)
+assert mem.remember("Gradient boosting overfit on the churn data", tags=["lesson"]) is None
+assert texts(mem.recall("gradient boosting")) == ["Gradient boosting overfit on the churn data"]
+mem.remember("Learning rate 0.05 fixed the boosting overfit")
+assert "Learning rate 0.05" in mem.context("boosting overfit")
+mem.close()
+print("ok: write-behind reads its own writes")
+
+# ---------- reads under concurrent producers ----------
+mem = MemoryModule(os.path.join(tmp, "busy.db"), write_behind=True)
+stop = threading.Event()
+
+
+def producer(n):
+    i = 0
+    while not stop.is_set():
+        mem.remember(f"writer {n} scratch note {i}")
+        i += 1
+        time.sleep(0.001 * (n % 3))
+
+
+writers = [threading.Thread(target=producer, args=(n,), daemon=True) for n in range(8)]
+for t in writers:
+    t.start()
+time.sleep(0.1)
+try:
+    slowest = 0.0
+    for i in range(20):
+        mem.remember(f"reader marker {i} about calibration")
+        start = time.perf_counter()
+        assert f"reader marker {i} about calibration" in texts(mem.recall(f"reader marker {i} calibration", k=3))
+        slowest = max(slowest, time.perf_counter() - start)
+    assert slowest < 2.0, f"recall blocked {slowest:.2f}s behind other writers"
+finally:
+    stop.set()
+    for t in writers:
+        t.join()
+mem.close()
+print(f"ok: recall under 8 busy writers (slowest {slowest * 1000:.0f} ms)")
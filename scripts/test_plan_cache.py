@@ -0,0 +1,76 @@
+"""
+Smoke test - planner plan cache
+-------------------------------
+  hits             a repeated command (up to whitespace) is served from the
+                   cache and counted; verbatim plans (llm prompts, file
+                   content, code) only hit for the exact same text
+  copy on read     mutating a returned plan never changes what the cache
+                   hands out next
+  lru              the cache holds at most `size` plans, dropping the least
+                   recently used
+  memory context   create_plan() still builds the memory context on every
+                   call, so a cached plan never carries stale memories
+
+Usage: python scripts/test_plan_cache.py
+"""
+
+import os
+import tempfile
+
+from agent.memory.module import MemoryModule
+from agent.planner import Planner, PlanCache
+
+tmp = tempfile.mkdtemp()
+TOOLS = "load data/telco.csv and then describe the data"
+
+# ---------- hits ----------
+planner = Planner(cache_size=8)
+first = planner.create_plan(TOOLS)["plan"]
+again = planner.create_plan("  load data/telco.csv   and then describe the data ")["plan"]
+assert again == first and again is not first
+stats = planner.plan_cache_stats()
+assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1) and stats["hit_rate"] == 0.5
+
+planner.create_plan("Write this to file a.txt: two  spaces")
+plan = planner.create_plan("Write this to file a.txt: two spaces")["plan"]
+assert plan[0]["kwargs"]["content"] == "two spaces"  # not served the other text's plan
+assert planner.create_plan("Write this to file a.txt: two spaces")["plan"] == plan
+assert planner.plan_cache_stats()["hits"] == 2
+print("ok: hits, misses and verbatim plans")
+
+# ---------- copy on read ----------
+plan = planner.create_plan(TOOLS)["plan"]
+plan[0]["kwargs"]["path"] = "data/other.csv"
+plan[1]["name"] = "split_data"
+plan.append({"type": "llm", "input": "injected"})
+assert planner.create_plan(TOOLS)["plan"] == first
+cache = PlanCache(size=4)
+stored = [{"type": "tool", "name": "read_file", "kwargs": {"path": "a.txt"}}]
+cache.put("read file a.txt", stored)
+stored[0]["kwargs"]["path"] = "b.txt"  # the caller's list after put()
+assert cache.get("read file a.txt")[0]["kwargs"]["path"] == "a.txt"
+print("ok: returned and stored plans are copies")
+
+# ---------- lru bound ----------
+cache = PlanCache(size=3)
+for name in ("a", "b", "c"):
+    cache.put(f"read file {name}.txt", [{"type": "tool", "name": "read_file", "kwargs": {"path": name}}])
+assert cache.get("read file a.txt") is not None  # a is now the most recent
+cache.put("read file d.txt", [{"type": "tool", "name": "read_file", "kwargs": {"path": "d"}}])
+assert cache.stats()["size"] == 3
+assert cache.get("read file b.txt") is None
+assert all(cache.get(f"read file {n}.txt") is not None for n in ("a", "c", "d"))
+assert Planner(cache_size=0).plan_cache is None and Planner(cache_size=0).plan_cache_stats() == {}
+print("ok: bounded LRU")
+
+# ---------- memory context stays fresh ----------
+mem = MemoryModule(os.path.join(tmp, "plan_cache.db"), touch_interval=0)
+planner = Planner(memory=mem, cache_size=8)
+before = planner.create_plan(TOOLS)["memory_context"]
+mem.remember("Ran tool 'load_csv' with args={'path': 'data/telco.csv'}. Result: 7043 rows, churn rate 26.5%",
+             tags=["tool", "load_csv"])
+after = planner.create_plan(TOOLS)
+assert planner.plan_cache_stats()["hits"] == 1  # the plan came from the cache...
+assert "7043 rows" in after["memory_context"] and "7043 rows" not in before  # ...the memories did not
+mem.close()
+print("ok: cached plans get fresh memory context")
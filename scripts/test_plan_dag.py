@@ -0,0 +1,88 @@
+"""
+Smoke test - which llm steps get the previous step's answer
+-----------------------------------------------------------
+The planner splits on a bare "and", so "compare X and Y" becomes two llm
+steps. The second half is a fragment and must still be chained to the
+first (and be sent the first answer as context); only clauses that read
+as complete questions or requests may run on their own. Combined llm
+batches finish on pool workers; every one of them must be counted.
+
+Usage: python scripts/test_plan_dag.py
+"""
+
+import json
+import threading
+
+from agent.executor import Executor
+from agent.planner import Planner
+from agent.tools import ToolRegistry
+
+planner = Planner()
+
+
+def plan(text):
+    return planner.create_plan(text)["plan"]
+
+
+def after(text):
+    return [step["after"] for step in plan(text)]
+
+
+# "X and Y": the fragment after "and" waits for (and is given) the first half
+assert after("compare logistic regression and random forest") == [(), (0,)]
+assert after("explain the difference between classification and regression") == [(), (0,)]
+
+# pointing back, or too short to stand alone: chained
+assert after("what is cross validation, then what is bagging and then compare them") == [(), (), (1,)]
+assert after("what is bagging and then why") == [(), (0,)]
+assert after("what is bagging and then explain overfitting") == [(), (0,)]
+
+# complete questions / requests: independent
+assert after("what is bagging, then how does boosting work") == [(), ()]
+assert after("what is bagging and then explain overfitting in trees") == [(), ()]
+
+# tool steps keep their data dependencies; an llm step after a tool waits for it
+assert after("load data/x.csv and then describe the data, then what is a good baseline model") == [(), (0,), (1,)]
+
+
+class RecordingCore:
+    def __init__(self):
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompt):
+        with self._lock:
+            self.prompts.append(prompt)
+        return f"answer<{prompt.splitlines()[0]}>"
+
+
+core = RecordingCore()
+Executor(core, ToolRegistry()).execute_steps(plan("compare logistic regression and random forest"))
+second = next(p for p in core.prompts if p.startswith("random forest"))
+assert "Previous result:\nanswer<compare logistic regression>" in second, second
+print("ok: llm step dependencies")
+
+
+# combined batches from many threads at once: every one is counted
+class JsonCore:
+    def generate(self, prompt):
+        return json.dumps({"1": "first", "2": "second"})
+
+
+combined = Executor(JsonCore(), ToolRegistry(), llm_batch="combined")
+pair = plan("what is bagging, then how does boosting work")
+
+
+def replay():
+    for _ in range(50):
+        assert combined.execute_steps(pair) == "second"
+
+
+threads = [threading.Thread(target=replay) for _ in range(16)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+assert (combined.batched_requests, combined.batched_steps) == (800, 1600), \
+    (combined.batched_requests, combined.batched_steps)
+print("ok: combined batch counters under concurrency")
@@ -0,0 +1,94 @@
+"""
+Smoke test - planner intent matching
+------------------------------------
+  intents          each command maps to the expected tool and arguments;
+                   anything else falls back to an llm step
+  casing           write_file and run_python arguments keep the original
+                   casing and spacing (other paths come from the
+                   lower-cased clause)
+  prefilter        the keyword prefilter never changes the outcome: every
+                   clause gets the same step as trying each intent's
+                   patterns in order, and keywords found inside longer
+                   words ("dataframe" -> "data") still count
+  multi-step       create_plan splits on sequence markers, in order
+
+Usage: python scripts/test_planner_intents.py
+"""
+
+import re
+
+from agent import planner as planner_module
+from agent.planner import Planner
+
+planner = Planner(cache_size=0)
+detect = planner._detect_single_intent
+
+
+def tool(name, **kwargs):
+    return {"type": "tool", "name": name, "kwargs": kwargs}
+
+
+# ---------- one clause each ----------
+EXPECTED = {
+    "Read file notes/Run-01.txt": tool("read_file", path="notes/run-01.txt"),
+    "open the file a.md": tool("read_file", path="a.md"),
+    "Write this to file Out.txt: Hello, World!": tool("write_file", path="Out.txt", content="Hello, World!"),
+    "Run python: print(3 * 7)": tool("run_python", code="print(3 * 7)"),
+    "execute code   x = 'A'  ": tool("run_python", code="x = 'A'"),
+    "Create a project called churn_model in ./work": tool("generate_scaffold", project_name="churn_model",
+                                                          base_path="./work"),
+    "load the csv file data/telco.csv": tool("load_csv", path="data/telco.csv"),
+    "read data/train.csv": tool("load_csv", path="data/train.csv"),
+    "show the data": tool("preview_data", n=5),
+    "show first 12 rows": tool("preview_data", n=12),
+    "summarize the data": tool("describe_data"),
+    "data summary please": tool("describe_data"),
+    "list the columns": tool("column_info"),
+    "split the data": tool("split_data"),
+    "encode categoricals": tool("encode_categoricals"),
+    "normalize numeric features": tool("scale_numericals"),
+    "export the dataframe to clean.csv": tool("save_dataframe", path="clean.csv"),
+    "What is cross validation?": {"type": "llm", "input": "What is cross validation?"},
+    "explain the data leakage risk": {"type": "llm", "input": "explain the data leakage risk"},
+}
+for clause, step in EXPECTED.items():
+    assert detect(clause) == step, (clause, detect(clause), step)
+print(f"ok: {len(EXPECTED)} clauses map to the expected steps")
+
+# ---------- verbatim casing ----------
+assert detect("WRITE TO FILE Report.MD: Recall = 0.81\n  AUC = 0.9")["kwargs"] == \
+    {"path": "Report.MD", "content": "Recall = 0.81\n  AUC = 0.9"}
+assert detect("Run Python: Print('MiXeD')")["kwargs"]["code"] == "Print('MiXeD')"
+print("ok: verbatim arguments keep their casing")
+
+
+# ---------- the prefilter agrees with trying every pattern ----------
+def every_pattern(clause):
+    lower = clause.lower()
+    for _, _, patterns, build in planner_module._INTENT_SPECS:
+        for pat, flags in patterns:
+            m = re.search(pat, lower, flags)
+            if m:
+                return build(m, clause)
+    return {"type": "llm", "input": clause}
+
+
+verbs = ["read", "load", "show", "preview", "describe", "split", "encode", "scale", "save", "export", "list",
+         "write", "run", "create", "explain"]
+objects = ["file x.txt", "the file X.txt", "data/a.csv", "the csv file b.csv", "the data", "data head",
+           "first 3 rows", "the columns", "categoricals", "numerical", "the dataframe to y.parquet",
+           "to file z.txt: Body", "python: 1+1", "project called p in .", "dataframes", "metadata",
+           "numbers", "columnist", "categorization"]
+clauses = [f"{v} {o}" for v in verbs for o in objects] + list(EXPECTED)
+for clause in clauses:
+    assert detect(clause) == every_pattern(clause), clause
+assert detect("describe the dataframe") == tool("describe_data")  # "data" inside "dataframe"
+print(f"ok: prefilter matches exhaustive matching on {len(clauses)} clauses")
+
+# ---------- multi-step ----------
+plan = Planner(cache_size=0).create_plan(
+    "load data/telco.csv and then show first 10 rows, then list the columns and explain churn drivers")["plan"]
+assert [s.get("name", s["type"]) for s in plan] == ["load_csv", "preview_data", "column_info", "llm"]
+assert plan[0]["kwargs"] == {"path": "data/telco.csv"} and plan[1]["kwargs"] == {"n": 10}
+assert plan[3]["input"] == "explain churn drivers"
+print("ok: multi-step commands split in order")
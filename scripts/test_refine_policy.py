@@ -0,0 +1,66 @@
+"""
+Smoke test - plan refinement accounting
+---------------------------------------
+Every refinement a policy skips is credited the same way in
+latency_saved_ms: the typical refinement round trip, or None while none
+has been measured. A refinement the run waited for saves 0.
+
+Usage: python scripts/test_refine_policy.py
+"""
+
+import os
+import tempfile
+
+from agent.agent import Agent
+from agent.memory.router import MemoryRouter
+from agent.providers import FakeProvider
+
+tmp = tempfile.mkdtemp()
+os.chdir(tmp)
+with open("notes.txt", "w") as f:
+    f.write("baseline accuracy 0.81\n")
+
+LLM_ONLY = "what is bagging?"
+TOOL_THEN_LLM = "read file notes.txt and then summarize it"
+TOOL_ONLY = "read file notes.txt"
+
+router = MemoryRouter(os.path.join(tmp, "memory"))
+
+
+def agent(refine):
+    return Agent(router=router, refine=refine,
+                 provider=FakeProvider(latency_ms=20, latency="fixed", tokens_per_sec=0))
+
+
+def saved(bot, command):
+    return bot.run_detailed(command).latency_saved_ms
+
+
+# ---------- off: nothing is ever measured, so nothing is claimed ----------
+bot = agent("off")
+assert [saved(bot, c) for c in (LLM_ONLY, TOOL_THEN_LLM, TOOL_ONLY)] == [None, None, None]
+assert bot.refinement_stats()["typical_refine_ms"] is None
+assert bot.refinement_stats()["latency_saved_ms"] == 0
+bot.close()
+print("ok: refine=off reports no estimate")
+
+# ---------- speculative: skipped runs before and after a measurement ----------
+bot = agent("speculative")
+assert saved(bot, LLM_ONLY) is None  # can't overlap, and no estimate yet
+assert saved(bot, TOOL_ONLY) is None
+assert saved(bot, TOOL_THEN_LLM) >= 20  # made alongside the tool step
+estimate = bot.refinement_stats()["typical_refine_ms"]
+assert estimate >= 20
+assert saved(bot, LLM_ONLY) == saved(bot, TOOL_ONLY) == estimate  # skipped for either reason
+bot.close()
+print(f"ok: speculative credits skipped refinements {estimate:.1f} ms")
+
+# ---------- llm_steps: waited for saves nothing, skipped gets the estimate ----------
+bot = agent("llm_steps")
+assert saved(bot, TOOL_ONLY) is None
+result = bot.run_detailed(LLM_ONLY)
+assert result.refined and result.latency_saved_ms == 0.0
+assert saved(bot, TOOL_ONLY) == bot.refinement_stats()["typical_refine_ms"] >= 20
+bot.close()
+print("ok: llm_steps")
+router.close()
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# offline: every agent below gets FakeStreamingClient, the key is never used
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+sys.path.insert(0, os.getcwd())
+os.chdir(tempfile.mkdtemp())  # memory shards go to a scratch dir
+
+from fastapi.testclient import TestClient
+
+import app as api
+
+
+class FakeStreamingClient:
+    """responses.create(): word-by-word delta events, `delay` seconds apart."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.responses = self
+
+    def _text(self, input):
+        return "Cross validation splits the data into folds and rotates the held out fold."
+
+    def create(self, model, input, stream=False, **params):
+        if not stream:
+            time.sleep(self.delay * len(self._text(input).split()))
+            return SimpleNamespace(output_text=self._text(input))
+        return self._events(input)
+
+    def _events(self, input):
+        for i, word in enumerate(self._text(input).split()):
+            time.sleep(self.delay)
+            yield SimpleNamespace(type="response.output_text.delta", delta=(" " if i else "") + word)
+        yield SimpleNamespace(type="response.completed")
+
+
+api.bot.core.client = FakeStreamingClient()
+api.bot.refine = "off"
+query = "What is cross validation?"
+
+start = time.perf_counter()
+api.bot.run(query)
+blocking = time.perf_counter() - start
+
+start = time.perf_counter()
+first = None
+text = ""
+for event in api.bot.stream(query):
+    if event["event"] == "llm_delta":
+        first = first or time.perf_counter() - start
+        text += event["delta"]
+total = time.perf_counter() - start
+assert text == FakeStreamingClient()._text(query)
+print(f"run():    first byte after {blocking * 1000:7.1f} ms (whole answer)")
+print(f"stream(): first delta after {first * 1000:7.1f} ms, done after {total * 1000:7.1f} ms")
+
+client = TestClient(api.app)
+resp = client.post("/agent/query/stream", json={"query": query})
+events = [json.loads(line) for line in resp.text.splitlines()]
+assert resp.headers["content-type"].startswith("application/x-ndjson")
+assert [e["event"] for e in events][:2] == ["plan", "step_started"] and events[-1]["event"] == "done"
+print("NDJSON events:", [e["event"] for e in events])
+
+resp = client.post("/agent/query/stream?format=sse", json={"query": "describe the data"})
+assert resp.headers["content-type"].startswith("text/event-stream")
+print("SSE:", resp.text.split("\n\n")[2])
+
+# the tenant's agent goes back to the pool even if the body is never sent
+def in_use(tenant):
+    return api.agents._agents[(tenant, None)][2]
+
+
+async def receive():
+    return {"type": "http.disconnect"}
+
+
+async def gone(message):
+    raise OSError("client went away")
+
+
+resp = api.stream_agent(api.QueryRequest(query=query, tenant="stream_gone"))
+assert in_use("stream_gone") == 1
+resp.agent.core.client = FakeStreamingClient()
+try:
+    asyncio.run(resp({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, gone))
+except Exception:
+    pass  # ClientDisconnect
+assert in_use("stream_gone") == 0, in_use("stream_gone")
+client.post("/agent/query/stream", json={"query": query, "tenant": "stream_gone"})
+assert in_use("stream_gone") == 0
+print("agent released after a dropped and a completed stream")
+
+# a consumer that goes away stops the plan before its next (paid) step
+from agent.executor import Executor
+from agent.tools import ToolRegistry
+
+
+class CountingCore:
+    def __init__(self):
+        self.calls = 0
+
+    def stream(self, prompt):
+        self.calls += 1
+        time.sleep(0.1)
+        yield f"answer to {prompt.splitlines()[0]}"
+
+    def generate(self, prompt):
+        return "".join(self.stream(prompt))
+
+
+core = CountingCore()
+executor = Executor(core, ToolRegistry(), max_workers=1)
+steps = [{"type": "llm", "input": f"question {i}"} for i in range(4)]
+events = executor.stream_steps(steps)
+assert next(events)["event"] == "step_started"
+events.close()
+time.sleep(0.5)
+assert core.calls == 1, core.calls
+print(f"consumer gone after step 0: {core.calls} of {len(steps)} llm steps ran")